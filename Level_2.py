@@ -1,9 +1,20 @@
 import streamlit as st
-from groq import Groq
-import requests
-from datetime import datetime
-import re
-import wikipedia
+import time
+from functools import partial
+from router import (
+    LEVEL_2_ROUTER, NUMBER_RE, CALC_TRIGGER_WHAT_IS_RE, FACTORIAL_OF_RE,
+)
+from route_cache import ROUTE_CACHE
+from crypto_prices import COIN_INDEX
+from multi_intent import route_intents, run_intents, merge_results
+from chat_history import render_history
+from calc_engine import extract_expression
+from llm_stream import timed_stream, log_completion, log_failure
+from llm_clients import LLM_CLIENTS
+from context_packer import DEFAULT_BUDGET, count_tokens, pack_context
+from metrics_panel import render_metrics_panel
+from model_router import AUTO_MODEL, DEFAULT_LATENCY_TARGET, MODEL_ROUTER
+from tools import TOOLS, load as load_tool
 
 # Page configuration
 st.set_page_config(page_title="Multi-Tool Agent", page_icon="🤖", layout="wide")
@@ -17,9 +28,27 @@ with st.sidebar:
     # Model selection
     model_name = st.selectbox(
         "Select Llama Model",
-        ["llama-3.3-70b-versatile", "llama-3.1-70b-versatile", "llama-3.1-8b-instant", "mixtral-8x7b-32768"],
-        index=0
+        [AUTO_MODEL, "llama-3.3-70b-versatile", "llama-3.1-8b-instant"],
+        index=1,
+        format_func=lambda name: "Auto (fastest model that fits)" if name == AUTO_MODEL else name
     )
+    latency_target = st.slider("Latency target (s)", 0.5, 10.0, DEFAULT_LATENCY_TARGET, step=0.5,
+                               disabled=model_name != AUTO_MODEL,
+                               help="Auto picks a model and answer length per question to answer within this")
+    stream_responses = st.checkbox("Stream LLM responses", value=True)
+    context_budget = st.slider("Conversation context (tokens)", 0, 8000, DEFAULT_BUDGET, step=250,
+                               help="Recent turns sent with each LLM question; 0 sends only the question")
+    cache_answers = st.checkbox("Cache LLM answers", value=False,
+                                help="Reuse stored answers for repeated or near-identical questions")
+    cache_threshold = st.slider("Cache match similarity", 0.5, 1.0, 0.9, step=0.01, disabled=not cache_answers,
+                                help="1.0 reuses only exact repeats")
+    if cache_answers:
+        # SQLite and the cache load only once the cache is switched on
+        from llm_cache import LLM_RESPONSE_CACHE
+        cache_stats = LLM_RESPONSE_CACHE.stats()
+        st.caption(f"{cache_stats['entries']} cached answers, reused {cache_stats['total_hits']} times, "
+                   f"{cache_stats['saved_seconds']:.0f}s of generation saved")
+    render_metrics_panel()
     
     st.divider()
     st.markdown("### 🛠️ Available Tools")
@@ -37,237 +66,179 @@ with st.sidebar:
         st.session_state.messages = []
         st.rerun()
 
-# Tool Functions
-def python_interpreter(code: str) -> str:
+# Tool Functions (shared tools package; a tool's module is imported on first use)
+def python_interpreter(code: str, inputs: dict = None) -> str:
     """Execute Python code safely."""
-    try:
-        import io
-        import sys
-        
-        # Whitelist safe built-ins
-        safe_builtins = {
-            'print': print, 'range': range, 'len': len, 'sum': sum,
-            'max': max, 'min': min, 'abs': abs, 'round': round,
-            'sorted': sorted, 'list': list, 'dict': dict, 'set': set,
-            'str': str, 'int': int, 'float': float, 'bool': bool,
-            'enumerate': enumerate, 'zip': zip, 'map': map, 'filter': filter,
-        }
-        
-        # Capture output
-        old_stdout = sys.stdout
-        sys.stdout = buffer = io.StringIO()
-        
-        # Execute with restricted environment
-        exec(code, {"__builtins__": safe_builtins}, {})
-        
-        output = buffer.getvalue()
-        sys.stdout = old_stdout
-        
-        return output if output else "Code executed successfully (no output)"
-        
-    except Exception as e:
-        import sys
-        sys.stdout = old_stdout
-        return f"Error: {str(e)}"
+    return load_tool("python_interpreter")(code, inputs, cache_output=code in TEMPLATE_CODES)
 
-def calculator(expression: str) -> str:
-    """Evaluate mathematical expressions."""
-    try:
-        import ast
-        import operator
-        
-        ops = {
-            ast.Add: operator.add,
-            ast.Sub: operator.sub,
-            ast.Mult: operator.mul,
-            ast.Div: operator.truediv,
-            ast.Pow: operator.pow,
-            ast.USub: operator.neg,
-        }
-        
-        def eval_expr(node):
-            if isinstance(node, ast.Num):
-                return node.n
-            elif isinstance(node, ast.Constant):
-                return node.value
-            elif isinstance(node, ast.BinOp):
-                return ops[type(node.op)](eval_expr(node.left), eval_expr(node.right))
-            elif isinstance(node, ast.UnaryOp):
-                return ops[type(node.op)](eval_expr(node.operand))
-            else:
-                raise TypeError(node)
-        
-        result = eval_expr(ast.parse(expression, mode='eval').body)
-        return f"Result: {result}"
-    except Exception as e:
-        return f"Error: {str(e)}"
+def tool_function(name: str):
+    """Return the tool function for a route, bound to this session's settings."""
+    if name == "python_interpreter":
+        return python_interpreter
+    if name == "get_weather":
+        return partial(load_tool(name), api_key=weather_api_key)
+    return load_tool(name)
 
-def get_weather(city: str) -> str:
-    """Get current weather for a city."""
-    if not weather_api_key:
-        return "Weather API key not configured."
-    
-    try:
-        url = f"http://api.openweathermap.org/data/2.5/weather?q={city}&appid={weather_api_key}&units=metric"
-        response = requests.get(url, timeout=5)
-        data = response.json()
-        
-        if response.status_code == 200:
-            temp = data['main']['temp']
-            desc = data['weather'][0]['description']
-            humidity = data['main']['humidity']
-            feels_like = data['main']['feels_like']
-            return f"Weather in {city}: {temp}°C (feels like {feels_like}°C), {desc}, Humidity: {humidity}%"
-        else:
-            return f"Error: {data.get('message', 'Unknown error')}"
-    except Exception as e:
-        return f"Error: {str(e)}"
+# Interpreter templates read their parameters from injected globals, so each
+# compiles once and its output can be cached per input value
+FACTORIAL_CODE = """
+result = 1
+for i in range(1, n + 1):
+    result *= i
+print(f"Factorial of {n} is {result}")
+"""
 
-def get_crypto_price(crypto: str) -> str:
-    """Get cryptocurrency price."""
-    try:
-        url = f"https://api.coingecko.com/api/v3/simple/price?ids={crypto.lower()}&vs_currencies=usd&include_24hr_change=true"
-        response = requests.get(url, timeout=5)
-        data = response.json()
-        
-        if crypto.lower() in data:
-            price = data[crypto.lower()]['usd']
-            change = data[crypto.lower()].get('usd_24h_change', 0)
-            change_symbol = "📈" if change > 0 else "📉"
-            return f"{crypto.capitalize()}: ${price:,.2f} USD {change_symbol} ({change:.2f}% 24h)"
-        else:
-            return f"'{crypto}' not found. Try: bitcoin, ethereum, cardano, solana"
-    except Exception as e:
-        return f"Error: {str(e)}"
+FIBONACCI_CODE = """
+def fibonacci(n):
+    fib = [0, 1]
+    for i in range(2, n):
+        fib.append(fib[i-1] + fib[i-2])
+    return fib
 
-def get_country_info(country: str) -> str:
-    """Get country information."""
-    try:
-        url = f"https://restcountries.com/v3.1/name/{country}"
-        response = requests.get(url, timeout=5)
-        data = response.json()
-        
-        if response.status_code == 200 and len(data) > 0:
-            c = data[0]
-            name = c['name']['common']
-            capital = c.get('capital', ['N/A'])[0]
-            population = c.get('population', 'N/A')
-            region = c.get('region', 'N/A')
-            area = c.get('area', 'N/A')
-            return f"{name}: Capital - {capital}, Population - {population:,}, Region - {region}, Area - {area:,} km²"
-        else:
-            return f"Could not find '{country}'"
-    except Exception as e:
-        return f"Error: {str(e)}"
+result = fibonacci(n)
+print(f"First {n} Fibonacci numbers: {result}")
+"""
 
-def get_current_time() -> str:
-    """Get current date and time."""
-    current = datetime.now()
-    return f"Current: {current.strftime('%A, %B %d, %Y at %H:%M:%S')}"
+EVEN_CODE = """
+even_numbers = [i for i in range(1, 21) if i % 2 == 0]
+print(f"Even numbers from 1 to 20: {even_numbers}")
+"""
 
-def search_wikipedia(query: str) -> str:
-    """Search Wikipedia."""
-    try:
-        result = wikipedia.summary(query, sentences=3)
-        return result
-    except Exception as e:
-        return f"Error: {str(e)}"
+TEMPLATE_CODES = {FACTORIAL_CODE, FIBONACCI_CODE, EVEN_CODE}
 
-def process_query(query: str, client, model_name) -> str:
-    """Process user query and route to appropriate tool."""
+def route_query(query: str) -> dict:
+    """Decide which tool a query needs and with which params."""
     query_lower = query.lower()
+    hits = LEVEL_2_ROUTER.scan(query_lower)
     
     # Check for Python code execution requests
-    python_keywords = ['python code', 'write python', 'execute python', 'factorial', 'fibonacci', 'python script', 'for loop', 'while loop']
-    if any(kw in query_lower for kw in python_keywords):
+    if 'python' in hits:
         # Check for factorial
-        if 'factorial' in query_lower:
+        if 'factorial' in hits:
             # Extract number if specified
-            match = re.search(r'factorial of (\d+)', query_lower)
+            match = FACTORIAL_OF_RE.search(query_lower)
             n = match.group(1) if match else '10'
-            code = f"""
-n = {n}
-result = 1
-for i in range(1, n + 1):
-    result *= i
-print(f"Factorial of {{n}} is {{result}}")
-"""
-            return python_interpreter(code)
+            return {"tool": "python_interpreter", "params": {"code": FACTORIAL_CODE, "inputs": {"n": int(n)}}}
         
         # Check for fibonacci
-        elif 'fibonacci' in query_lower:
-            match = re.search(r'(\d+)', query_lower)
+        elif 'fibonacci' in hits:
+            match = NUMBER_RE.search(query_lower)
             n = match.group(1) if match else '10'
-            code = f"""
-def fibonacci(n):
-    fib = [0, 1]
-    for i in range(2, n):
-        fib.append(fib[i-1] + fib[i-2])
-    return fib
-
-result = fibonacci({n})
-print(f"First {n} Fibonacci numbers: {{result}}")
-"""
-            return python_interpreter(code)
+            return {"tool": "python_interpreter", "params": {"code": FIBONACCI_CODE, "inputs": {"n": int(n)}}}
         
         # Check for even numbers
-        elif 'even' in query_lower and 'numbers' in query_lower:
-            code = """
-even_numbers = [i for i in range(1, 21) if i % 2 == 0]
-print(f"Even numbers from 1 to 20: {even_numbers}")
-"""
-            return python_interpreter(code)
+        elif 'even' in hits and 'numbers' in hits:
+            return {"tool": "python_interpreter", "params": {"code": EVEN_CODE}}
     
     # Check for calculator requests
-    calc_patterns = [r'\d+\s*[\+\-\*\/\^]\s*\d+', r'calculate', r'compute', r'what is \d+']
-    if any(re.search(pattern, query_lower) for pattern in calc_patterns):
-        match = re.search(r'(\d+\s*[\+\-\*\/\^]\s*\d+)', query)
-        if match:
-            return calculator(match.group(1))
+    if CALC_TRIGGER_WHAT_IS_RE.search(query_lower):
+        expression = extract_expression(query)
+        if expression:
+            return {"tool": "calculator", "params": {"expression": expression}}
     
     # Check for weather
-    if 'weather' in query_lower:
+    if 'weather' in hits:
         words = query.split()
         for i, word in enumerate(words):
             if word.lower() == 'in' and i + 1 < len(words):
                 city = ' '.join(words[i+1:]).strip('?.!')
-                return get_weather(city)
+                return {"tool": "get_weather", "params": {"city": city}}
     
     # Check for crypto
-    crypto_keywords = ['bitcoin', 'ethereum', 'crypto', 'btc', 'eth', 'price of']
-    if any(kw in query_lower for kw in crypto_keywords):
-        for crypto in ['bitcoin', 'ethereum', 'cardano', 'solana', 'dogecoin']:
-            if crypto in query_lower:
-                return get_crypto_price(crypto)
+    if 'crypto' in hits:
+        crypto = COIN_INDEX.resolve(query_lower)
+        if crypto:
+            return {"tool": "get_crypto_price", "params": {"crypto": crypto}}
     
     # Check for country info
-    if 'country' in query_lower or 'capital of' in query_lower or 'population of' in query_lower:
+    if 'country' in hits:
         words = query.replace('?', '').replace('.', '').split()
         if 'of' in words:
             idx = words.index('of')
             if idx + 1 < len(words):
                 country = ' '.join(words[idx+1:])
-                return get_country_info(country)
+                return {"tool": "get_country_info", "params": {"country": country}}
     
     # Check for time
-    if 'time' in query_lower or 'date' in query_lower:
-        return get_current_time()
+    if 'time' in hits:
+        return {"tool": "get_current_time", "params": {}}
     
     # Check for Wikipedia
-    wiki_keywords = ['who is', 'what is', 'tell me about', 'wikipedia', 'information about']
-    if any(kw in query_lower for kw in wiki_keywords):
-        return search_wikipedia(query)
+    if 'wiki' in hits:
+        return {"tool": "search_wikipedia", "params": {"query": query}}
+    
+    return None
+
+# Network-bound tools that multi-intent queries run concurrently
+CONCURRENT_TOOLS = {name for name, tool in TOOLS.items() if tool.io_bound}
+
+def process_query(query: str, client, model_name, stream: bool = False, history: list = ()):
+    """Process user query and route to appropriate tool.
+    
+    With stream=True the LLM fallback returns a generator of text pieces
+    instead of a string. The LLM also sees as much of history (the earlier
+    messages) as fits in the context budget.
+    """
+    def cached_route(q):
+        return ROUTE_CACHE.route(f"level_2:{LEVEL_2_ROUTER.fingerprint}", q, route_query)
+    
+    # Several tool requests in one query run together, network tools concurrently
+    intents = route_intents(query, cached_route)
+    if intents:
+        tasks = [(segment, route["tool"], tool_function(route["tool"]), route["params"]) for segment, route in intents]
+        return merge_results(run_intents(tasks, CONCURRENT_TOOLS))
+    
+    route = cached_route(query)
+    if route is not None:
+        return tool_function(route["tool"])(**route["params"])
     
     # Default: Use LLM
     try:
-        response = client.chat.completions.create(
-            model=model_name,
-            messages=[{"role": "user", "content": query}],
-            temperature=0.7,
-            max_tokens=1024
-        )
+        messages = pack_context(history, query, context_budget)
+        prompt_tokens = count_tokens(messages)
+        # Auto: the models that fit the latency target for this question, best first
+        auto = model_name == AUTO_MODEL
+        plan = MODEL_ROUTER.plan(messages, latency_target, stream) if auto else [
+            {"model": model_name, "max_tokens": 1024, "timeout": None}]
+        cache = None
+        if cache_answers:
+            from llm_cache import LLM_RESPONSE_CACHE as cache
+            for choice in plan:
+                cached = cache.lookup(choice["model"], 0.7, messages, cache_threshold)
+                if cached is not None:
+                    return cached
+        
+        def ask(choice):
+            # Auto mode falls back to the next model instead of retrying a slow one
+            api = client.with_options(timeout=choice["timeout"], max_retries=0) if auto else client
+            return api.chat.completions.create(
+                model=choice["model"],
+                messages=messages,
+                temperature=0.7,
+                max_tokens=choice["max_tokens"],
+                stream=stream
+            )
+        
+        if auto:
+            choice, start, response = MODEL_ROUTER.complete(plan, ask, stream)
+        else:
+            choice, start = plan[0], time.perf_counter()
+            response = ask(choice)
+        model = choice["model"]
+        if stream:
+            pieces = timed_stream(response, model, lambda chunk: chunk.choices[0].delta.content, start,
+                                  prompt_tokens=prompt_tokens)
+            return cache.record(pieces, model, 0.7, messages, start) if cache else pieces
+        usage = response.usage
+        log_completion(model, start, response.choices[0].message.content,
+                       usage.prompt_tokens if usage else prompt_tokens, usage.completion_tokens if usage else None)
+        if cache:
+            cache.store(model, 0.7, messages, response.choices[0].message.content, time.perf_counter() - start)
         return response.choices[0].message.content
     except Exception as e:
+        # Auto mode has logged each model's failure already
+        if model_name != AUTO_MODEL:
+            log_failure(model_name, e)
         return f"Error: {str(e)}"
 
 def main():
@@ -294,9 +265,9 @@ def main():
         """)
         return
     
-    # Initialize Groq client
+    # Reuse the process-wide Groq client for this key
     try:
-        client = Groq(api_key=groq_api_key)
+        client = LLM_CLIENTS.groq(groq_api_key)
     except Exception as e:
         st.error(f"Error: {str(e)}")
         return
@@ -305,10 +276,8 @@ def main():
     if "messages" not in st.session_state:
         st.session_state.messages = []
     
-    # Display chat messages
-    for message in st.session_state.messages:
-        with st.chat_message(message["role"]):
-            st.markdown(message["content"])
+    # Display chat messages (recent window; older pages on demand)
+    render_history(st.session_state.messages)
     
     # Chat input
     if prompt := st.chat_input("Ask me anything..."):
@@ -318,15 +287,20 @@ def main():
             st.markdown(prompt)
         
         with st.chat_message("assistant"):
-            with st.spinner("🤔 Thinking..."):
-                try:
-                    response = process_query(prompt, client, model_name)
+            try:
+                with st.spinner("🤔 Thinking..."):
+                    response = process_query(prompt, client, model_name, stream=stream_responses,
+                                             history=st.session_state.messages[:-1])
+                # LLM answers stream token by token; tool results arrive whole
+                if isinstance(response, str):
                     st.markdown(response)
-                    st.session_state.messages.append({"role": "assistant", "content": response})
-                except Exception as e:
-                    error_msg = f"Error: {str(e)}"
-                    st.error(error_msg)
-                    st.session_state.messages.append({"role": "assistant", "content": error_msg})
+                else:
+                    response = st.write_stream(response)
+                st.session_state.messages.append({"role": "assistant", "content": response})
+            except Exception as e:
+                error_msg = f"Error: {str(e)}"
+                st.error(error_msg)
+                st.session_state.messages.append({"role": "assistant", "content": error_msg})
 
 if __name__ == "__main__":
     main()
@@ -1,9 +1,18 @@
 import streamlit as st
-from groq import Groq
-import requests
-from datetime import datetime
-import re
-import wikipedia
+from functools import partial
+from router import (
+    LEVEL_3_ROUTER, NUMBER_RE, NUMBERS_RE, CALC_TRIGGER_RE,
+    PALINDROME_TEXT_RE, REVERSE_TEXT_RE, IS_PRIME_RE, count_targets as select_count_targets,
+)
+from route_cache import ROUTE_CACHE
+from crypto_prices import COIN_INDEX
+from multi_intent import route_intents, run_intents, merge_results
+from chat_history import render_history
+from calc_engine import extract_expression
+from text_stats import requested_stats
+from tools import TOOLS, load as load_tool
+from tools.compute import parse_numbers
+from metrics_panel import render_metrics_panel
 
 
 # Page configuration
@@ -20,15 +29,22 @@ with st.sidebar:
     # Model selection
     model_name = st.selectbox(
         "Select Llama Model",
-        ["llama-3.3-70b-versatile", "llama-3.1-70b-versatile", "llama-3.1-8b-instant"],
+        ["llama-3.3-70b-versatile", "llama-3.1-8b-instant"],
         index=0
     )
     
+    # The character counter analyzes this instead of the question when set
+    uploaded_document = st.file_uploader("Document to analyze (optional)", type=["txt", "md", "csv", "log", "json"])
+    render_metrics_panel()
+    
     st.divider()
     st.markdown("### 🛠️ Available Tools")
     st.markdown("""
     - 🐍 **Python Interpreter** ✅
     - 🧮 **Calculator** ✅
+    - 🔢 **Number Theory** ✅
+    - ♾️ **Big Numbers** ✅
+    - 🔤 **Text Statistics** ✅
     - 🌤️ **Weather** ✅
     - 💰 **Crypto Prices** ✅
     - 🌍 **Country Info** ✅
@@ -42,537 +58,346 @@ with st.sidebar:
         st.rerun()
 
 
-# Tool Functions
-def python_interpreter(code: str) -> str:
+# Tool Functions (shared tools package; a tool's module is imported on first use)
+def python_interpreter(code: str, **inputs) -> str:
     """Execute Python code safely."""
     try:
-        import io
-        import sys
-        
-        safe_builtins = {
-            'print': print, 'range': range, 'len': len, 'sum': sum,
-            'max': max, 'min': min, 'abs': abs, 'round': round,
-            'sorted': sorted, 'list': list, 'dict': dict, 'set': set,
-            'str': str, 'int': int, 'float': float, 'bool': bool,
-            'enumerate': enumerate, 'zip': zip, 'map': map, 'filter': filter,
-        }
-        
-        old_stdout = sys.stdout
-        sys.stdout = buffer = io.StringIO()
-        
-        exec(code, {"__builtins__": safe_builtins}, {})
-        
-        output = buffer.getvalue()
-        sys.stdout = old_stdout
-        
-        return output if output else "Code executed successfully (no output)"
-        
+        inputs = {name: TEMPLATE_INPUT_TYPES.get(name, str)(value) for name, value in inputs.items()}
     except Exception as e:
-        import sys
-        sys.stdout = old_stdout
         return f"Error: {str(e)}"
+    return load_tool("python_interpreter")(code, inputs, cache_output=code in TEMPLATE_CODES)
 
 
-def calculator(expression: str) -> str:
-    """Evaluate mathematical expressions."""
-    try:
-        import ast
-        import operator as op
-        
-        ops = {
-            ast.Add: op.add,
-            ast.Sub: op.sub,
-            ast.Mult: op.mul,
-            ast.Div: op.truediv,
-            ast.Pow: op.pow,
-            ast.USub: op.neg,
-        }
-        
-        def eval_expr(node):
-            if isinstance(node, ast.Num):
-                return node.n
-            elif isinstance(node, ast.Constant):
-                return node.value
-            elif isinstance(node, ast.BinOp):
-                return ops[type(node.op)](eval_expr(node.left), eval_expr(node.right))
-            elif isinstance(node, ast.UnaryOp):
-                return ops[type(node.op)](eval_expr(node.operand))
-            else:
-                raise TypeError(node)
-        
-        result = eval_expr(ast.parse(expression, mode='eval').body)
-        return f"Result: {result}"
-    except Exception as e:
-        return f"Error: {str(e)}"
+def text_statistics(text: str, count: str = "", document: str = "") -> str:
+    """Count characters, words and character classes of a text or uploaded document."""
+    if document:
+        if uploaded_document is None or uploaded_document.name != document:
+            return f"Error: '{document}' is no longer uploaded"
+        uploaded_document.seek(0)
+        return load_tool("text_statistics")(text, count, document=uploaded_document)
+    return load_tool("text_statistics")(text, count)
 
 
-def get_weather(city: str) -> str:
-    """Get current weather for a city."""
-    if not weather_api_key:
-        return "Weather API key not configured."
-    
-    try:
-        url = f"http://api.openweathermap.org/data/2.5/weather?q={city}&appid={weather_api_key}&units=metric"
-        response = requests.get(url, timeout=5)
-        data = response.json()
-        
-        if response.status_code == 200:
-            temp = data['main']['temp']
-            desc = data['weather'][0]['description']
-            humidity = data['main']['humidity']
-            feels_like = data['main']['feels_like']
-            return f"Weather in {city}: {temp}°C (feels like {feels_like}°C), {desc}, Humidity: {humidity}%"
-        else:
-            return f"Error: {data.get('message', 'Unknown error')}"
-    except Exception as e:
-        return f"Error: {str(e)}"
+# ========== INTERPRETER TEMPLATES ==========
+# Parameters are injected as globals, so each template compiles once and its
+# output can be cached per input value.
 
+PALINDROME_CODE = """# Palindrome Checker
+# Inputs: text
+cleaned = ''.join(c.lower() for c in text if c.isalnum())
+is_palindrome = cleaned == cleaned[::-1]
 
-def get_crypto_price(crypto: str) -> str:
-    """Get cryptocurrency price."""
-    try:
-        url = f"https://api.coingecko.com/api/v3/simple/price?ids={crypto.lower()}&vs_currencies=usd&include_24hr_change=true"
-        response = requests.get(url, timeout=5)
-        data = response.json()
-        
-        if crypto.lower() in data:
-            price = data[crypto.lower()]['usd']
-            change = data[crypto.lower()].get('usd_24h_change', 0)
-            change_symbol = "📈" if change > 0 else "📉"
-            return f"{crypto.capitalize()}: ${price:,.2f} USD {change_symbol} ({change:.2f}% 24h)"
-        else:
-            return f"'{crypto}' not found. Try: bitcoin, ethereum, cardano, solana"
-    except Exception as e:
-        return f"Error: {str(e)}"
+print(f"Text: {text}")
+print(f"Cleaned: {cleaned}")
+print(f"Reversed: {cleaned[::-1]}")
+print(f"\\nIs palindrome? {is_palindrome}")"""
 
+EVEN_CODE = """# Even Numbers Generator
+# Inputs: limit
+even_numbers = [i for i in range(1, limit+1) if i % 2 == 0]
 
-def get_country_info(country: str) -> str:
-    """Get country information."""
-    try:
-        url = f"https://restcountries.com/v3.1/name/{country}"
-        response = requests.get(url, timeout=5)
-        data = response.json()
-        
-        if response.status_code == 200 and len(data) > 0:
-            c = data[0]
-            name = c['name']['common']
-            capital = c.get('capital', ['N/A'])[0]
-            population = c.get('population', 'N/A')
-            region = c.get('region', 'N/A')
-            area = c.get('area', 'N/A')
-            return f"{name}: Capital - {capital}, Population - {population:,}, Region - {region}, Area - {area:,} km²"
-        else:
-            return f"Could not find '{country}'"
-    except Exception as e:
-        return f"Error: {str(e)}"
+print(f"Even numbers from 1 to {limit}:")
+print(even_numbers)
+print(f"\\nCount: {len(even_numbers)}")
+print(f"Sum: {sum(even_numbers)}")"""
 
+ODD_CODE = """# Odd Numbers Generator
+# Inputs: limit
+odd_numbers = [i for i in range(1, limit+1) if i % 2 != 0]
 
-def get_current_time() -> str:
-    """Get current date and time."""
-    current = datetime.now()
-    return f"Current: {current.strftime('%A, %B %d, %Y at %H:%M:%S')}"
+print(f"Odd numbers from 1 to {limit}:")
+print(odd_numbers)
+print(f"\\nCount: {len(odd_numbers)}")
+print(f"Sum: {sum(odd_numbers)}")"""
 
+STATS_CODE = """# Number Statistics Calculator
+# Inputs: numbers
+total = sum(numbers)
+average = total / len(numbers)
+maximum = max(numbers)
+minimum = min(numbers)
 
-def analyze_query(query: str) -> dict:
-    """Analyze query and determine which tool to use."""
+print(f"Numbers: {numbers}")
+print(f"\\nStatistics:")
+print(f"  Sum: {total}")
+print(f"  Average: {average:.2f}")
+print(f"  Count: {len(numbers)}")
+print(f"  Maximum: {maximum}")
+print(f"  Minimum: {minimum}")
+print(f"  Range: {maximum - minimum}")"""
+
+SQUARE_CODE = """# Square Calculator
+# Inputs: n
+result = n ** 2
+
+print(f"Square of {n}:")
+print(f"{n}² = {result}")
+print(f"\\nAlso:")
+print(f"  Square root of {result} = {result ** 0.5:.2f}")"""
+
+CUBE_CODE = """# Cube Calculator
+# Inputs: n
+result = n ** 3
+
+print(f"Cube of {n}:")
+print(f"{n}³ = {result}")
+print(f"\\nAlso:")
+print(f"  Cube root of {result} = {result ** (1/3):.2f}")"""
+
+REVERSE_CODE = """# String Reverser
+# Inputs: text
+reversed_text = text[::-1]
+
+print(f"Original: {text}")
+print(f"Reversed: {reversed_text}")
+print(f"\\nLength: {len(text)}")
+print(f"Is palindrome: {text.lower() == reversed_text.lower()}")"""
+
+GENERIC_CODE = """
+# Edit this code to do what you want
+print("Python interpreter is ready!")
+print("Modify the code below:")
+print()
+
+# Example operations:
+text = "Hello World"
+print(f"Text: {text}")
+print(f"Uppercase: {text.upper()}")
+print(f"Lowercase: {text.lower()}")
+print(f"Length: {len(text)}")
+
+# Math example:
+numbers = [1, 2, 3, 4, 5]
+print(f"\\nNumbers: {numbers}")
+print(f"Sum: {sum(numbers)}")
+print(f"Average: {sum(numbers)/len(numbers)}")"""
+
+# Deterministic, side-effect free templates whose output may be cached
+TEMPLATE_CODES = {
+    PALINDROME_CODE, EVEN_CODE, ODD_CODE, STATS_CODE, SQUARE_CODE, CUBE_CODE, REVERSE_CODE,
+}
+
+
+# How approval-form strings become template inputs (anything else stays a str)
+TEMPLATE_INPUT_TYPES = {"n": int, "limit": int, "numbers": parse_numbers}
+
+
+def template_route(code: str, cacheable: bool = True, **inputs) -> dict:
+    """Route to an interpreter template; inputs are shown as editable fields next to the code."""
+    params = {"code": code, **inputs}
+    route = {"tool": "Python Interpreter", "params": params, "display_params": dict(params)}
+    if not cacheable:
+        route["cacheable"] = False
+    return route
+
+
+def big_numbers_route(operation: str, numbers: str) -> dict:
+    """Route to the big-number engine with editable operation and numbers fields."""
+    params = {"operation": operation, "numbers": numbers}
+    return {"tool": "Big Numbers", "params": params, "display_params": dict(params)}
+
+
+def route_query(query: str) -> dict:
+    """Decide which tool a query needs and with which params (no functions attached)."""
     query_lower = query.lower()
     
-    # ============ MASSIVE PYTHON KEYWORDS LIST ============
-    python_keywords = [
-        # General Python
-        'python', 'code', 'script', 'program', 'execute', 'run', 'compile',
-        'coding', 'programming', 'write code', 'run code',
-        
-        # Common algorithms
-        'factorial', 'fibonacci', 'prime', 'palindrome', 'armstrong',
-        'perfect number', 'lcm', 'gcd', 'hcf',
-        
-        # Math operations
-        'square', 'cube', 'power', 'root', 'sqrt', 'exponent',
-        'sum', 'average', 'mean', 'median', 'mode', 'total',
-        'multiply', 'divide', 'add', 'subtract',
-        
-        # Number operations
-        'even', 'odd', 'positive', 'negative', 'natural', 'whole',
-        'factor', 'multiple', 'divisor', 'remainder', 'modulo',
-        
-        # Sequences
-        'sequence', 'series', 'pattern', 'generate', 'create',
-        
-        # Counting & Finding
-        'count', 'how many', 'number of', 'total of', 'find',
-        'search', 'locate', 'detect', 'identify',
-        
-        # String operations
-        'string', 'text', 'character', 'char', 'letter', 'word',
-        'sentence', 'reverse', 'uppercase', 'lowercase', 'capitalize',
-        'replace', 'remove', 'extract', 'parse',
-        
-        # Special characters
-        'dot', 'dots', 'period', 'comma', 'semicolon', 'colon',
-        'space', 'digit', 'number', 'symbol', 'special character',
-        
-        # Data structures
-        'list', 'array', 'dictionary', 'dict', 'tuple', 'set',
-        'collection', 'data structure',
-        
-        # Control flow
-        'loop', 'for loop', 'while loop', 'if', 'else', 'elif',
-        'condition', 'iterate', 'iteration', 'function', 'def',
-        
-        # Processing
-        'process', 'transform', 'convert', 'change', 'modify',
-        'format', 'filter', 'sort', 'order', 'arrange',
-        
-        # Analysis
-        'analyze', 'calculate', 'compute', 'determine', 'check',
-        'verify', 'test', 'validate',
-    ]
+    hits = LEVEL_3_ROUTER.scan(query_lower)
     
     # Check if any Python keyword is in query
-    if any(kw in query_lower for kw in python_keywords):
+    if 'python' in hits:
+        
+        # ========== NUMBER THEORY ==========
+        # Answered natively instead of through generated code
+        if hits & {'prime', 'gcd', 'lcm', 'perfect', 'armstrong'}:
+            numbers = NUMBERS_RE.findall(query)
+            if 'gcd' in hits:
+                operation = 'gcd'
+            elif 'lcm' in hits:
+                operation = 'lcm'
+            elif 'perfect' in hits:
+                operation, default = 'perfect', '10000'
+            elif 'armstrong' in hits:
+                operation, default = 'armstrong', '1000'
+            elif IS_PRIME_RE.search(query_lower):
+                operation = 'is_prime'
+            elif 'count' in hits:
+                operation, default = 'count_primes', '50'
+            else:
+                operation, default = 'primes', '50'
+            
+            if numbers or operation not in ('gcd', 'lcm', 'is_prime'):
+                params = {"operation": operation, "numbers": ', '.join(numbers) or default}
+                return {"tool": "Number Theory", "params": params, "display_params": dict(params)}
         
         # ========== UNIVERSAL CHARACTER COUNTER ==========
-        if any(word in query_lower for word in ['count', 'how many', 'number of', 'total']):
-            query_escaped = query.replace('"', '\\"').replace("'", "\\'")
-            
-            # Determine what to count
-            count_targets = []
-            
-            # Check for specific characters/patterns
-            if any(word in query_lower for word in ['dot', 'period', '.']):
-                count_targets.append(('dots (.)', '.'))
-            if any(word in query_lower for word in ['comma', ',']):
-                count_targets.append(('commas (,)', ','))
-            if any(word in query_lower for word in ['space', 'spaces']):
-                count_targets.append(('spaces', ' '))
-            if any(word in query_lower for word in ['letter', 'letters', 'alphabet']):
-                count_targets.append(('letters', 'alpha'))
-            if any(word in query_lower for word in ['digit', 'digits', 'number']):
-                count_targets.append(('digits', 'digit'))
-            if any(word in query_lower for word in ['word', 'words']):
-                count_targets.append(('words', 'word'))
-            if any(word in query_lower for word in ['vowel', 'vowels']):
-                count_targets.append(('vowels', 'vowel'))
-            if any(word in query_lower for word in ['consonant', 'consonants']):
-                count_targets.append(('consonants', 'consonant'))
-            if any(word in query_lower for word in ['uppercase', 'capital']):
-                count_targets.append(('uppercase letters', 'upper'))
-            if any(word in query_lower for word in ['lowercase', 'small']):
-                count_targets.append(('lowercase letters', 'lower'))
-            if 'character' in query_lower or 'char' in query_lower:
-                count_targets.append(('characters', 'char'))
-            
-            # If no specific target, count everything
-            if not count_targets:
-                count_targets = [('everything', 'all')]
-            
-            # Generate comprehensive counting code
-            code = f"""# Universal Character Counter
-text = "{query_escaped}"
-
-print("=" * 50)
-print("CHARACTER ANALYSIS")
-print("=" * 50)
-
-# Total counts
-print(f"\\nTotal characters: {{len(text)}}")
-print(f"Total words: {{len(text.split())}}")
-
-# Character type counts
-letters = sum(c.isalpha() for c in text)
-digits = sum(c.isdigit() for c in text)
-spaces = sum(c.isspace() for c in text)
-uppercase = sum(c.isupper() for c in text)
-lowercase = sum(c.islower() for c in text)
-
-print(f"\\nLetters: {{letters}}")
-print(f"Digits: {{digits}}")
-print(f"Spaces: {{spaces}}")
-print(f"Uppercase: {{uppercase}}")
-print(f"Lowercase: {{lowercase}}")
-
-# Vowels and consonants
-vowels = 'aeiouAEIOU'
-vowel_count = sum(c in vowels for c in text)
-consonant_count = sum(c.isalpha() and c not in vowels for c in text)
-
-print(f"\\nVowels: {{vowel_count}}")
-print(f"Consonants: {{consonant_count}}")
-
-# Special characters
-dots = text.count('.')
-commas = text.count(',')
-exclamations = text.count('!')
-questions = text.count('?')
-
-print(f"\\nSPECIAL CHARACTERS:")
-print(f"  Dots (.): {{dots}}")
-print(f"  Commas (,): {{commas}}")
-print(f"  Exclamations (!): {{exclamations}}")
-print(f"  Questions (?): {{questions}}")
-
-# Character frequency (top 10)
-from collections import Counter
-char_freq = Counter(text)
-print(f"\\nTOP 10 CHARACTERS:")
-for char, count in char_freq.most_common(10):
-    if char == ' ':
-        print(f"  'space': {{count}}")
-    elif char == '\\n':
-        print(f"  'newline': {{count}}")
-    else:
-        print(f"  '{{char}}': {{count}}")
-"""
-            return {"tool": "Python Interpreter", "function": python_interpreter, "params": {"code": code}, "display_params": {"code": code}}
+        if 'count' in hits:
+            # Determine what to count (nothing specific reports everything)
+            requested = requested_stats(select_count_targets(hits))
+            params = {"text": query, "count": ', '.join(requested)}
+            return {"tool": "Text Statistics", "params": params, "display_params": dict(params), "cacheable": False}
         
         # ========== SPECIFIC PATTERNS ==========
         
         # Factorial
-        elif 'factorial' in query_lower:
-            match = re.search(r'(\d+)', query_lower)
-            n = match.group(1) if match else '10'
-            code = f"""# Factorial Calculator
-n = {n}
-result = 1
-for i in range(1, n + 1):
-    result *= i
-
-print(f"Factorial of {{n}}:")
-print(f"{{n}}! = {{result}}")
-print(f"\\nCalculation: 1", end="")
-for i in range(2, n + 1):
-    print(f" × {{i}}", end="")
-print(f" = {{result}}")"""
-            return {"tool": "Python Interpreter", "function": python_interpreter, "params": {"code": code}, "display_params": {"code": code}}
-        
-        # Fibonacci
-        elif 'fibonacci' in query_lower:
-            match = re.search(r'(\d+)', query_lower)
+        elif 'factorial' in hits:
+            match = NUMBER_RE.search(query_lower)
             n = match.group(1) if match else '10'
-            code = f"""# Fibonacci Sequence Generator
-def fibonacci(n):
-    fib = [0, 1]
-    for i in range(2, n):
-        fib.append(fib[i-1] + fib[i-2])
-    return fib
-
-n = {n}
-result = fibonacci(n)
-
-print(f"First {{n}} Fibonacci numbers:")
-print(result)
-print(f"\\nSum: {{sum(result)}}")
-print(f"Last number: {{result[-1]}}")"""
-            return {"tool": "Python Interpreter", "function": python_interpreter, "params": {"code": code}, "display_params": {"code": code}}
+            return big_numbers_route('factorial', n)
         
-        # Prime numbers
-        elif 'prime' in query_lower:
-            match = re.search(r'(\d+)', query_lower)
-            n = match.group(1) if match else '50'
-            code = f"""# Prime Number Finder
-def is_prime(n):
-    if n < 2:
-        return False
-    for i in range(2, int(n**0.5) + 1):
-        if n % i == 0:
-            return False
-    return True
-
-limit = {n}
-primes = [num for num in range(2, limit+1) if is_prime(num)]
-
-print(f"Prime numbers up to {{limit}}:")
-print(primes)
-print(f"\\nTotal count: {{len(primes)}}")
-print(f"Largest prime: {{max(primes) if primes else 'None'}}")"""
-            return {"tool": "Python Interpreter", "function": python_interpreter, "params": {"code": code}, "display_params": {"code": code}}
+        # Fibonacci (two numbers select a window of the sequence)
+        elif 'fibonacci' in hits:
+            numbers = NUMBERS_RE.findall(query)[:2]
+            return big_numbers_route('fibonacci', ', '.join(numbers) or '10')
         
         # Palindrome check
-        elif 'palindrome' in query_lower:
+        elif 'palindrome' in hits:
             # Extract text after common phrases
-            text_match = re.search(r'(?:check|is|palindrome)\s+["\']?([a-zA-Z0-9\s]+)["\']?', query_lower)
+            text_match = PALINDROME_TEXT_RE.search(query_lower)
             if text_match:
                 text = text_match.group(1).strip()
             else:
                 text = "racecar"
             
-            code = f"""# Palindrome Checker
-text = "{text}"
-cleaned = ''.join(c.lower() for c in text if c.isalnum())
-is_palindrome = cleaned == cleaned[::-1]
-
-print(f"Text: {{text}}")
-print(f"Cleaned: {{cleaned}}")
-print(f"Reversed: {{cleaned[::-1]}}")
-print(f"\\nIs palindrome? {{is_palindrome}}")"""
-            return {"tool": "Python Interpreter", "function": python_interpreter, "params": {"code": code}, "display_params": {"code": code}}
+            return template_route(PALINDROME_CODE, text=text, cacheable=False)
         
         # Even/Odd numbers
-        elif ('even' in query_lower or 'odd' in query_lower) and ('number' in query_lower or 'numbers' in query_lower):
-            match = re.search(r'(\d+)', query_lower)
+        elif ('even' in hits or 'odd' in hits) and 'number' in hits:
+            match = NUMBER_RE.search(query_lower)
             n = match.group(1) if match else '30'
             
-            if 'even' in query_lower:
-                code = f"""# Even Numbers Generator
-limit = {n}
-even_numbers = [i for i in range(1, limit+1) if i % 2 == 0]
-
-print(f"Even numbers from 1 to {{limit}}:")
-print(even_numbers)
-print(f"\\nCount: {{len(even_numbers)}}")
-print(f"Sum: {{sum(even_numbers)}}")"""
+            if 'even' in hits:
+                return template_route(EVEN_CODE, limit=n)
             else:
-                code = f"""# Odd Numbers Generator
-limit = {n}
-odd_numbers = [i for i in range(1, limit+1) if i % 2 != 0]
-
-print(f"Odd numbers from 1 to {{limit}}:")
-print(odd_numbers)
-print(f"\\nCount: {{len(odd_numbers)}}")
-print(f"Sum: {{sum(odd_numbers)}}")"""
-            
-            return {"tool": "Python Interpreter", "function": python_interpreter, "params": {"code": code}, "display_params": {"code": code}}
+                return template_route(ODD_CODE, limit=n)
         
         # Sum/Average of numbers
-        elif any(word in query_lower for word in ['sum', 'average', 'mean', 'total']) and not 'count' in query_lower:
-            numbers = re.findall(r'\d+', query)
+        elif 'stats' in hits and 'count_word' not in hits:
+            numbers = NUMBERS_RE.findall(query)
             if numbers and len(numbers) > 1:
-                nums_str = ', '.join(numbers)
-                code = f"""# Number Statistics Calculator
-numbers = [{nums_str}]
-
-total = sum(numbers)
-average = total / len(numbers)
-maximum = max(numbers)
-minimum = min(numbers)
-
-print(f"Numbers: {{numbers}}")
-print(f"\\nStatistics:")
-print(f"  Sum: {{total}}")
-print(f"  Average: {{average:.2f}}")
-print(f"  Count: {{len(numbers)}}")
-print(f"  Maximum: {{maximum}}")
-print(f"  Minimum: {{minimum}}")
-print(f"  Range: {{maximum - minimum}}")"""
-                return {"tool": "Python Interpreter", "function": python_interpreter, "params": {"code": code}, "display_params": {"code": code}}
+                return template_route(STATS_CODE, numbers=', '.join(numbers))
         
         # Square/Cube/Power
-        elif any(word in query_lower for word in ['square', 'cube', 'power', 'exponent']):
-            match = re.search(r'(\d+)', query_lower)
+        elif 'power' in hits:
+            match = NUMBER_RE.search(query_lower)
             if match:
                 n = match.group(1)
-                if 'square' in query_lower:
-                    code = f"""# Square Calculator
-n = {n}
-result = n ** 2
-
-print(f"Square of {{n}}:")
-print(f"{{n}}² = {{result}}")
-print(f"\\nAlso:")
-print(f"  Square root of {{result}} = {{result ** 0.5:.2f}}")"""
-                elif 'cube' in query_lower:
-                    code = f"""# Cube Calculator
-n = {n}
-result = n ** 3
-
-print(f"Cube of {{n}}:")
-print(f"{{n}}³ = {{result}}")
-print(f"\\nAlso:")
-print(f"  Cube root of {{result}} = {{result ** (1/3):.2f}}")"""
+                if 'square' in hits:
+                    return template_route(SQUARE_CODE, n=n)
+                elif 'cube' in hits:
+                    return template_route(CUBE_CODE, n=n)
                 else:
-                    code = f"""# Power Calculator
-n = {n}
-
-print(f"Powers of {{n}}:")
-for exp in range(1, 11):
-    print(f"{{n}}^{{exp}} = {{n**exp}}")"""
-                
-                return {"tool": "Python Interpreter", "function": python_interpreter, "params": {"code": code}, "display_params": {"code": code}}
+                    # "powers of 2", or "3 to the power of 200" with an exponent
+                    return big_numbers_route('power', ', '.join(NUMBERS_RE.findall(query)[:2]))
         
         # Reverse string
-        elif 'reverse' in query_lower:
+        elif 'reverse' in hits:
             # Try to extract text to reverse
-            text_match = re.search(r'reverse\s+["\']?([^"\']+)["\']?', query, re.IGNORECASE)
+            text_match = REVERSE_TEXT_RE.search(query)
             if text_match:
                 text = text_match.group(1).strip()
             else:
                 text = query.replace('reverse', '').strip()
             
-            text_escaped = text.replace('"', '\\"').replace("'", "\\'")
-            code = f"""# String Reverser
-text = "{text_escaped}"
-reversed_text = text[::-1]
-
-print(f"Original: {{text}}")
-print(f"Reversed: {{reversed_text}}")
-print(f"\\nLength: {{len(text)}}")
-print(f"Is palindrome: {{text.lower() == reversed_text.lower()}}")"""
-            return {"tool": "Python Interpreter", "function": python_interpreter, "params": {"code": code}, "display_params": {"code": code}}
+            return template_route(REVERSE_CODE, text=text, cacheable=False)
         
         # Generic Python request
         else:
             code = f"""# Python Code Execution
 # Your query: {query}
-
-# Edit this code to do what you want
-print("Python interpreter is ready!")
-print("Modify the code below:")
-print()
-
-# Example operations:
-text = "Hello World"
-print(f"Text: {{text}}")
-print(f"Uppercase: {{text.upper()}}")
-print(f"Lowercase: {{text.lower()}}")
-print(f"Length: {{len(text)}}")
-
-# Math example:
-numbers = [1, 2, 3, 4, 5]
-print(f"\\nNumbers: {{numbers}}")
-print(f"Sum: {{sum(numbers)}}")
-print(f"Average: {{sum(numbers)/len(numbers)}}")"""
-            return {"tool": "Python Interpreter", "function": python_interpreter, "params": {"code": code}, "display_params": {"code": code}}
+""" + GENERIC_CODE
+            return {"tool": "Python Interpreter", "params": {"code": code}, "display_params": {"code": code}, "cacheable": False,
+                    "fallback": True}
     
     # Calculator
-    calc_patterns = [r'\d+\s*[\+\-\*\/\^]\s*\d+', r'calculate', r'compute']
-    if any(re.search(pattern, query_lower) for pattern in calc_patterns):
-        match = re.search(r'(\d+\s*[\+\-\*\/\^]\s*\d+)', query)
-        if match:
-            expr = match.group(1)
-            return {"tool": "Calculator", "function": calculator, "params": {"expression": expr}, "display_params": {"expression": expr}}
+    if CALC_TRIGGER_RE.search(query_lower):
+        expr = extract_expression(query)
+        if expr:
+            return {"tool": "Calculator", "params": {"expression": expr}, "display_params": {"expression": expr}}
     
     # Weather
-    if 'weather' in query_lower:
+    if 'weather' in hits:
         words = query.split()
         for i, word in enumerate(words):
             if word.lower() == 'in' and i + 1 < len(words):
                 city = ' '.join(words[i+1:]).strip('?.!')
-                return {"tool": "Weather API", "function": get_weather, "params": {"city": city}, "display_params": {"city": city}}
+                return {"tool": "Weather API", "params": {"city": city}, "display_params": {"city": city}}
     
     # Crypto
-    crypto_keywords = ['bitcoin', 'ethereum', 'crypto', 'btc', 'eth', 'price', 'cryptocurrency']
-    if any(kw in query_lower for kw in crypto_keywords):
-        for crypto in ['bitcoin', 'ethereum', 'cardano', 'solana', 'dogecoin']:
-            if crypto in query_lower or crypto[:3] in query_lower:
-                return {"tool": "Crypto Price", "function": get_crypto_price, "params": {"crypto": crypto}, "display_params": {"crypto": crypto}}
+    if 'crypto' in hits:
+        crypto = COIN_INDEX.resolve(query_lower)
+        if crypto:
+            return {"tool": "Crypto Price", "params": {"crypto": crypto}, "display_params": {"crypto": crypto}}
     
     # Country
-    if 'country' in query_lower or 'capital of' in query_lower or 'population of' in query_lower:
+    if 'country' in hits:
         words = query.replace('?', '').replace('.', '').split()
         if 'of' in words:
             idx = words.index('of')
             if idx + 1 < len(words):
                 country = ' '.join(words[idx+1:])
-                return {"tool": "Country Info", "function": get_country_info, "params": {"country": country}, "display_params": {"country": country}}
+                return {"tool": "Country Info", "params": {"country": country}, "display_params": {"country": country}}
     
     # Time
-    if 'time' in query_lower or 'date' in query_lower or 'today' in query_lower or 'now' in query_lower:
-        return {"tool": "Current Time", "function": get_current_time, "params": {}, "display_params": {}}
+    if 'time' in hits:
+        return {"tool": "Current Time", "params": {}, "display_params": {}}
     
     return None
 
 
+# Network-bound tools that multi-intent queries run concurrently
+CONCURRENT_TOOLS = {tool.title for tool in TOOLS.values() if tool.io_bound}
+
+
+def cached_route(query: str) -> dict:
+    """Route a query through the process-wide routing cache."""
+    return ROUTE_CACHE.route(f"level_3:{LEVEL_3_ROUTER.fingerprint}", query, route_query)
+
+
+def tool_function(tool: str):
+    """Return the tool function for a tool name, bound to this session's settings."""
+    if tool == "Python Interpreter":
+        return python_interpreter
+    if tool == "Text Statistics":
+        return text_statistics
+    if tool == "Weather API":
+        return partial(load_tool(tool), api_key=weather_api_key)
+    return load_tool(tool)
+
+
+def run_multi_intent(**intents) -> str:
+    """Re-route each approved intent and run them, the network tools concurrently."""
+    tasks = []
+    for segment in intents.values():
+        route = cached_route(segment)
+        if route is None:
+            tasks.append((segment, None, lambda: "I couldn't match that to a specific tool.", {}))
+        else:
+            tasks.append((segment, route["tool"], tool_function(route["tool"]), route["params"]))
+    return merge_results(run_intents(tasks, CONCURRENT_TOOLS))
+
+
+def analyze_query(query: str) -> dict:
+    """Analyze query and determine which tool to use."""
+    # Several tool requests in one query are approved together as editable intents
+    intents = route_intents(query, cached_route)
+    if intents:
+        display_params = {f"intent {i}": segment for i, (segment, _) in enumerate(intents, 1)}
+        tools = ", ".join(route["tool"] for _, route in intents)
+        return {"tool": f"Multiple Tools ({tools})", "function": run_multi_intent,
+                "params": dict(display_params), "display_params": display_params}
+    
+    route = cached_route(query)
+    if route is None:
+        return None
+    route.pop("cacheable", None)
+    route.pop("fallback", None)
+    if route["tool"] == "Text Statistics" and uploaded_document is not None:
+        # Count the uploaded document rather than the question
+        route["params"]["document"] = route["display_params"]["document"] = uploaded_document.name
+    route["function"] = tool_function(route["tool"])
+    return route
+
+
 def main():
     st.title("🤖 Multi-Tool Agent with Human Approval")
     st.markdown("*Every tool requires your approval before execution*")
@@ -590,6 +415,7 @@ def main():
         - "factorial of 10"
         - "fibonacci sequence 15"
         - "prime numbers up to 50"
+        - "gcd of 48, 36 and 120"
         - "even numbers to 30"
         - "reverse hello world"
         - "is racecar a palindrome"
@@ -609,10 +435,8 @@ def main():
     if "pending_approval" not in st.session_state:
         st.session_state.pending_approval = None
     
-    # Display chat messages
-    for message in st.session_state.messages:
-        with st.chat_message(message["role"]):
-            st.markdown(message["content"])
+    # Display chat messages (recent window; older pages on demand)
+    render_history(st.session_state.messages)
     
     # Show approval UI if pending
     if st.session_state.pending_approval:
@@ -678,6 +502,7 @@ def main():
                         response = """I couldn't match that to a specific tool. Try:
                         
 🐍 **Python:** count characters, factorial, fibonacci, prime numbers, palindrome, even/odd, reverse, square, cube, sum, average
+🔢 **Number Theory:** primes up to N, is N prime, gcd/lcm, perfect and armstrong numbers
 🧮 **Calculator:** 5+3, 10*2, 125/5
 🌤️ **Weather:** weather in [city]
 💰 **Crypto:** bitcoin price, ethereum price
@@ -0,0 +1,322 @@
+"""Headless HTTP API around the routing and tool engine.
+
+Every Streamlit interaction reruns a whole script, sidebar included, to
+answer one query. This ASGI app loads each level's script once at startup,
+without running its UI, and serves the same functions as JSON endpoints:
+
+    POST   /v1/query              {"query", "level", "history"} -> Level 1/2 process_query
+    POST   /v1/query/batch        {"level", "queries": [...]}   -> answers in order
+    POST   /v1/analyze            {"query"} -> Level 3 route and an approval token
+    POST   /v1/tools/{name}       {"params"} -> run a tool, or an approval token if it needs sign-off
+    POST   /v1/approvals/{token}  {"params"} -> run the approved call, with optional edited params
+    DELETE /v1/approvals/{token}  -> cancel it
+    GET    /v1/tools, /health, /metrics
+
+With AGENT_API_KEY set, every endpoint but /health (a liveness probe that
+reveals nothing beyond the loaded levels) needs "Authorization: Bearer <key>".
+
+Routing, tools and Groq calls are blocking, so each one runs on a worker
+thread and the event loop keeps serving. AGENT_API_CONCURRENCY bounds the
+number of worker threads. Approval tokens mirror Level 3's
+`pending_approval`: they are single-use, expire, and are kept in memory, so
+clients must send the approval to the worker process that issued the token.
+
+    uvicorn api:app --port 8000 --workers 4
+"""
+import argparse
+import asyncio
+import json
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Literal
+
+import anyio
+from pydantic import BaseModel, Field, ValidationError
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+from context_packer import DEFAULT_BUDGET
+from engine import DEFAULT_MODEL, Engine
+from metrics import ERROR, METRICS
+from model_router import DEFAULT_LATENCY_TARGET
+from tools import TOOLS
+
+
+class Settings(BaseSettings):
+    """Service configuration, read from AGENT_API_* environment variables."""
+
+    model_config = SettingsConfigDict(env_prefix="AGENT_API_", populate_by_name=True)
+
+    concurrency: int = 32
+    max_batch: int = 100
+    # AGENT_API_KEY; when set, requests need "Authorization: Bearer <api_key>"
+    api_key: str = Field("", validation_alias="AGENT_API_KEY")
+    approval_ttl: float = 600.0
+    approval_tools: str = "python_interpreter"  # comma-separated tool names, or "*" for every tool
+    groq_api_key: str = Field("", validation_alias="GROQ_API_KEY")
+    weather_api_key: str = Field("", validation_alias="OPENWEATHER_API_KEY")
+    model: str = DEFAULT_MODEL
+    context_budget: int = DEFAULT_BUDGET
+    cache_answers: bool = False
+    cache_threshold: float = 0.9
+    latency_target: float = DEFAULT_LATENCY_TARGET  # seconds, when model is "auto"
+
+    def needs_approval(self, tool: str) -> bool:
+        return self.approval_tools.strip() == "*" or tool in {t.strip() for t in self.approval_tools.split(",")}
+
+
+class Message(BaseModel):
+    role: Literal["user", "assistant", "system"]
+    content: str
+
+
+class QueryRequest(BaseModel):
+    query: str = Field(min_length=1, max_length=4000)
+    level: Literal["level_1", "level_2"] = "level_2"
+    history: list[Message] = []
+
+
+class BatchRequest(BaseModel):
+    level: Literal["level_1", "level_2"] = "level_2"
+    queries: list[str] = Field(min_length=1)
+
+
+class AnalyzeRequest(BaseModel):
+    query: str = Field(min_length=1, max_length=4000)
+
+
+class ParamsRequest(BaseModel):
+    params: dict = {}
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class ApprovalStore:
+    """Tool calls waiting for sign-off, by single-use token; entries expire after ttl seconds."""
+
+    def __init__(self, ttl: float, max_pending: int = 1000):
+        self.ttl = ttl
+        self.max_pending = max_pending
+        self._pending = OrderedDict()  # token -> (expires_at, pending), oldest first
+        self._lock = threading.Lock()
+
+    def issue(self, pending: dict) -> tuple:
+        """Store pending ({"tool", "function", "display_params"}) and return (token, expires_at)."""
+        token = secrets.token_urlsafe(24)
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._expire()
+            self._pending[token] = (expires_at, pending)
+            while len(self._pending) > self.max_pending:
+                self._pending.popitem(last=False)
+        return token, expires_at
+
+    def take(self, token: str):
+        """Remove and return the pending call for token, or None if unknown or expired."""
+        with self._lock:
+            self._expire()
+            entry = self._pending.pop(token, None)
+        return entry[1] if entry else None
+
+    def _expire(self):
+        now = time.time()
+        while self._pending and next(iter(self._pending.values()))[0] < now:
+            self._pending.popitem(last=False)
+
+
+def _public(pending: dict, token: str, expires_at: float) -> dict:
+    return {"tool": pending["tool"], "params": pending["display_params"], "approval_token": token,
+            "expires_at": expires_at}
+
+
+class AgentAPI:
+    """Endpoint handlers sharing one engine, approval store and worker-thread limiter."""
+
+    def __init__(self, settings: Settings = None):
+        self.settings = settings or Settings()
+        s = self.settings
+        self.engine = Engine(s.groq_api_key, s.weather_api_key, s.model, s.context_budget,
+                             s.cache_answers, s.cache_threshold, s.latency_target)
+        self.approvals = ApprovalStore(self.settings.approval_ttl)
+        self.limiter = None
+
+    @asynccontextmanager
+    async def lifespan(self, app):
+        self.limiter = anyio.CapacityLimiter(self.settings.concurrency)
+        await anyio.to_thread.run_sync(self.engine.load)
+        yield
+
+    async def run(self, function, *args, **kwargs):
+        """Run blocking work on a worker thread, at most `concurrency` at a time."""
+        return await anyio.to_thread.run_sync(lambda: function(*args, **kwargs), limiter=self.limiter)
+
+    def redact(self, text):
+        """Mask the server's own upstream keys in text that is about to be sent to a client."""
+        if not isinstance(text, str):
+            return text
+        for secret in (self.settings.groq_api_key, self.settings.weather_api_key):
+            if secret:
+                text = text.replace(secret, "[redacted]")
+        return text
+
+    def endpoint(self, name: str, handler):
+        """Wrap a handler with authentication, JSON error responses and an agent_api span."""
+        async def endpoint(request):
+            with METRICS.span("api", endpoint=name) as span:
+                if self.settings.api_key and not secrets.compare_digest(
+                        request.headers.get("authorization", "").encode(), f"Bearer {self.settings.api_key}".encode()):
+                    return JSONResponse({"error": "unauthorized"}, status_code=401)
+                try:
+                    response = await handler(request)
+                except ValidationError as e:
+                    response = JSONResponse({"error": "invalid request", "details": e.errors(include_url=False)},
+                                            status_code=422)
+                except ApiError as e:
+                    response = JSONResponse({"error": e.message}, status_code=e.status)
+                except Exception as e:
+                    response = JSONResponse({"error": self.redact(f"{type(e).__name__}: {e}")}, status_code=500)
+                if response.status_code >= 500:
+                    span.outcome = ERROR
+                return response
+        return endpoint
+
+    @staticmethod
+    async def body(request, model):
+        try:
+            data = await request.json() if await request.body() else {}
+        except json.JSONDecodeError as e:
+            raise ApiError(400, f"invalid JSON: {e}")
+        return model.model_validate(data)
+
+    async def query(self, request):
+        body = await self.body(request, QueryRequest)
+        start = time.perf_counter()
+        history = [m.model_dump() for m in body.history]
+        answer = await self.run(self.engine.process, body.level, body.query, history)
+        return JSONResponse({"answer": self.redact(answer), "level": body.level,
+                             "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)})
+
+    async def query_batch(self, request):
+        body = await self.body(request, BatchRequest)
+        if len(body.queries) > self.settings.max_batch:
+            raise ApiError(413, f"at most {self.settings.max_batch} queries per batch")
+
+        async def answer(query: str) -> dict:
+            start = time.perf_counter()
+            try:
+                answer = await self.run(self.engine.process, body.level, query)
+                result = {"query": query, "answer": self.redact(answer)}
+            except Exception as e:
+                result = {"query": query, "error": self.redact(f"{type(e).__name__}: {e}")}
+            result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            return result
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(answer(q) for q in body.queries))
+        return JSONResponse({"level": body.level, "results": results,
+                             "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)})
+
+    async def analyze(self, request):
+        body = await self.body(request, AnalyzeRequest)
+        route = await self.run(self.engine.analyze, body.query)
+        if route is None:
+            return JSONResponse({"tool": None, "message": "No tool matches this query."})
+        # Level 3 asks for approval before every tool
+        pending = {"tool": route["tool"], "function": route["function"], "display_params": route["display_params"]}
+        return JSONResponse(_public(pending, *self.approvals.issue(pending)), status_code=202)
+
+    async def run_tool(self, request):
+        name = request.path_params["name"]
+        if name not in TOOLS:
+            raise ApiError(404, f"unknown tool {name!r}")
+        body = await self.body(request, ParamsRequest)
+        function = self.engine.tool(name)
+        if self.settings.needs_approval(name):
+            pending = {"tool": name, "function": function, "display_params": body.params}
+            return JSONResponse(_public(pending, *self.approvals.issue(pending)), status_code=202)
+        return await self.execute(name, function, body.params)
+
+    async def approve(self, request):
+        body = await self.body(request, ParamsRequest)
+        pending = self.approvals.take(request.path_params["token"])
+        if pending is None:
+            raise ApiError(404, "unknown or expired approval token")
+        unknown = set(body.params) - set(pending["display_params"])
+        if unknown:
+            raise ApiError(400, f"unknown parameters: {', '.join(sorted(unknown))}")
+        return await self.execute(pending["tool"], pending["function"], {**pending["display_params"], **body.params})
+
+    async def cancel(self, request):
+        if self.approvals.take(request.path_params["token"]) is None:
+            raise ApiError(404, "unknown or expired approval token")
+        return JSONResponse({"cancelled": True})
+
+    async def execute(self, tool: str, function, params: dict):
+        start = time.perf_counter()
+        try:
+            result = await self.run(function, **params)
+        except TypeError as e:
+            raise ApiError(400, f"bad parameters for {tool}: {e}")
+        return JSONResponse({"tool": tool, "result": self.redact(result),
+                             "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)})
+
+    async def tools(self, request):
+        return JSONResponse([
+            {"name": t.name, "title": t.title, "io_bound": t.io_bound, "cacheable": t.cacheable,
+             "idempotent": t.idempotent, "needs_approval": self.settings.needs_approval(t.name)}
+            for t in TOOLS.values()
+        ])
+
+    async def health(self, request):
+        return JSONResponse({"status": "ok", "levels": sorted(self.engine.levels),
+                             "llm": bool(self.engine.groq_api_key)})
+
+    async def metrics(self, request):
+        return PlainTextResponse(METRICS.to_prometheus(), media_type="text/plain; version=0.0.4")
+
+    def routes(self) -> list:
+        return [
+            Route("/v1/query", self.endpoint("query", self.query), methods=["POST"]),
+            Route("/v1/query/batch", self.endpoint("query_batch", self.query_batch), methods=["POST"]),
+            Route("/v1/analyze", self.endpoint("analyze", self.analyze), methods=["POST"]),
+            Route("/v1/tools", self.endpoint("tools", self.tools), methods=["GET"]),
+            Route("/v1/tools/{name}", self.endpoint("run_tool", self.run_tool), methods=["POST"]),
+            Route("/v1/approvals/{token}", self.endpoint("approve", self.approve), methods=["POST"]),
+            Route("/v1/approvals/{token}", self.endpoint("cancel", self.cancel), methods=["DELETE"]),
+            Route("/health", self.health, methods=["GET"]),
+            Route("/metrics", self.endpoint("metrics", self.metrics), methods=["GET"]),
+        ]
+
+
+def create_app(settings: Settings = None) -> Starlette:
+    api = AgentAPI(settings)
+    app = Starlette(routes=api.routes(), lifespan=api.lifespan)
+    app.state.api = api
+    return app
+
+
+app = create_app()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the agent over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1, help="worker processes")
+    args = parser.parse_args()
+    import uvicorn
+    uvicorn.run("api:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Run a JSONL file of queries through the agent and write the results as JSONL.
+
+    python batch.py queries.jsonl results.jsonl --level level_2 --concurrency 16
+    python batch.py queries.jsonl routes.jsonl --dry-run
+    python batch.py queries.jsonl results.jsonl --resume
+    python batch.py requests.jsonl titles.jsonl --field title --id-field request_id --dry-run
+
+Each input line is either a JSON string (the query) or an object. An object
+holds the query in --field ("query") and its id in --id-field ("id"); the id
+defaults to the line number. The input is streamed, and at most --concurrency
+queries run at once. Each result is written and flushed as soon as it
+finishes, so records appear in completion order and carry their input line:
+
+    {"id", "line", "query", "level", "status", "tool", "route", "answer", "route_ms", "run_ms", "total_ms"}
+
+status is "ok", "error" or "timeout", judged from the answer. Options:
+
+- --resume appends to an existing output and skips every id that already
+  has an "ok" record; failed records run again.
+- --dry-run only records routing decisions and never calls tools or the LLM.
+- --cache-answers stores LLM answers in the persistent answer cache, which
+  pre-warms it.
+- Level 3 tools need sign-off in the app, so level_3 runs them (with the
+  params it would show for approval) only when given --approve.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from engine import DEFAULT_MODEL, LEVEL_SCRIPTS, Engine
+from metrics import outcome_of
+from model_router import DEFAULT_LATENCY_TARGET
+
+
+def read_queries(path: str, field: str, id_field: str):
+    """Yield (line number, id, query, problem) for each non-blank input line."""
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_no, str(line_no), None, f"invalid JSON: {e}"
+                continue
+            if isinstance(item, str):
+                yield line_no, str(line_no), item, None
+            elif isinstance(item, dict) and isinstance(item.get(field), str):
+                yield line_no, str(item.get(id_field, line_no)), item[field], None
+            else:
+                yield line_no, str(line_no), None, f"no {field!r} string in this record"
+
+
+def completed_ids(path: str) -> set:
+    """Ids that already have an "ok" record in path; a line torn by an interruption is cut off."""
+    done = set()
+    with open(path, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            f.truncate(end)
+        for line in data[:end].splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("status") == "ok":
+                done.add(str(record.get("id")))
+    return done
+
+
+def run_record(engine: Engine, level: str, query: str, dry_run: bool) -> dict:
+    """Route query, then (unless dry_run) answer it; returns the record's result fields."""
+    start = time.perf_counter()
+    route = engine.route(level, query)
+    routed = time.perf_counter()
+    result = {"status": "ok", "tool": route["tool"] if route else ("llm" if level != "level_3" else None),
+              "route": route, "answer": None, "route_ms": round((routed - start) * 1000, 3)}
+    if not dry_run:
+        if level == "level_3":
+            # --approve: run what the approval form would show, unedited
+            pending = engine.analyze(query)
+            answer = pending["function"](**pending["display_params"]) if pending else None
+        else:
+            answer = engine.process(level, query)
+        result["answer"] = answer
+        result["status"] = outcome_of(answer)
+    end = time.perf_counter()
+    result["run_ms"] = round((end - routed) * 1000, 3)
+    result["total_ms"] = round((end - start) * 1000, 3)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a JSONL file of queries through the agent.")
+    parser.add_argument("input", help="JSONL file of queries")
+    parser.add_argument("output", help="JSONL file for the results")
+    parser.add_argument("--level", choices=sorted(LEVEL_SCRIPTS), default="level_2")
+    parser.add_argument("--field", default="query", help="key holding the query in object lines")
+    parser.add_argument("--id-field", default="id", help="key holding the record id")
+    parser.add_argument("--concurrency", type=int, default=8, help="queries running at once")
+    parser.add_argument("--dry-run", action="store_true", help="only record routing decisions")
+    parser.add_argument("--resume", action="store_true", help="append, skipping ids already done")
+    parser.add_argument("--force", action="store_true", help="overwrite an existing output")
+    parser.add_argument("--approve", action="store_true", help="let level_3 run tools without sign-off")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help='a Groq model, or "auto" to pick one per query')
+    parser.add_argument("--latency-target", type=float, default=DEFAULT_LATENCY_TARGET,
+                        help="seconds per answer that --model auto aims for")
+    parser.add_argument("--cache-answers", action="store_true", help="store LLM answers in the answer cache")
+    args = parser.parse_args()
+
+    if args.level == "level_3" and not (args.dry_run or args.approve):
+        parser.error("level_3 runs tools only after approval: pass --approve, or --dry-run to record routes")
+    exists = os.path.exists(args.output) and os.path.getsize(args.output) > 0
+    if exists and not (args.resume or args.force):
+        parser.error(f"{args.output} exists: pass --resume to continue it or --force to overwrite it")
+    done = completed_ids(args.output) if exists and args.resume else set()
+
+    engine = Engine(os.environ.get("GROQ_API_KEY", ""), os.environ.get("OPENWEATHER_API_KEY", ""), args.model,
+                    cache_answers=args.cache_answers, latency_target=args.latency_target).load([args.level])
+
+    stats = Counter()
+    timings, tools = [], Counter()
+    start = time.perf_counter()
+
+    def write(out, record: dict):
+        out.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        out.flush()
+        stats[record["status"]] += 1
+        if "total_ms" in record:
+            timings.append(record["total_ms"])
+            tools[record["tool"] or "none"] += 1
+        written = sum(stats.values()) - stats["skipped"]
+        if written % 1000 == 0:
+            print(f"{written} records, {written / (time.perf_counter() - start):.0f}/s", file=sys.stderr)
+
+    def collect(out, futures):
+        for future in futures:
+            record = futures_meta.pop(future)
+            try:
+                record.update(future.result())
+            except Exception as e:
+                record.update(status="error", error=f"{type(e).__name__}: {e}")
+            write(out, record)
+
+    futures_meta = {}
+    interrupted = False
+    with open(args.output, "a" if args.resume else "w", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="batch") as pool:
+        try:
+            for line_no, record_id, query, problem in read_queries(args.input, args.field, args.id_field):
+                if record_id in done:
+                    stats["skipped"] += 1
+                    continue
+                record = {"id": record_id, "line": line_no, "query": query, "level": args.level}
+                if problem:
+                    write(out, {**record, "status": "error", "error": problem})
+                    continue
+                future = pool.submit(run_record, engine, args.level, query, args.dry_run)
+                futures_meta[future] = record
+                # Read ahead only a little, so huge inputs stream instead of queueing in memory
+                if len(futures_meta) >= args.concurrency * 2:
+                    finished, _ = wait(list(futures_meta), return_when=FIRST_COMPLETED)
+                    collect(out, finished)
+        except KeyboardInterrupt:
+            interrupted = True
+            for future in list(futures_meta):
+                if future.cancel():
+                    del futures_meta[future]
+        collect(out, wait(list(futures_meta)).done)
+
+    elapsed = time.perf_counter() - start
+    written = sum(stats.values()) - stats["skipped"]
+    print(f"{'Interrupted' if interrupted else 'Done'}: {written} records ({stats['ok']} ok, {stats['error']} errors, "
+          f"{stats['timeout']} timeouts), {stats['skipped']} skipped, in {elapsed:.1f}s"
+          f" ({written / elapsed if elapsed else 0:.0f}/s)")
+    if len(timings) > 1:
+        q = statistics.quantiles(timings, n=100, method='inclusive')
+        print(f"Per record: p50 {q[49]:.2f}ms, p95 {q[94]:.2f}ms, max {max(timings):.2f}ms")
+        print("Tools: " + ", ".join(f"{tool} {n}" for tool, n in tools.most_common()))
+    if interrupted:
+        print(f"Rerun with --resume to continue {args.output}")
+        sys.exit(130)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Benchmark the native prime sieve against the old interpreter template.
+
+Run from the repository root:
+
+    python benchmarks/bench_number_theory.py
+
+The old Level 3 prime template (trial division up to sqrt(n) for every
+candidate) is executed the way the interpreter ran it, then the segmented
+sieve answers the same limits. The script checks both produce the same
+primes and prints the timings, followed by sieve-only timings for limits the
+template could not reach in reasonable time.
+"""
+import builtins
+import io
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from number_theory import count_primes, iter_primes
+from sandbox import SAFE_BUILTIN_NAMES
+
+
+# The Level 3 prime template before the number-theory fast path
+PRIME_TEMPLATE = """
+def is_prime(n):
+    if n < 2:
+        return False
+    for i in range(2, int(n**0.5) + 1):
+        if n % i == 0:
+            return False
+    return True
+
+primes = [num for num in range(2, limit+1) if is_prime(num)]
+
+print(f"Prime numbers up to {limit}:")
+print(primes)
+print(f"\\nTotal count: {len(primes)}")
+print(f"Largest prime: {max(primes) if primes else 'None'}")
+"""
+
+
+def run_template(limit: int):
+    """Run the template with the interpreter's builtins; return (primes, seconds)."""
+    safe_builtins = {name: getattr(builtins, name) for name in SAFE_BUILTIN_NAMES}
+    scope = {"__builtins__": safe_builtins, "limit": limit}
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        exec(PRIME_TEMPLATE, scope)
+    return scope["primes"], time.perf_counter() - start
+
+
+def run_sieve(limit: int):
+    start = time.perf_counter()
+    primes = list(iter_primes(2, limit))
+    return primes, time.perf_counter() - start
+
+
+def main():
+    ok = True
+    print("Template vs sieve (listing primes up to the limit):")
+    for limit in (10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6):
+        expected, template_s = run_template(limit)
+        primes, sieve_s = run_sieve(limit)
+        same = primes == expected
+        ok = ok and same
+        print(f"  {limit:>11,}   template {template_s * 1000:10.1f} ms   sieve {sieve_s * 1000:8.1f} ms   "
+              f"x{template_s / sieve_s:7.1f}   {'same primes' if same else 'MISMATCH'}")
+
+    print("\nSieve only:")
+    for limit in (10 ** 7, 10 ** 8):
+        start = time.perf_counter()
+        total = count_primes(2, limit)
+        print(f"  {limit:>11,}   count {total:>10,}   {(time.perf_counter() - start) * 1000:8.1f} ms")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
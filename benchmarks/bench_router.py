@@ -0,0 +1,202 @@
+"""Benchmark the compiled keyword router against per-keyword substring scans.
+
+Run from the repository root:
+
+    python benchmarks/bench_router.py
+
+For every level the script first checks the automaton against a frozen copy
+of the keyword checks the scripts made before router.py existed: each group
+must be hit exactly when its old `any(kw in query_lower ...)` chain matched,
+so a mistake in transcribing the tables into router.py fails the run.
+Keywords added on purpose since then are listed in ADDED_SINCE_BASELINE.
+It then times the automaton against a per-keyword scan and shows how both
+scale as the keyword tables grow.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crypto_prices import SUPPORTED_COINS
+from router import KeywordAutomaton, LEVEL_1_ROUTER, LEVEL_2_ROUTER, LEVEL_3_ROUTER
+
+
+# The keyword chains of level_1.py, Level_2.py and Level_3.py before the
+# compiled router, copied from the scripts and not from router.py
+_BASELINE_LEVEL_1 = {
+    'crypto': ['bitcoin', 'ethereum', 'crypto', 'btc', 'eth', 'price of'],
+    'country': ['country', 'capital of', 'population of'],
+    'weather': ['weather'],
+    'time': ['time', 'date'],
+    'wiki': ['who is', 'what is', 'tell me about', 'wikipedia', 'information about'],
+}
+_BASELINE_LEVEL_2 = dict(_BASELINE_LEVEL_1, **{
+    'python': ['python code', 'write python', 'execute python', 'factorial', 'fibonacci', 'python script',
+               'for loop', 'while loop'],
+    'factorial': ['factorial'],
+    'fibonacci': ['fibonacci'],
+    'even': ['even'],
+    'numbers': ['numbers'],
+})
+_BASELINE_LEVEL_3 = {
+    'python': [
+        'python', 'code', 'script', 'program', 'execute', 'run', 'compile', 'coding', 'programming', 'write code',
+        'run code', 'factorial', 'fibonacci', 'prime', 'palindrome', 'armstrong', 'perfect number', 'lcm', 'gcd',
+        'hcf', 'square', 'cube', 'power', 'root', 'sqrt', 'exponent', 'sum', 'average', 'mean', 'median', 'mode',
+        'total', 'multiply', 'divide', 'add', 'subtract', 'even', 'odd', 'positive', 'negative', 'natural',
+        'whole', 'factor', 'multiple', 'divisor', 'remainder', 'modulo', 'sequence', 'series', 'pattern',
+        'generate', 'create', 'count', 'how many', 'number of', 'total of', 'find', 'search', 'locate', 'detect',
+        'identify', 'string', 'text', 'character', 'char', 'letter', 'word', 'sentence', 'reverse', 'uppercase',
+        'lowercase', 'capitalize', 'replace', 'remove', 'extract', 'parse', 'dot', 'dots', 'period', 'comma',
+        'semicolon', 'colon', 'space', 'digit', 'number', 'symbol', 'special character', 'list', 'array',
+        'dictionary', 'dict', 'tuple', 'set', 'collection', 'data structure', 'loop', 'for loop', 'while loop',
+        'if', 'else', 'elif', 'condition', 'iterate', 'iteration', 'function', 'def', 'process', 'transform',
+        'convert', 'change', 'modify', 'format', 'filter', 'sort', 'order', 'arrange', 'analyze', 'calculate',
+        'compute', 'determine', 'check', 'verify', 'test', 'validate',
+    ],
+    'count': ['count', 'how many', 'number of', 'total'],
+    'count_word': ['count'],
+    'count:dots': ['dot', 'period', '.'],
+    'count:commas': ['comma', ','],
+    'count:spaces': ['space', 'spaces'],
+    'count:letters': ['letter', 'letters', 'alphabet'],
+    'count:digits': ['digit', 'digits', 'number'],
+    'count:words': ['word', 'words'],
+    'count:vowels': ['vowel', 'vowels'],
+    'count:consonants': ['consonant', 'consonants'],
+    'count:upper': ['uppercase', 'capital'],
+    'count:lower': ['lowercase', 'small'],
+    'count:chars': ['character', 'char'],
+    'factorial': ['factorial'],
+    'fibonacci': ['fibonacci'],
+    'prime': ['prime'],
+    'palindrome': ['palindrome'],
+    'even': ['even'],
+    'odd': ['odd'],
+    'number': ['number', 'numbers'],
+    'stats': ['sum', 'average', 'mean', 'total'],
+    'power': ['square', 'cube', 'power', 'exponent'],
+    'square': ['square'],
+    'cube': ['cube'],
+    'reverse': ['reverse'],
+    'weather': ['weather'],
+    'crypto': ['bitcoin', 'ethereum', 'crypto', 'btc', 'eth', 'price', 'cryptocurrency'],
+    'country': ['country', 'capital of', 'population of'],
+    'time': ['time', 'date', 'today', 'now'],
+}
+
+# Keywords later changes added to baseline groups on purpose: every coin name and ticker
+# reaches the crypto branch, which then decides whether the query is about a price
+_COIN_ALIASES = [alias for aliases in SUPPORTED_COINS.values() for alias in aliases]
+ADDED_SINCE_BASELINE = {'crypto': _COIN_ALIASES}
+
+BASELINE = {
+    'Level 1': _BASELINE_LEVEL_1,
+    'Level 2': _BASELINE_LEVEL_2,
+    'Level 3': _BASELINE_LEVEL_3,
+}
+
+
+SAMPLE_QUERIES = [
+    "count the dots ...........",
+    "how many vowels in hello world",
+    "factorial of 10",
+    "fibonacci sequence 15",
+    "prime numbers up to 50",
+    "even numbers to 30",
+    "reverse hello world",
+    "is racecar a palindrome",
+    "square of 25",
+    "sum of 4 8 15 16 23 42",
+    "125 * 48",
+    "weather in Tokyo",
+    "bitcoin price",
+    "what is the price of eth",
+    "capital of France",
+    "population of India",
+    "what time is it?",
+    "who is Albert Einstein?",
+    "tell me about the roman empire",
+    "write python code with a for loop",
+    "Hello there, how are you today?",
+]
+
+
+def build_corpus(size: int, seed: int = 7) -> list:
+    """Mix the sample queries with random recombinations of their words."""
+    rng = random.Random(seed)
+    words = ' '.join(SAMPLE_QUERIES).split()
+    corpus = list(SAMPLE_QUERIES)
+    while len(corpus) < size:
+        corpus.append(' '.join(rng.choice(words) for _ in range(rng.randint(1, 10))))
+    return [q.lower() for q in corpus]
+
+
+def naive_scan(groups: dict, query_lower: str) -> frozenset:
+    """The routing the scripts used to do: one substring scan per keyword."""
+    return frozenset(name for name, keywords in groups.items() if any(kw in query_lower for kw in keywords))
+
+
+def time_it(fn, corpus: list) -> float:
+    """Return the mean time per query in microseconds."""
+    start = time.perf_counter()
+    for query in corpus:
+        fn(query)
+    return (time.perf_counter() - start) / len(corpus) * 1e6
+
+
+def baseline_hits(baseline: dict, query_lower: str) -> frozenset:
+    """The groups the pre-router keyword chains (plus ADDED_SINCE_BASELINE) match."""
+    return frozenset(name for name, keywords in baseline.items()
+                     if any(kw in query_lower for kw in keywords + ADDED_SINCE_BASELINE.get(name, [])))
+
+
+def check_and_time(name: str, router: KeywordAutomaton, corpus: list):
+    baseline = BASELINE[name]
+    missing = set(baseline) - set(router.groups)
+    if missing:
+        print(f"{name:<10} groups missing from router.py: {', '.join(sorted(missing))}")
+        return False
+    # Every keyword of either table on its own too, so a dropped or extra keyword shows up
+    keywords = {kw for table in (baseline, router.groups) for kws in table.values() for kw in kws}
+    probes = corpus + [f"x {kw} y" for kw in sorted(keywords)]
+    mismatches = [q for q in probes if router.scan(q) & set(baseline) != baseline_hits(baseline, q)]
+    naive_us = time_it(lambda q: naive_scan(router.groups, q), corpus)
+    compiled_us = time_it(router.scan, corpus)
+    status = "same decisions as baseline" if not mismatches else f"{len(mismatches)} MISMATCHES, e.g. {mismatches[0]!r}"
+    print(f"{name:<10} naive {naive_us:8.2f} us/query   compiled {compiled_us:8.2f} us/query   {status}")
+    return not mismatches
+
+
+def scaling(corpus: list):
+    """Grow the Level 3 tables with synthetic keywords and time both approaches."""
+    rng = random.Random(11)
+    alphabet = 'abcdefghijklmnopqrstuvwxyz'
+    print("\nScaling with table size (Level 3 tables + synthetic keywords):")
+    for extra in (0, 500, 2000, 8000):
+        groups = dict(LEVEL_3_ROUTER.groups)
+        groups['synthetic'] = tuple(
+            ''.join(rng.choice(alphabet) for _ in range(rng.randint(6, 12))) for _ in range(extra)
+        )
+        router = KeywordAutomaton(groups)
+        keywords = sum(len(kws) for kws in groups.values())
+        naive_us = time_it(lambda q: naive_scan(groups, q), corpus)
+        compiled_us = time_it(router.scan, corpus)
+        print(f"  {keywords:>6} keywords   naive {naive_us:9.2f} us/query   compiled {compiled_us:8.2f} us/query")
+
+
+def main():
+    corpus = build_corpus(3000)
+    ok = all([
+        check_and_time("Level 1", LEVEL_1_ROUTER, corpus),
+        check_and_time("Level 2", LEVEL_2_ROUTER, corpus),
+        check_and_time("Level 3", LEVEL_3_ROUTER, corpus),
+    ])
+    scaling(corpus[:500])
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
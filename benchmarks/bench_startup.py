@@ -0,0 +1,67 @@
+"""Report the cold-start import time each entry point saves with lazy tool loading.
+
+Run from the repository root:
+
+    python benchmarks/bench_startup.py [runs]
+
+Each script is executed in a fresh interpreter the way Streamlit first loads
+it (module level only; main() does not run), once as it is now and once after
+eagerly importing the modules it used to import at startup. The difference is
+the time a cold start saves; those modules are now imported when a tool or
+the LLM client first needs them. Times are medians over several runs.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules each entry point imported at startup before tools were loaded lazily
+EAGER_IMPORTS = {
+    "level_1.py": ["langchain_groq", "langchain_community.tools", "langchain_community.utilities",
+                   "http_client", "country_index", "wiki_cache"],
+    "Level_2.py": ["groq", "wikipedia", "http_client", "country_index", "sandbox", "wiki_cache"],
+    "Level_3.py": ["groq", "wikipedia", "http_client", "country_index", "sandbox"],
+}
+
+CHILD = """
+import importlib, json, runpy, sys, time, warnings
+warnings.simplefilter("ignore")
+start = time.perf_counter()
+for name in {eager!r}:
+    importlib.import_module(name)
+runpy.run_path({script!r}, run_name="startup")
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {deferred!r} if m in sys.modules]}}))
+"""
+
+
+def measure(script: str, eager: list, deferred: list, runs: int):
+    """Median startup seconds of script in fresh interpreters, and the deferred modules it loaded."""
+    times = []
+    for _ in range(runs):
+        code = CHILD.format(eager=eager, script=os.path.join(ROOT, script), deferred=deferred)
+        out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        times.append(result["seconds"])
+    return statistics.median(times), result["loaded"]
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"Cold start, median of {runs} fresh interpreters\n")
+    print(f"{'entry point':<12} {'eager':>9} {'lazy':>9} {'saved':>9}  deferred until first use")
+    for script, eager in EAGER_IMPORTS.items():
+        eager_s, _ = measure(script, eager, eager, runs)
+        lazy_s, loaded = measure(script, [], eager, runs)
+        deferred = [name for name in eager if name not in loaded]
+        print(f"{script:<12} {eager_s * 1000:>7.0f}ms {lazy_s * 1000:>7.0f}ms {(eager_s - lazy_s) * 1000:>7.0f}ms  "
+              f"{', '.join(deferred) or '-'}")
+        if loaded:
+            print(f"{'':<12} still imported at startup: {', '.join(loaded)}")
+
+
+if __name__ == "__main__":
+    main()
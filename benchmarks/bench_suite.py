@@ -0,0 +1,380 @@
+"""Micro-benchmark suite for routing, the calculator and the interpreter templates.
+
+Run from the repository root:
+
+    python benchmarks/bench_suite.py [--size 3000] [--latency-ms 50] [--json results.json]
+    python benchmarks/bench_suite.py --baseline results.json --tolerance 0.25
+
+The three scripts are loaded the way Streamlit runs them (main() does not
+run) and measured on the labelled corpus from corpus.py:
+
+- routing: route_query latency percentiles with and without the route cache,
+  and accuracy against each query's label, per level and per category;
+- end to end: process_query (levels 1 and 2, with an instant fake LLM) and
+  analyze_query plus the approved tool (level 3) on a sample of the corpus,
+  with every external API served by the local stub server;
+- calculator: compile and cached evaluation time;
+- templates: interpreter run time of every template, first run and repeated.
+
+--json writes every number in one machine-readable document. With
+--baseline, median and first-run latencies that grow by more than the
+tolerance (and by at least 50us, or 1ms for end-to-end and interpreter
+timings) or accuracy that drops by more than half a point are reported as
+regressions and the script exits with status 1. Tail percentiles are
+reported but not gated: one cold import or worker restart moves them.
+Compare runs made with the same settings.
+
+Every run also checks corpus.ROUTING_CASES, fixed queries that must route
+exactly as labelled, and corpus.EXPRESSION_CASES, texts whose calculator
+expression is fixed, and exits with status 1 if any fails (--cases-only
+runs just those checks).
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import runpy
+import statistics
+import sys
+import tempfile
+import time
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Keep the benchmark's caches out of the real database
+os.environ.setdefault("AGENT_CACHE_DB", os.path.join(tempfile.mkdtemp(prefix="agent-bench-"), "cache.db"))
+
+from corpus import EXPRESSION_CASES, LLM, MULTI, NONE, ROUTING_CASES, build_corpus  # noqa: E402
+from stub_server import StubServer, install  # noqa: E402
+
+
+LEVELS = {"level_1": "level_1.py", "level_2": "Level_2.py", "level_3": "Level_3.py"}
+
+# Representative queries whose routes carry each interpreter template
+TEMPLATE_QUERIES = {
+    "level_2": {"factorial": "python factorial of 20", "fibonacci": "python fibonacci 30",
+                "even": "write python code for even numbers"},
+    "level_3": {"palindrome": "is racecar a palindrome", "even": "even numbers up to 30",
+                "odd": "odd numbers to 30", "stats": "sum of 4 8 15 16 23 42", "square": "square of 12",
+                "cube": "cube of 12", "reverse": "reverse hello world", "generic": "write code with a loop"},
+}
+
+# Smallest latency growth reported as a regression; millisecond metrics cross the stub server or sandbox
+REGRESSION_FLOOR_US = 50.0
+MS_REGRESSION_FLOOR_US = 1000.0
+
+
+def percentiles(samples: list, scale: float = 1.0) -> dict:
+    """p50/p90/p99/max/mean of samples (seconds) in the given unit."""
+    if not samples:
+        return {}
+    values = sorted(s * scale for s in samples)
+    q = statistics.quantiles(values, n=100, method='inclusive') if len(values) > 1 else values * 99
+    return {"p50": q[49], "p90": q[89], "p99": q[98], "max": values[-1], "mean": statistics.fmean(values), "n": len(values)}
+
+
+class FakeChatModel:
+    """Instant stand-in for ChatGroq so level 1 fallbacks measure only local work."""
+    model_name = "bench"
+    temperature = 0.7
+
+    def invoke(self, messages):
+        return types.SimpleNamespace(content="ok")
+
+    def stream(self, messages):
+        yield types.SimpleNamespace(content="ok")
+
+
+class FakeGroq:
+    """Instant stand-in for groq.Groq (level 2)."""
+
+    def __init__(self):
+        self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        message = types.SimpleNamespace(content="ok")
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+
+def load_levels() -> dict:
+    """Run each script once without main() and return its globals."""
+    scripts = {}
+    for level, filename in LEVELS.items():
+        scripts[level] = runpy.run_path(os.path.join(ROOT, filename), run_name="bench")
+        # Tool functions read sidebar values from their own module globals
+        scripts[level]["route_query"].__globals__["weather_api_key"] = "bench"
+    return scripts
+
+
+def predict(script: dict, level: str, query: str) -> str:
+    """The tool a level picks for query, in corpus label terms."""
+    from multi_intent import route_intents
+    route_query = script["route_query"]
+    if route_intents(query, route_query):
+        return MULTI
+    route = route_query(query)
+    if route is None:
+        return NONE if level == "level_3" else LLM
+    return route["tool"]
+
+
+def check_cases(scripts: dict) -> list:
+    """Misrouted ROUTING_CASES as "level: query -> got (expected ...)" lines."""
+    failures = []
+    for query, labels in ROUTING_CASES:
+        for level, script in scripts.items():
+            got = predict(script, level, query)
+            if got != labels[level]:
+                failures.append(f"{level}: {query!r} -> {got} (expected {labels[level]})")
+    return failures
+
+
+def check_expressions() -> list:
+    """EXPRESSION_CASES whose extracted expression differs, as "calculator: text -> got (expected ...)" lines."""
+    from calc_engine import extract_expression
+    return [f"calculator: {text!r} -> {extract_expression(text)!r} (expected {expected!r})"
+            for text, expected in EXPRESSION_CASES if extract_expression(text) != expected]
+
+
+def bench_routing(scripts: dict, corpus: list) -> dict:
+    from route_cache import ROUTE_CACHE
+    results = {}
+    for level, script in scripts.items():
+        route_query = script["route_query"]
+        cold, correct, confusions, per_category = [], 0, {}, {}
+        for entry in corpus:
+            start = time.perf_counter()
+            got = predict(script, level, entry["query"])
+            cold.append(time.perf_counter() - start)
+            expected = entry["labels"][level]
+            stats = per_category.setdefault(entry["category"], [0, 0])
+            stats[1] += 1
+            if got == expected:
+                correct += 1
+                stats[0] += 1
+            else:
+                key = f"{expected} -> {got}"
+                confusions[key] = confusions.get(key, 0) + 1
+
+        ROUTE_CACHE.invalidate()
+        namespace = f"bench:{level}"
+        for entry in corpus:
+            ROUTE_CACHE.route(namespace, entry["query"], route_query)
+        cached = []
+        for entry in corpus:
+            start = time.perf_counter()
+            ROUTE_CACHE.route(namespace, entry["query"], route_query)
+            cached.append(time.perf_counter() - start)
+
+        results[level] = {
+            "route_us": percentiles(cold, 1e6),
+            "cached_route_us": percentiles(cached, 1e6),
+            "accuracy": correct / len(corpus),
+            "accuracy_by_category": {c: ok / n for c, (ok, n) in sorted(per_category.items())},
+            "top_confusions": dict(sorted(confusions.items(), key=lambda kv: -kv[1])[:8]),
+        }
+    return results
+
+
+def bench_end_to_end(scripts: dict, corpus: list, sample: int) -> dict:
+    rng = random.Random(5)
+    entries = rng.sample(corpus, min(sample, len(corpus)))
+    llm, groq = FakeChatModel(), FakeGroq()
+    results = {}
+    for level, script in scripts.items():
+        by_category = {}
+        for entry in entries:
+            start = time.perf_counter()
+            if level == "level_1":
+                script["process_query"](entry["query"], llm)
+            elif level == "level_2":
+                script["process_query"](entry["query"], groq, "bench")
+            else:
+                route = script["analyze_query"](entry["query"])
+                if route is not None:
+                    route["function"](**route["params"])
+            by_category.setdefault(entry["category"], []).append(time.perf_counter() - start)
+        results[level] = {category: percentiles(samples, 1e3) for category, samples in sorted(by_category.items())}
+    return results
+
+
+def bench_calculator(corpus: list) -> dict:
+    from calc_engine import Calculator, extract_expression
+    expressions = [e for e in (extract_expression(entry["query"]) for entry in corpus) if e]
+    expressions += [f"({a} + {b}) * {a} ** 3 / {b}" for a, b in zip(range(2, 400, 3), range(7, 800, 5))]
+    calculator = Calculator()
+    first, repeat = [], []
+    for expression in expressions:
+        start = time.perf_counter()
+        calculator.evaluate(expression)
+        first.append(time.perf_counter() - start)
+    for expression in expressions:
+        start = time.perf_counter()
+        calculator.evaluate(expression)
+        repeat.append(time.perf_counter() - start)
+    return {"first_us": percentiles(first, 1e6), "cached_us": percentiles(repeat, 1e6),
+            "expressions": len(expressions)}
+
+
+def bench_templates(scripts: dict, repeats: int) -> dict:
+    from sandbox import INTERPRETER_POOL
+    results = {}
+    for level, queries in TEMPLATE_QUERIES.items():
+        script = scripts[level]
+        coerce = script.get("TEMPLATE_INPUT_TYPES", {})
+        for name, query in queries.items():
+            route = script["route_query"](query)
+            if route is None or route["tool"] not in ("python_interpreter", "Python Interpreter"):
+                results[f"{level}:{name}"] = {"error": f"{query!r} routed to {route and route['tool']}"}
+                continue
+            params = dict(route["params"])
+            code = params.pop("code")
+            inputs = params.pop("inputs", None) or {k: coerce.get(k, str)(v) for k, v in params.items()}
+            start = time.perf_counter()
+            INTERPRETER_POOL.run(code, inputs)
+            first = time.perf_counter() - start
+            runs = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                INTERPRETER_POOL.run(code, inputs)
+                runs.append(time.perf_counter() - start)
+            results[f"{level}:{name}"] = {"first_ms": first * 1e3, **{k: v for k, v in percentiles(runs, 1e3).items()}}
+    return results
+
+
+def flatten(tree, prefix=""):
+    if isinstance(tree, dict):
+        for key, value in tree.items():
+            yield from flatten(value, f"{prefix}.{key}" if prefix else key)
+    elif isinstance(tree, (int, float)):
+        yield prefix, tree
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    """Describe every metric that regressed against the baseline."""
+    old = dict(flatten(baseline))
+    regressions = []
+    for key, new in flatten(current):
+        if key not in old or key.startswith("meta") or "top_confusions" in key or key.endswith(".n"):
+            continue
+        before = old[key]
+        if "accuracy" in key:
+            if new < before - 0.005:
+                regressions.append(f"{key}: {before:.3f} -> {new:.3f}")
+        elif key.rsplit(".", 1)[-1] in ("p50", "first_ms"):
+            unit_us = 1e3 if "_ms" in key else 1.0
+            floor = MS_REGRESSION_FLOOR_US if "_ms" in key else REGRESSION_FLOOR_US
+            if new > before * (1 + tolerance) and (new - before) * unit_us > floor:
+                regressions.append(f"{key}: {before:.1f} -> {new:.1f} (+{(new / before - 1) * 100:.0f}%)")
+    return regressions
+
+
+def report(results: dict):
+    print(f"Routing ({results['meta']['corpus_size']} labelled queries)")
+    for level, r in results["routing"].items():
+        cold, cached = r["route_us"], r["cached_route_us"]
+        print(f"  {level}: accuracy {r['accuracy'] * 100:5.1f}%   route p50 {cold['p50']:7.1f}us p99 {cold['p99']:7.1f}us"
+              f"   cached p50 {cached['p50']:5.1f}us p99 {cached['p99']:6.1f}us")
+        weak = {c: a for c, a in r["accuracy_by_category"].items() if a < 0.95}
+        if weak:
+            print("    below 95%: " + ", ".join(f"{c} {a * 100:.0f}%" for c, a in weak.items()))
+        if r["top_confusions"]:
+            print("    top confusions: " + "; ".join(f"{k} x{n}" for k, n in list(r["top_confusions"].items())[:4]))
+
+    print(f"\nEnd to end (stub APIs at {results['meta']['stub_latency_ms']:.0f}ms), p50 / p99 ms")
+    for level, categories in results["end_to_end_ms"].items():
+        cells = [f"{c} {p['p50']:.2f}/{p['p99']:.2f}" for c, p in categories.items()]
+        print(f"  {level}: " + ", ".join(cells))
+
+    calc = results["calculator"]
+    print(f"\nCalculator ({calc['expressions']} expressions): first p50 {calc['first_us']['p50']:.1f}us, "
+          f"cached p50 {calc['cached_us']['p50']:.1f}us")
+
+    print("\nInterpreter templates, ms")
+    for name, t in results["templates"].items():
+        if "error" in t:
+            print(f"  {name:<20} {t['error']}")
+        else:
+            print(f"  {name:<20} first {t['first_ms']:7.2f}   p50 {t['p50']:6.2f}   p99 {t['p99']:6.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark routing, the calculator and interpreter templates.")
+    parser.add_argument("--size", type=int, default=3000, help="labelled corpus size")
+    parser.add_argument("--seed", type=int, default=20)
+    parser.add_argument("--e2e-sample", type=int, default=400, help="queries run end to end per level")
+    parser.add_argument("--template-runs", type=int, default=30)
+    parser.add_argument("--latency-ms", type=float, default=50, help="stub API latency")
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="compare with a previous --json output")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative latency growth")
+    parser.add_argument("--cases-only", action="store_true", help="only check the fixed routing cases")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    if args.cases_only:
+        failures = check_cases(load_levels())
+        print(f"Routing cases: {len(ROUTING_CASES) * len(LEVELS) - len(failures)}/{len(ROUTING_CASES) * len(LEVELS)}")
+        misparsed = check_expressions()
+        print(f"Calculator cases: {len(EXPRESSION_CASES) - len(misparsed)}/{len(EXPRESSION_CASES)}")
+        failures += misparsed
+        for line in failures:
+            print(f"  {line}")
+        sys.exit(1 if failures else 0)
+    stub = StubServer(latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000).start()
+    install(stub)
+    corpus = build_corpus(args.size, args.seed)
+    scripts = load_levels()
+
+    results = {
+        "meta": {
+            "python": platform.python_version(), "platform": platform.platform(), "time": time.time(),
+            "corpus_size": len(corpus), "seed": args.seed, "stub_latency_ms": args.latency_ms,
+            "e2e_sample": args.e2e_sample, "template_runs": args.template_runs,
+        },
+        "routing": bench_routing(scripts, corpus),
+        "end_to_end_ms": bench_end_to_end(scripts, corpus, args.e2e_sample),
+        "calculator": bench_calculator(corpus),
+        "templates": bench_templates(scripts, args.template_runs),
+    }
+    results["meta"]["stub_requests"] = stub.requests_served
+    report(results)
+    failures = check_cases(scripts)
+    print(f"\nRouting cases: {len(failures)} misrouted of {len(ROUTING_CASES) * len(LEVELS)}")
+    misparsed = check_expressions()
+    print(f"Calculator cases: {len(misparsed)} misparsed of {len(EXPRESSION_CASES)}")
+    failures += misparsed
+    for line in failures:
+        print(f"  {line}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        settings = ("corpus_size", "seed", "stub_latency_ms", "e2e_sample", "template_runs")
+        changed = [k for k in settings if baseline["meta"].get(k) != results["meta"][k]]
+        if changed:
+            print(f"\nWarning: baseline was run with different settings ({', '.join(changed)})")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regressions against {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.baseline}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""Labelled query corpus for the routing benchmarks.
+
+Queries are generated from templates for every tool branch (plus small talk
+for the LLM fallback and compound multi-tool questions) with randomized
+cities, coins, countries, numbers and phrasing, so the corpus is realistic
+but reproducible from its seed. Each query carries the tool every level is
+expected to pick:
+
+- level_1/level_2: a tool name, "llm" for the fallback or "multi" for a
+  compound query.
+- level_3: a tool title, "multi", or "none" when it should answer that no
+  tool matches.
+
+    python benchmarks/corpus.py --size 3000 > corpus.jsonl
+"""
+import argparse
+import json
+import random
+
+
+CITIES = ["Tokyo", "Paris", "London", "New York", "Mumbai", "Cairo", "Sydney", "São Paulo", "Berlin",
+          "Toronto", "Lagos", "Seoul", "Mexico City", "Nairobi", "Oslo", "Lima"]
+COINS = ["bitcoin", "btc", "ethereum", "eth", "solana", "cardano", "dogecoin", "ripple", "xrp", "litecoin"]
+COUNTRIES = ["France", "Japan", "Brazil", "India", "Kenya", "Canada", "Peru", "Norway", "Egypt", "Australia",
+             "Germany", "Mexico", "Vietnam", "Chile", "Spain"]
+PEOPLE = ["Albert Einstein", "Marie Curie", "Ada Lovelace", "Nelson Mandela", "Frida Kahlo", "Alan Turing"]
+TOPICS = ["the roman empire", "photosynthesis", "black holes", "the printing press", "jazz", "volcanoes"]
+WORDS = ["racecar", "level", "banana", "rotor", "python", "madam", "stats"]
+TEXTS = ["hello world", "The quick brown fox jumps over the lazy dog.", "a,b,c. d, e!", "Mississippi river",
+         "Wait... what?! Really, really.", "OpenAI and Groq, side by side."]
+SMALL_TALK = [
+    "hello there", "how are you doing?", "write me a poem about the sea", "explain quantum entanglement simply",
+    "give me three tips for sleeping better", "what should I cook for dinner", "translate good morning to spanish",
+    "summarize the plot of hamlet", "why is the sky blue", "recommend a good sci-fi book",
+]
+PREFIXES = ["", "", "", "please ", "hey, ", "quick question: ", "can you tell me "]
+
+LLM, NONE, MULTI = "llm", "none", "multi"
+
+
+def _numbers(rng, count, low=2, high=99):
+    return [str(rng.randint(low, high)) for _ in range(count)]
+
+
+def _label(l1, l2, l3):
+    return {"level_1": l1, "level_2": l2, "level_3": l3}
+
+
+def calculator(rng):
+    a, b, c = _numbers(rng, 3)
+    op, op2 = rng.choice("+-*/"), rng.choice("+-*")
+    query = rng.choice([
+        f"what is {a} {op} {b}", f"{a} {op} {b}", f"what is ({a} + {b}) * {c}?", f"{a}{op}{b}{op2}{c}",
+        f"what is {a} ^ {rng.randint(2, 9)}", f"{a} * {b} - {c}",
+    ])
+    return query, _label("calculator", "calculator", "Calculator")
+
+
+def weather(rng):
+    city = rng.choice(CITIES)
+    query = rng.choice([f"weather in {city}", f"what's the weather in {city}?", f"how is the weather in {city}"])
+    return query, _label("get_weather", "get_weather", "Weather API")
+
+
+def crypto(rng):
+    coin = rng.choice(COINS)
+    query = rng.choice([f"{coin} price", f"price of {coin}", f"how much is {coin} worth", f"current {coin} price?"])
+    return query, _label("get_crypto_price", "get_crypto_price", "Crypto Price")
+
+
+def country(rng):
+    name = rng.choice(COUNTRIES)
+    query = rng.choice([f"capital of {name}", f"population of {name}", f"what is the capital of {name}?"])
+    return query, _label("get_country_info", "get_country_info", "Country Info")
+
+
+def current_time(rng):
+    query = rng.choice(["what time is it?", "what's the date", "current time please", "tell me the time"])
+    return query, _label("get_current_time", "get_current_time", "Current Time")
+
+
+def wiki(rng):
+    query = rng.choice([f"who is {rng.choice(PEOPLE)}", f"tell me about {rng.choice(TOPICS)}",
+                        f"wikipedia {rng.choice(TOPICS)}", f"information about {rng.choice(PEOPLE)}"])
+    return query, _label("search_wikipedia", "search_wikipedia", NONE)
+
+
+def factorial(rng):
+    n = rng.randint(3, 60)
+    query = rng.choice([f"factorial of {n}", f"python factorial of {n}", f"compute the factorial of {n}"])
+    return query, _label(LLM, "python_interpreter", "Big Numbers")
+
+
+def fibonacci(rng):
+    n = rng.randint(5, 80)
+    query = rng.choice([f"fibonacci sequence {n}", f"first {n} fibonacci numbers", f"fibonacci {n}"])
+    return query, _label(LLM, "python_interpreter", "Big Numbers")
+
+
+def number_theory(rng):
+    a, b, c = _numbers(rng, 3, 4, 400)
+    query = rng.choice([f"prime numbers up to {a}", f"is {b} a prime", f"gcd of {a}, {b} and {c}",
+                        f"lcm of {a} {b}", "perfect numbers up to 10000", "armstrong numbers", f"count primes below {a}00"])
+    return query, _label(LLM, LLM, "Number Theory")
+
+
+def text_statistics(rng):
+    text = rng.choice(TEXTS)
+    query = rng.choice([f"count the dots in {text}", f"how many vowels in {text}", f"count words: {text}",
+                        f"count all characters in this message: {text}", f"how many letters in {text}"])
+    return query, _label(LLM, LLM, "Text Statistics")
+
+
+def interpreter_templates(rng):
+    n = rng.randint(5, 60)
+    nums = ' '.join(_numbers(rng, rng.randint(3, 8)))
+    query = rng.choice([f"even numbers up to {n}", f"odd numbers to {n}", f"is {rng.choice(WORDS)} a palindrome",
+                        f"sum of {nums}", f"average of {nums}", f"square of {n}", f"cube of {n}",
+                        f"reverse {rng.choice(TEXTS)}"])
+    return query, _label(LLM, LLM, "Python Interpreter")
+
+
+def python_code(rng):
+    # Level 2 only has templates (factorial, Fibonacci, even numbers); other code requests go to the LLM
+    query, level_2 = rng.choice([("write python code with a for loop", LLM),
+                                 ("write python to print even numbers", "python_interpreter"),
+                                 ("python script for a while loop", LLM)])
+    return query, _label(LLM, level_2, "Python Interpreter")
+
+
+def power(rng):
+    query = f"{rng.randint(2, 9)} to the power of {rng.randint(50, 400)}"
+    return query, _label(LLM, LLM, "Big Numbers")
+
+
+def small_talk(rng):
+    return rng.choice(SMALL_TALK), _label(LLM, LLM, NONE)
+
+
+def multi(rng):
+    parts = [f"weather in {rng.choice(CITIES)}", f"{rng.choice(COINS)} price", f"capital of {rng.choice(COUNTRIES)}"]
+    rng.shuffle(parts)
+    query = rng.choice([" and ", ", ", " and also "]).join(parts[:rng.randint(2, 3)])
+    return query, _label(MULTI, MULTI, MULTI)
+
+
+# Generator -> share of the corpus
+CATEGORIES = {
+    calculator: 12, weather: 10, crypto: 10, country: 9, current_time: 5, wiki: 8, factorial: 5,
+    fibonacci: 4, number_theory: 8, text_statistics: 7, interpreter_templates: 9, python_code: 2,
+    power: 2, small_talk: 7, multi: 4,
+}
+
+
+# Fixed queries every level must route exactly as labelled (bench_suite fails otherwise):
+# past misroutes that the sampled corpus is unlikely to hit
+ROUTING_CASES = [
+    # Short tickers need a price or crypto word next to them
+    ("who is Ada Lovelace", _label("search_wikipedia", "search_wikipedia", NONE)),
+    ("tell me about Sol LeWitt", _label("search_wikipedia", "search_wikipedia", NONE)),
+    ("who is Sol Campbell", _label("search_wikipedia", "search_wikipedia", NONE)),
+    ("tell me about the eth zurich", _label("search_wikipedia", "search_wikipedia", NONE)),
+    ("what is ether", _label("search_wikipedia", "search_wikipedia", NONE)),
+    ("price of the doge statue", _label(LLM, LLM, NONE)),
+    ("doge price", _label("get_crypto_price", "get_crypto_price", "Crypto Price")),
+    ("how much is ada worth", _label("get_crypto_price", "get_crypto_price", "Crypto Price")),
+    ("eth to usd", _label("get_crypto_price", "get_crypto_price", "Crypto Price")),
+    ("sol coin price", _label("get_crypto_price", "get_crypto_price", "Crypto Price")),
+    ("btc", _label("get_crypto_price", "get_crypto_price", "Crypto Price")),
+    # Lists inside one question are not separate intents
+    ("count letters and digits in abc123", _label(LLM, LLM, "Text Statistics")),
+    ("count the dots ........... and commas ,,,", _label(LLM, LLM, "Text Statistics")),
+    ("count the commas, dots and spaces in a, b, c", _label(LLM, LLM, "Text Statistics")),
+    ("gcd of 12 and 18", _label(LLM, LLM, "Number Theory")),
+    ("reverse 'salt and pepper'", _label(LLM, LLM, "Python Interpreter")),
+    # Compound questions still split
+    ("weather in Tokyo and bitcoin price", _label(MULTI, MULTI, MULTI)),
+    ("hey, weather in Oslo and capital of Peru", _label(MULTI, MULTI, MULTI)),
+    ("weather in Oslo and weather in Lima", _label(MULTI, MULTI, MULTI)),
+    ("square of 12 and cube of 3", _label(LLM, LLM, MULTI)),
+    # "x" multiplies between operands only
+    ("3 x 4", _label("calculator", "calculator", "Calculator")),
+    ("what is 12x7?", _label("calculator", "calculator", "Calculator")),
+    ("max 3", _label(LLM, LLM, NONE)),
+]
+
+# Fixed texts and the expression calc_engine.extract_expression must take from them (None: no expression)
+EXPRESSION_CASES = [
+    ("3 x 4", "3 x 4"),
+    ("what is 3x4?", "3x4"),
+    ("(2+3) x 4", "(2+3) x 4"),
+    ("2 x 3 x 4", "2 x 3 x 4"),
+    ("max 3 + 4", "3 + 4"),
+    ("tax 5 * 2", "5 * 2"),
+    ("max 3", None),
+    ("box 12 and 5", None),
+    ("3 x", None),
+]
+
+
+def build_corpus(size: int = 3000, seed: int = 20) -> list:
+    """Return [{"query", "category", "labels"}, ...] with size entries."""
+    rng = random.Random(seed)
+    generators = list(CATEGORIES)
+    weights = list(CATEGORIES.values())
+    corpus = []
+    for _ in range(size):
+        generator = rng.choices(generators, weights)[0]
+        query, labels = generator(rng)
+        query = rng.choice(PREFIXES) + query
+        if rng.random() < 0.15:
+            query = query.capitalize()
+        corpus.append({"query": query, "category": generator.__name__, "labels": labels})
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the labelled benchmark corpus as JSON lines.")
+    parser.add_argument("--size", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=20)
+    args = parser.parse_args()
+    for entry in build_corpus(args.size, args.seed):
+        print(json.dumps(entry, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Local stand-in for the external APIs, with configurable latency.
+
+Serves the OpenWeatherMap, CoinGecko, restcountries.com and Wikipedia
+endpoints the tools call, answering every request with plausible data after
+`latency` (+ up to `jitter`) seconds. `install(server)` points the shared HTTP
+client and the `wikipedia` package at the stub, so the tools run unchanged
+and benchmarks never touch the network.
+
+    python benchmarks/stub_server.py --port 8765 --latency-ms 80
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit, urlunsplit
+
+from requests.adapters import HTTPAdapter
+
+
+# Upstream prefixes the tools call -> rewritten to the stub
+UPSTREAMS = (
+    "http://api.openweathermap.org",
+    "https://api.coingecko.com",
+    "https://restcountries.com",
+    "https://en.wikipedia.org",
+)
+
+
+def _seeded(text: str) -> random.Random:
+    """Same input, same answer: responses are stable across runs."""
+    return random.Random(zlib.crc32(text.lower().encode()))
+
+
+def weather(params: dict):
+    city = params.get("q", [""])[0]
+    rng = _seeded(city)
+    temp = round(rng.uniform(-10, 35), 1)
+    return 200, {
+        "name": city,
+        "main": {"temp": temp, "feels_like": round(temp - rng.uniform(0, 4), 1), "humidity": rng.randint(20, 95)},
+        "weather": [{"description": rng.choice(["clear sky", "few clouds", "light rain", "overcast clouds", "mist"])}],
+    }
+
+
+def crypto_prices(params: dict):
+    ids = params.get("ids", [""])[0].split(",")
+    return 200, {
+        coin: {"usd": round(_seeded(coin).uniform(0.05, 70000), 2), "usd_24h_change": round(_seeded(coin).uniform(-8, 8), 2)}
+        for coin in ids if coin
+    }
+
+
+def country(name: str):
+    rng = _seeded(name)
+    return 200, [{
+        "name": {"common": name.title()},
+        "capital": [f"{name.title()} City"],
+        "population": rng.randint(10_000, 200_000_000),
+        "region": rng.choice(["Africa", "Americas", "Asia", "Europe", "Oceania"]),
+        "area": float(rng.randint(100, 5_000_000)),
+    }]
+
+
+def wikipedia(params: dict):
+    title = (params.get("srsearch") or params.get("titles") or ["Topic"])[0].title()
+    if params.get("list") == ["search"]:
+        return 200, {"query": {"search": [{"title": title}]}}
+    page = {"pageid": 1, "title": title, "fullurl": f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}"}
+    if "extracts" in params.get("prop", [""])[0]:
+        page["extract"] = f"{title} is a subject with a long history. It is widely studied. Many sources describe it."
+    return 200, {"query": {"pages": {"1": page}}}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = parse_qs(url.query, keep_blank_values=True)
+        server = self.server
+        time.sleep(server.latency + random.uniform(0, server.jitter))
+        if url.path.startswith("/data/2.5/weather"):
+            status, body = weather(params)
+        elif url.path.startswith("/api/v3/simple/price"):
+            status, body = crypto_prices(params)
+        elif url.path.startswith("/v3.1/name/"):
+            status, body = country(unquote(url.path.rsplit("/", 1)[-1]))
+        elif url.path.startswith("/w/api.php"):
+            status, body = wikipedia(params)
+        else:
+            status, body = 404, {"message": "unknown endpoint"}
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+        with server.lock:
+            server.requests_served += 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, latency: float = 0.05, jitter: float = 0.0):
+        super().__init__(("127.0.0.1", port), StubHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.lock = threading.Lock()
+        self.requests_served = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="stub-api", daemon=True).start()
+        return self
+
+
+class RewriteAdapter(HTTPAdapter):
+    """Transport adapter that sends requests for an upstream prefix to the stub instead."""
+
+    def __init__(self, target: str, **kwargs):
+        super().__init__(**kwargs)
+        self.target = urlsplit(target)
+
+    def send(self, request, **kwargs):
+        url = urlsplit(request.url)
+        request.url = urlunsplit((self.target.scheme, self.target.netloc, url.path, url.query, url.fragment))
+        return super().send(request, **kwargs)
+
+
+def install(server: StubServer):
+    """Route the shared HTTP client and the wikipedia package to the stub server."""
+    from http_client import HTTP
+    import wikipedia.wikipedia
+
+    for prefix in UPSTREAMS:
+        HTTP.session.mount(prefix, RewriteAdapter(server.url, pool_connections=16, pool_maxsize=16))
+    wikipedia.wikipedia.API_URL = f"{server.url}/w/api.php"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    args = parser.parse_args()
+    server = StubServer(args.port, args.latency_ms / 1000, args.jitter_ms / 1000)
+    print(f"Stub APIs on {server.url} ({args.latency_ms:.0f}ms + up to {args.jitter_ms:.0f}ms)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
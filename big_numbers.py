@@ -0,0 +1,163 @@
+"""Big-integer engine for factorial, Fibonacci and power queries.
+
+The interpreter templates multiplied 1..n one step at a time, kept whole
+Fibonacci lists in memory and printed every digit, so large n meant slow runs
+and megabytes of output. Here factorials come from math.factorial (CPython's
+binary-splitting product), the nth Fibonacci number from fast doubling, and
+sequences are generated lazily so only the requested window is rendered.
+Huge results are reported as a digit count with leading and trailing digits
+instead of the full decimal expansion.
+"""
+import math
+from itertools import islice
+
+
+# Results up to this many digits are printed in full
+FULL_DIGITS = 1000
+
+# Leading/trailing digits shown for larger results
+EDGE_DIGITS = 20
+
+# Sequence terms rendered before a listing is abbreviated
+MAX_TERMS = 100
+
+# Per-request input limits (each answers in about a second)
+MAX_FACTORIAL_N = 200_000
+MAX_FIBONACCI_N = 1_000_000
+MAX_RESULT_BITS = 20_000_000
+
+_LOG10_2 = math.log10(2)
+
+
+def fibonacci_pair(n: int):
+    """Return (F(n), F(n+1)) by fast doubling."""
+    a, b = 0, 1
+    for bit in bin(n)[2:]:
+        # F(2k) = F(k) * (2F(k+1) - F(k)), F(2k+1) = F(k)^2 + F(k+1)^2
+        c = a * (2 * b - a)
+        d = a * a + b * b
+        a, b = (d, c + d) if bit == '1' else (c, d)
+    return a, b
+
+
+def fibonacci_window(start: int, stop: int):
+    """Lazily yield F(start), ..., F(stop - 1)."""
+    a, b = fibonacci_pair(start)
+    for _ in range(start, stop):
+        yield a
+        a, b = b, a + b
+
+
+def powers(base: int, first: int = 1):
+    """Lazily yield base**first, base**(first + 1), ..."""
+    value = base ** first
+    while True:
+        yield value
+        value *= base
+
+
+def factorial_trailing_zeros(n: int) -> int:
+    """Legendre's formula for the power of 5 in n!."""
+    zeros, p = 0, 5
+    while p <= n:
+        zeros += n // p
+        p *= 5
+    return zeros
+
+
+def digit_summary(x: int, edge: int = EDGE_DIGITS):
+    """Return (digit_count, leading, trailing) without converting all of x to decimal."""
+    x = abs(x)
+    # bit_length gives the digit count exactly or one too high
+    digits = int(x.bit_length() * _LOG10_2) + 1
+    if digits <= FULL_DIGITS:
+        text = str(x)
+        return len(text), text[:edge], text[-edge:]
+    leading = x // 10 ** (digits - edge)
+    if leading < 10 ** (edge - 1):
+        digits -= 1
+        leading = x // 10 ** (digits - edge)
+    return digits, str(leading), f"{x % 10 ** edge:0{edge}d}"
+
+
+def format_int(x: int) -> str:
+    """The full number when it is short, otherwise its leading...trailing digits."""
+    digits, leading, trailing = digit_summary(x)
+    if digits <= FULL_DIGITS:
+        return str(x)
+    return f"{leading}...{trailing} ({digits:,} digits)"
+
+
+def _factorial(n: int) -> str:
+    if n > MAX_FACTORIAL_N:
+        return f"Error: n too large (maximum is {MAX_FACTORIAL_N:,})"
+    result = math.factorial(n)
+    lines = [f"Factorial of {n}:"]
+    digits, leading, trailing = digit_summary(result)
+    if digits <= FULL_DIGITS:
+        lines.append(f"{n}! = {result}")
+        if n <= 20:
+            terms = ''.join(f" × {i}" for i in range(2, n + 1))
+            lines.append(f"\nCalculation: 1{terms} = {result}")
+        else:
+            lines.append(f"\nDigits: {digits:,}")
+    else:
+        lines.append(f"{n}! has {digits:,} digits")
+        lines.append(f"\nLeading digits: {leading}...")
+        lines.append(f"Trailing digits: ...{trailing}")
+        lines.append(f"Trailing zeros: {factorial_trailing_zeros(n):,}")
+    return '\n'.join(lines)
+
+
+def _fibonacci(numbers: list) -> str:
+    if len(numbers) >= 2:
+        # A window F(a)..F(b)
+        start, stop = min(numbers[0], numbers[1]), max(numbers[0], numbers[1]) + 1
+        title = f"Fibonacci numbers F({start}) to F({stop - 1}):"
+    else:
+        start, stop = 0, numbers[0]
+        title = f"First {stop} Fibonacci numbers:"
+    if stop < 1:
+        return "Error: n must be at least 1"
+    if stop > MAX_FIBONACCI_N:
+        return f"Error: n too large (maximum is {MAX_FIBONACCI_N:,})"
+
+    count = stop - start
+    if count <= MAX_TERMS:
+        terms = [format_int(f) for f in fibonacci_window(start, stop)]
+    else:
+        head = [format_int(f) for f in islice(fibonacci_window(start, stop), 10)]
+        tail = [format_int(f) for f in fibonacci_window(stop - 3, stop)]
+        terms = head + [f"... {count - 13:,} more ..."] + tail
+    listing = f"[{', '.join(terms)}]"
+
+    # F(start) + ... + F(stop - 1) = F(stop + 1) - F(start + 1)
+    total = fibonacci_pair(stop + 1)[0] - fibonacci_pair(start + 1)[0]
+    last = fibonacci_pair(stop - 1)[0]
+    return f"{title}\n{listing}\n\nSum: {format_int(total)}\nLast number: {format_int(last)}"
+
+
+def _power(numbers: list) -> str:
+    base = numbers[0]
+    if len(numbers) >= 2:
+        exponent = numbers[1]
+        if exponent * max(base.bit_length(), 1) > MAX_RESULT_BITS:
+            return "Error: result too large"
+        return f"{base}^{exponent} = {format_int(base ** exponent)}"
+    lines = [f"Powers of {base}:"]
+    for exp, value in enumerate(islice(powers(base), 10), 1):
+        lines.append(f"{base}^{exp} = {format_int(value)}")
+    return '\n'.join(lines)
+
+
+def answer(operation: str, numbers: list) -> str:
+    """Format the answer for 'factorial', 'fibonacci' or 'power' over the numbers from the query."""
+    if not numbers:
+        return "Error: no numbers given"
+    if operation == "factorial":
+        return _factorial(numbers[0])
+    if operation == "fibonacci":
+        return _fibonacci(numbers)
+    if operation == "power":
+        return _power(numbers)
+    return f"Error: unknown operation '{operation}'"
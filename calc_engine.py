@@ -0,0 +1,350 @@
+"""Shared calculator engine with full-expression extraction and cost bounds.
+
+Each script used to define its own calculator that rebuilt an operator table
+and a recursive AST walker on every call, allowed `**` on any operands (so
+"9**9**9" froze a server thread) and only ever saw the `\\d+ op \\d+` piece the
+router regex cut out of the query. Here the query is tokenized once, the
+longest arithmetic run is taken as the expression, and expressions are
+compiled into a tree of closures that is cached per expression. Before every
+multiplication and power the size of the result is estimated from the
+operands; anything over the bit budget is carried on as a base-10 logarithm
+and reported as an approximation instead of being computed exactly.
+"""
+import math
+import re
+import threading
+from collections import OrderedDict
+
+from big_numbers import format_int
+
+
+# Largest exact integer result, in bits (about 300k decimal digits)
+DEFAULT_MAX_BITS = 1_000_000
+
+# Approximate values this small are turned back into floats
+_FLOAT_LOG10_LIMIT = 300
+
+_TOKEN_RE = re.compile(r'(?P<num>(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?)|(?P<op>\*\*|//|[-+*/%^×÷()])'
+                       r'|(?P<times>[xX](?=\s*[\d.(]))|(?P<space>\s+)|(?P<other>.)')
+
+_ALIASES = {'^': '**', '×': '*', '÷': '/'}
+
+# Binary operator precedence; ** is right-associative and binds tighter than unary minus
+_BINARY = {'+': 1, '-': 1, '*': 2, '/': 2, '//': 2, '%': 2, '**': 4}
+_UNARY_PREC = 3
+
+
+class CalculationError(ValueError):
+    pass
+
+
+class Approx:
+    """A value too large to compute exactly, kept as sign * 10**log10."""
+
+    __slots__ = ("sign", "log10")
+
+    def __init__(self, sign: int, log10: float):
+        if math.isinf(log10) or math.isnan(log10):
+            raise CalculationError("result is too large to estimate")
+        self.sign = sign
+        self.log10 = log10
+
+    def __str__(self):
+        exponent = math.floor(self.log10)
+        mantissa = 10 ** (self.log10 - exponent)
+        return f"≈ {'-' if self.sign < 0 else ''}{mantissa:.6g}e+{exponent}"
+
+
+def tokenize(text: str) -> list:
+    """Split text into (kind, value, start, end) tokens in one pass."""
+    tokens = []
+    for match in _TOKEN_RE.finditer(text):
+        kind = match.lastgroup
+        if kind == 'times':
+            # "3 x 4" multiplies; the x in a word ("max 3") stays a letter
+            kind = 'op' if tokens and (tokens[-1][0] == 'num' or tokens[-1][1] == ')') else 'other'
+        if kind != 'space':
+            value = '*' if kind == 'op' and match.group() in 'xX' else _ALIASES.get(match.group(), match.group())
+            tokens.append((kind, value, match.start(), match.end()))
+    return tokens
+
+
+def extract_expression(text: str):
+    """Return the longest arithmetic expression in text ("what is (3 + 4) * 2^10?"), or None."""
+    best = None
+    run = []
+    for token in tokenize(text) + [('other', '', len(text), len(text))]:
+        if token[0] != 'other':
+            run.append(token)
+            continue
+        run = _trim(run)
+        has_operator = any(
+            kind == 'op' and value in _BINARY and i and (run[i - 1][0] == 'num' or run[i - 1][1] == ')')
+            for i, (kind, value, _, _) in enumerate(run)
+        )
+        if has_operator and (best is None or len(run) > len(best)):
+            best = run
+        run = []
+    if best is None:
+        return None
+    return text[best[0][2]:best[-1][3]]
+
+
+def _trim(run: list) -> list:
+    """Drop dangling operators and unmatched parentheses at the edges of a token run."""
+    while True:
+        depth = sum((value == '(') - (value == ')') for _, value, _, _ in run)
+        if run and run[0][0] == 'op' and (run[0][1] not in ('-', '(') or (run[0][1] == '(' and depth > 0)):
+            run = run[1:]
+        elif run and run[-1][0] == 'op' and (run[-1][1] != ')' or depth < 0):
+            run = run[:-1]
+        else:
+            return run
+
+
+# ============ VALUE OPERATIONS ============
+def _log10(value) -> float:
+    if isinstance(value, Approx):
+        return value.log10
+    if value == 0:
+        return -math.inf
+    return math.log10(abs(value))
+
+
+def _sign(value) -> int:
+    if isinstance(value, Approx):
+        return value.sign
+    return -1 if value < 0 else 1
+
+
+def _normalize(value):
+    if isinstance(value, Approx) and value.log10 < _FLOAT_LOG10_LIMIT:
+        return value.sign * 10 ** value.log10
+    return value
+
+
+def _add(a, b, max_bits):
+    if not isinstance(a, Approx) and not isinstance(b, Approx):
+        return a + b
+    la, lb = _log10(a), _log10(b)
+    if la < lb:
+        a, b, la, lb = b, a, lb, la
+    if lb == -math.inf:
+        return a
+    ratio = 10 ** (lb - la)
+    if _sign(a) == _sign(b):
+        return Approx(_sign(a), la + math.log10(1 + ratio))
+    if ratio >= 1:
+        raise CalculationError("values too large to subtract exactly")
+    return _normalize(Approx(_sign(a), la + math.log10(1 - ratio)))
+
+
+def _neg(a):
+    if isinstance(a, Approx):
+        return Approx(-a.sign, a.log10)
+    return -a
+
+
+def _mul(a, b, max_bits):
+    if isinstance(a, int) and isinstance(b, int):
+        # The product has at most the sum of the operand bit lengths
+        if a.bit_length() + b.bit_length() <= max_bits:
+            return a * b
+    elif not isinstance(a, Approx) and not isinstance(b, Approx):
+        try:
+            result = a * b
+            if not isinstance(result, float) or not math.isinf(result):
+                return result
+        except OverflowError:
+            pass
+    if a == 0 or b == 0:
+        return 0
+    return Approx(_sign(a) * _sign(b), _log10(a) + _log10(b))
+
+
+def _truediv(a, b, max_bits):
+    if not isinstance(b, Approx) and b == 0:
+        raise ZeroDivisionError("division by zero")
+    if not isinstance(a, Approx) and not isinstance(b, Approx):
+        try:
+            return a / b
+        except OverflowError:
+            pass
+    if not isinstance(a, Approx) and a == 0:
+        return 0.0
+    return _normalize(Approx(_sign(a) * _sign(b), _log10(a) - _log10(b)))
+
+
+def _exact_only(name, function):
+    def apply(a, b, max_bits):
+        if isinstance(a, Approx) or isinstance(b, Approx):
+            raise CalculationError(f"'{name}' needs exact operands, but a value is too large")
+        return function(a, b)
+    return apply
+
+
+def _pow(a, b, max_bits):
+    if isinstance(b, Approx):
+        if not isinstance(a, Approx) and abs(a) in (0, 1):
+            return a if a != -1 else 1
+        raise CalculationError("exponent is too large to estimate the result")
+    if isinstance(a, Approx):
+        if a.sign < 0 and b != int(b):
+            raise CalculationError("fractional power of a negative number")
+        sign = -1 if a.sign < 0 and int(b) % 2 else 1
+        return _normalize(Approx(sign, a.log10 * b))
+    if isinstance(a, int) and isinstance(b, int) and b >= 0:
+        # Estimate the result size before computing it
+        if abs(a) <= 1 or b * a.bit_length() <= max_bits:
+            return a ** b
+    else:
+        try:
+            result = a ** b
+            if not isinstance(result, float) or not math.isinf(result):
+                return result
+        except OverflowError:
+            pass
+        except ZeroDivisionError:
+            raise ZeroDivisionError("zero cannot be raised to a negative power")
+    if a < 0 and b != int(b):
+        raise CalculationError("fractional power of a negative number")
+    sign = -1 if a < 0 and int(b) % 2 else 1
+    return _normalize(Approx(sign, _log10(a) * b))
+
+
+_OPERATIONS = {
+    '+': _add,
+    '-': lambda a, b, max_bits: _add(a, _neg(b), max_bits),
+    '*': _mul,
+    '/': _truediv,
+    '//': _exact_only('//', lambda a, b: a // b),
+    '%': _exact_only('%', lambda a, b: a % b),
+    '**': _pow,
+}
+
+
+# ============ PARSER ============
+class _Parser:
+    """Pratt parser that turns tokens into a tree of closures."""
+
+    def __init__(self, tokens: list, max_bits: int):
+        self.tokens = tokens
+        self.pos = 0
+        self.max_bits = max_bits
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self):
+        token = self.peek()
+        if token is None:
+            raise CalculationError("unexpected end of expression")
+        self.pos += 1
+        return token
+
+    def parse(self):
+        node = self.expression(0)
+        if self.peek() is not None:
+            raise CalculationError(f"unexpected '{self.peek()[1]}'")
+        return node
+
+    def expression(self, min_prec: int):
+        left = self.prefix()
+        while True:
+            token = self.peek()
+            if token is None or token[0] != 'op' or token[1] not in _BINARY:
+                return left
+            prec = _BINARY[token[1]]
+            if prec < min_prec:
+                return left
+            self.pos += 1
+            right = self.expression(prec if token[1] == '**' else prec + 1)
+            left = self.binary(_OPERATIONS[token[1]], left, right)
+
+    def prefix(self):
+        kind, value, _, _ = self.take()
+        if kind == 'num':
+            number = int(value) if value.isdigit() else float(value)
+            return lambda: number
+        if value == '(':
+            node = self.expression(0)
+            if self.take()[1] != ')':
+                raise CalculationError("missing ')'")
+            return node
+        if value in ('-', '+'):
+            operand = self.expression(_UNARY_PREC)
+            return (lambda: _neg(operand())) if value == '-' else operand
+        raise CalculationError(f"unexpected '{value}'")
+
+    def binary(self, operation, left, right):
+        max_bits = self.max_bits
+        return lambda: operation(left(), right(), max_bits)
+
+
+class CompiledExpression:
+    """A parsed expression; the result is computed on first use and kept."""
+
+    def __init__(self, expression: str, max_bits: int = DEFAULT_MAX_BITS):
+        self.expression = expression
+        tokens = tokenize(expression)
+        for kind, value, _, _ in tokens:
+            if kind == 'other':
+                raise CalculationError(f"unsupported character '{value}'")
+        if not tokens:
+            raise CalculationError("empty expression")
+        self._evaluate = _Parser(tokens, max_bits).parse()
+        self._result = None
+        self._lock = threading.Lock()
+
+    def result(self):
+        with self._lock:
+            if self._result is None:
+                self._result = self._evaluate()
+            return self._result
+
+
+def format_result(value) -> str:
+    if isinstance(value, Approx):
+        return f"{value} (estimated; too large to compute exactly)"
+    if isinstance(value, int):
+        return format_int(value)
+    return str(value)
+
+
+class Calculator:
+    """Evaluates arithmetic expressions through an LRU of compiled expressions."""
+
+    def __init__(self, max_bits: int = DEFAULT_MAX_BITS, maxsize: int = 1024):
+        self.max_bits = max_bits
+        self.maxsize = maxsize
+        self._compiled = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def compile(self, expression: str) -> CompiledExpression:
+        key = ' '.join(expression.split())
+        with self._lock:
+            compiled = self._compiled.get(key)
+            if compiled is not None:
+                self._compiled.move_to_end(key)
+                self.hits += 1
+                return compiled
+            self.misses += 1
+        compiled = CompiledExpression(key, self.max_bits)
+        with self._lock:
+            self._compiled[key] = compiled
+            if len(self._compiled) > self.maxsize:
+                self._compiled.popitem(last=False)
+        return compiled
+
+    def evaluate(self, expression: str) -> str:
+        """Return "Result: ..." for expression; raises on invalid input or division by zero."""
+        return f"Result: {format_result(self.compile(expression).result())}"
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._compiled), "hits": self.hits, "misses": self.misses}
+
+
+CALCULATOR = Calculator()
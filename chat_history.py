@@ -0,0 +1,73 @@
+"""Windowed rendering of the chat history.
+
+`main()` used to call `st.markdown` for every message on every rerun, so each
+interaction got slower as the conversation grew. `render_history` draws only
+the last `window` messages. Older messages are grouped into pages that are
+drawn only when picked from a selector, and long tool outputs show a preview
+unless expanded. The prepared markdown is stored on each message the first
+time it is drawn, so a rerun does about the same work however long the
+conversation is.
+"""
+import streamlit as st
+
+
+WINDOW = 20
+PAGE_SIZE = 20
+
+# Outputs longer than this show a preview with a toggle for the full text
+PREVIEW_CHARS = 4000
+
+
+def prepare(content: str) -> tuple:
+    """Return (markdown preview, truncated) for a message's content."""
+    content = str(content)
+    if len(content) <= PREVIEW_CHARS:
+        return content, False
+    preview = content[:PREVIEW_CHARS]
+    cut = preview.rfind('\n')
+    if cut > PREVIEW_CHARS // 2:
+        preview = preview[:cut]
+    # Close a code block the cut left open
+    if preview.count('```') % 2:
+        preview += '\n```'
+    hidden = len(content) - len(preview)
+    return f"{preview}\n\n*… {hidden:,} more characters*", True
+
+
+def _display(message: dict) -> tuple:
+    cached = message.get("_display")
+    if cached is None or cached[0] is not message["content"]:
+        cached = (message["content"], *prepare(message["content"]))
+        message["_display"] = cached
+    return cached[1], cached[2]
+
+
+def render_message(message: dict, key: str):
+    """Draw one chat message, a preview first if its content is long."""
+    with st.chat_message(message["role"]):
+        markdown, truncated = _display(message)
+        if not truncated:
+            st.markdown(markdown)
+            return
+        body = st.empty()
+        if st.toggle("Show full output", key=key):
+            body.markdown(message["content"])
+        else:
+            body.markdown(markdown)
+
+
+def render_history(messages: list, window: int = WINDOW, page_size: int = PAGE_SIZE, key: str = "history"):
+    """Draw the last `window` messages; earlier ones page in on demand."""
+    older = max(len(messages) - window, 0)
+    if older:
+        pages = [(start, min(start + page_size, older)) for start in range(0, older, page_size)]
+        labels = ["Hidden"] + [f"Messages {start + 1}–{end}" for start, end in pages]
+        choice = st.selectbox(f"🗂️ {older} earlier messages", range(len(labels)),
+                              format_func=labels.__getitem__, key=f"{key}_page")
+        if choice:
+            start, end = pages[choice - 1]
+            with st.container(border=True):
+                for i in range(start, end):
+                    render_message(messages[i], f"{key}_full_{i}")
+    for i in range(older, len(messages)):
+        render_message(messages[i], f"{key}_full_{i}")
@@ -0,0 +1,178 @@
+"""Per-upstream circuit breakers with adaptive timeouts and jittered backoff.
+
+Every external call used to wait up to the fixed 5s timeout, so a degraded
+OpenWeatherMap or CoinGecko held each request for the full 5 seconds. Each
+upstream (scheme://host) now has a `CircuitBreaker`:
+
+- closed: calls go through. `failure_threshold` consecutive failures open it.
+- open: calls fail at once with `CircuitOpenError` until a cooldown passes.
+  The cooldown doubles (with jitter) after every failed probe, up to a cap.
+- half-open: one probe call is let through. Success closes the breaker;
+  failure opens it again.
+
+The breaker also keeps the latencies of recent successful calls. Its timeout
+is a multiple of their p99, clamped to [min_timeout, the caller's cap]. After
+a timeout the limit is doubled until a call succeeds, so an upstream that is
+slow but alive can still close the breaker.
+"""
+import logging
+import random
+import threading
+import time
+from collections import deque
+
+from metrics import METRICS
+
+
+logger = logging.getLogger("agent.http")
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open."""
+
+    def __init__(self, endpoint: str, retry_in: float):
+        super().__init__(f"{endpoint} is unavailable, not retrying for {retry_in:.0f}s")
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+def backoff(attempt: int, base: float = 0.1, cap: float = 1.0) -> float:
+    """Full-jitter exponential backoff: a random delay in [0, min(cap, base * 2**attempt)]."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """Failure-counting breaker for one upstream, with a latency-derived timeout."""
+
+    def __init__(self, endpoint: str, failure_threshold: int = 5, reset_timeout: float = 10.0,
+                 max_reset_timeout: float = 300.0, window: int = 100, min_samples: int = 20,
+                 timeout_multiplier: float = 3.0, min_timeout: float = 1.0):
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.min_samples = min_samples
+        self.timeout_multiplier = timeout_multiplier
+        self.min_timeout = min_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self._cooldown = reset_timeout
+        self._opened_at = 0.0
+        self._probing = False
+        self._boost = 0.0
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def _transition(self, state: str):
+        self.state = state
+        METRICS.inc("agent_circuit_transitions_total", endpoint=self.endpoint, state=state)
+        logger.warning("circuit %s for %s (cooldown %.0fs)", state, self.endpoint, self._cooldown)
+
+    def allow(self):
+        """Admit one call or raise CircuitOpenError; after the cooldown, admit a single probe."""
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            retry_in = self._opened_at + self._cooldown - time.monotonic()
+            if self.state == OPEN and retry_in <= 0:
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+        METRICS.inc("agent_circuit_rejected_total", endpoint=self.endpoint)
+        raise CircuitOpenError(self.endpoint, max(retry_in, 0))
+
+    def success(self, seconds: float):
+        """Record a successful call that took seconds."""
+        with self._lock:
+            self._latencies.append(seconds)
+            self.failures = 0
+            self._boost = 0.0
+            if self.state != CLOSED:
+                self._probing = False
+                self._cooldown = self.reset_timeout
+                self._transition(CLOSED)
+
+    def failure(self, timed_out: float = None):
+        """Record a failed call; timed_out is the timeout it hit, if it timed out."""
+        with self._lock:
+            self.failures += 1
+            if timed_out is not None:
+                self._boost = max(self._boost, timed_out * 2)
+            if self.state == HALF_OPEN:
+                self._probing = False
+                self._cooldown = min(self._cooldown * 2, self.max_reset_timeout) * random.uniform(0.8, 1.2)
+                self._opened_at = time.monotonic()
+                self._transition(OPEN)
+            elif self.state == CLOSED and self.failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._transition(OPEN)
+
+    def release(self):
+        """Free the half-open probe slot after a call that says nothing about the upstream's health."""
+        with self._lock:
+            self._probing = False
+
+    def p99(self):
+        """p99 of recent successful latencies, or None before min_samples calls."""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+
+    def timeout(self, cap: float) -> float:
+        """Read timeout for the next call: timeout_multiplier x p99, within [min_timeout, cap]."""
+        p99 = self.p99()
+        if p99 is None:
+            return cap
+        return min(cap, max(self.min_timeout, p99 * self.timeout_multiplier, self._boost))
+
+    def call(self, function, *args, failures: tuple = (Exception,), **kwargs):
+        """Run function through the breaker; only exceptions in failures count against the upstream."""
+        self.allow()
+        start = time.perf_counter()
+        try:
+            result = function(*args, **kwargs)
+        except failures:
+            self.failure()
+            raise
+        except BaseException:
+            # Not the upstream's fault (e.g. a page that does not exist); free the probe slot
+            self.success(time.perf_counter() - start)
+            raise
+        self.success(time.perf_counter() - start)
+        return result
+
+    def snapshot(self) -> dict:
+        p99 = self.p99()
+        with self._lock:
+            retry_in = max(self._opened_at + self._cooldown - time.monotonic(), 0) if self.state == OPEN else 0.0
+            return {"state": self.state, "failures": self.failures, "p99": p99, "retry_in": retry_in}
+
+
+class BreakerRegistry:
+    """Process-wide map of upstream -> CircuitBreaker, created on first use."""
+
+    def __init__(self, **settings):
+        self.settings = settings
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, endpoint: str) -> CircuitBreaker:
+        breaker = self._breakers.get(endpoint)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(endpoint, CircuitBreaker(endpoint, **self.settings))
+        return breaker
+
+    def snapshot(self) -> dict:
+        """{upstream: {"state", "failures", "p99", "retry_in"}} for every upstream seen so far."""
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {endpoint: breaker.snapshot() for endpoint, breaker in sorted(breakers.items())}
+
+
+BREAKERS = BreakerRegistry()
@@ -0,0 +1,107 @@
+"""Token-budgeted conversation context for the LLM fallback.
+
+The fallback used to send only the current message, and sending the whole
+`st.session_state.messages` would make prompts (and time-to-first-token) grow
+with the session. `pack_context` walks the history from the newest turn and
+keeps what fits in a token budget. Bulky tool outputs are clipped, and the
+turns that no longer fit are replaced by a one-line summary of what the user
+asked earlier. Token counts are a fast regex approximation of a BPE
+tokenizer, cached on each message, so packing costs the same however long the
+conversation is.
+"""
+import re
+
+
+DEFAULT_BUDGET = 2000
+
+# A single history message (typically a tool output) is clipped to this
+MAX_MESSAGE_TOKENS = 250
+
+# Budget for the summary of turns that did not fit
+SUMMARY_TOKENS = 120
+
+# Role markers and separators the chat format adds per message
+MESSAGE_OVERHEAD = 4
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_CODE_BLOCK_RE = re.compile(r"```.*?(?:```|$)", re.DOTALL)
+_SUMMARY_PREFIX = "Earlier in this conversation the user asked:"
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate BPE token count: one per symbol, about one per four word characters."""
+    return sum((len(m) + 3) // 4 if m[0].isalnum() or m[0] == '_' else 1 for m in _TOKEN_RE.findall(text))
+
+
+def clip(text: str, max_tokens: int) -> str:
+    """Shorten text to about max_tokens, collapsing code blocks first."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    text = _CODE_BLOCK_RE.sub(lambda m: f"[code block of {m.group().count(chr(10)) + 1} lines omitted]", text)
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    kept, used = [], 0
+    for line in text.splitlines():
+        cost = estimate_tokens(line) + 1
+        if used + cost > max_tokens:
+            break
+        kept.append(line)
+        used += cost
+    omitted = len(text.splitlines()) - len(kept)
+    return "\n".join(kept + [f"[… {omitted} more lines of output omitted]"])
+
+
+def _compact(message: dict, max_tokens: int) -> tuple:
+    """(clipped content, tokens) of a history message, cached on the message."""
+    content = str(message["content"])
+    cached = message.get("_context")
+    if cached is None or cached[0] is not content or cached[1] != max_tokens:
+        clipped = clip(content, max_tokens)
+        cached = (content, max_tokens, clipped, estimate_tokens(clipped) + MESSAGE_OVERHEAD)
+        message["_context"] = cached
+    return cached[2], cached[3]
+
+
+def _summary(history: list, dropped: int, budget: int):
+    """One system line naming the most recent questions among the first `dropped` turns."""
+    questions, used = [], estimate_tokens(_SUMMARY_PREFIX) + MESSAGE_OVERHEAD + 1
+    for j in range(dropped - 1, -1, -1):
+        message = history[j]
+        if message["role"] != "user":
+            continue
+        question = clip(' '.join(str(message["content"]).split()), 40)
+        cost = estimate_tokens(question) + 2
+        if used + cost > budget:
+            break
+        questions.append(question)
+        used += cost
+    if not questions:
+        return None
+    asked = '; '.join(f'"{q}"' for q in reversed(questions))
+    return {"role": "system", "content": f"{_SUMMARY_PREFIX} {asked}."}
+
+
+def pack_context(history: list, query: str, budget: int = DEFAULT_BUDGET,
+                 max_message_tokens: int = MAX_MESSAGE_TOKENS, summary_tokens: int = SUMMARY_TOKENS) -> list:
+    """Chat messages for query with as much recent history as fits in budget tokens.
+
+    history is the list of {"role", "content"} messages before query, oldest
+    first. The query itself is always sent, even if it alone exceeds the budget.
+    """
+    remaining = budget - estimate_tokens(query) - MESSAGE_OVERHEAD - summary_tokens
+    kept = []
+    i = len(history)
+    while i > 0 and remaining > 0:
+        content, cost = _compact(history[i - 1], max_message_tokens)
+        if cost > remaining:
+            break
+        kept.append({"role": history[i - 1]["role"], "content": content})
+        remaining -= cost
+        i -= 1
+    summary = _summary(history, i, summary_tokens) if i and budget > 0 else None
+    return ([summary] if summary else []) + kept[::-1] + [{"role": "user", "content": query}]
+
+
+def count_tokens(messages: list) -> int:
+    """Estimated prompt tokens of packed messages."""
+    return sum(estimate_tokens(m["content"]) + MESSAGE_OVERHEAD for m in messages)
@@ -0,0 +1,173 @@
+"""Offline country index used instead of per-call restcountries.com lookups.
+
+Capitals and areas almost never change, so `data/countries.json` ships a
+snapshot that is loaded once per process into a small columnar index. The
+snapshot records the year its figures are from ("as_of"), and every record
+carries it so answers can label populations with their date. Names resolve by
+exact name, alias (official names, ISO codes, altSpellings), prefix and
+finally fuzzy match, with no network call. Set COUNTRY_REFRESH_HOURS to
+refresh the snapshot from the live API in the background.
+"""
+import bisect
+import difflib
+import json
+import os
+import re
+import threading
+from array import array
+from datetime import date
+
+
+SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "countries.json")
+LIVE_URL = "https://restcountries.com/v3.1/all?fields=name,capital,population,region,area,altSpellings,cca2,cca3"
+
+_LIST_SPLIT_RE = re.compile(r'\s*(?:,|;|&)\s*')
+_AND_SPLIT_RE = re.compile(r'\s+and\s+|^and\s+', re.IGNORECASE)
+
+
+def _key(name: str) -> str:
+    return ' '.join(name.casefold().replace('.', ' ').split())
+
+
+class CountryIndex:
+    """Columnar in-memory country table with exact, alias, prefix and fuzzy lookup."""
+
+    def __init__(self, rows: list, as_of: str = None):
+        self._load(rows, as_of)
+
+    def _load(self, rows: list, as_of: str = None):
+        # Build the new columns fully, then swap them in one assignment
+        names, capitals, regions = [], [], []
+        population, area = array('q'), array('d')
+        lookup = {}
+        for i, (name, capital, pop, region, km2, aliases) in enumerate(rows):
+            names.append(name)
+            capitals.append(capital or 'N/A')
+            regions.append(region or 'N/A')
+            population.append(pop if pop is not None else -1)
+            area.append(km2 if km2 is not None else -1.0)
+            lookup.setdefault(_key(name), i)
+        # Aliases never shadow a real country name
+        for i, (_, _, _, _, _, aliases) in enumerate(rows):
+            for alias in aliases:
+                lookup.setdefault(_key(alias), i)
+        sorted_keys = sorted(lookup)
+        self.as_of = as_of
+        self._columns = (names, capitals, regions, population, area, lookup, sorted_keys)
+
+    @classmethod
+    def from_snapshot(cls, path: str = SNAPSHOT_PATH):
+        with open(path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+        return cls(snapshot["rows"], snapshot.get("as_of"))
+
+    def __len__(self):
+        return len(self._columns[0])
+
+    def find(self, query: str):
+        """Return the row index for a country name, alias, prefix or near miss, or None."""
+        _, _, _, _, _, lookup, sorted_keys = self._columns
+        key = _key(query)
+        if not key:
+            return None
+        if key in lookup:
+            return lookup[key]
+        # Unique prefix ("united k" -> United Kingdom)
+        matches = set()
+        pos = bisect.bisect_left(sorted_keys, key)
+        while pos < len(sorted_keys) and sorted_keys[pos].startswith(key) and len(matches) < 2:
+            matches.add(lookup[sorted_keys[pos]])
+            pos += 1
+        if len(matches) == 1:
+            return matches.pop()
+        close = difflib.get_close_matches(key, sorted_keys, n=1, cutoff=0.8)
+        return lookup[close[0]] if close else None
+
+    def record(self, i: int) -> dict:
+        """Return the name/capital/population/region/area fields of row i, plus the snapshot's as_of."""
+        names, capitals, regions, population, area, _, _ = self._columns
+        return {
+            "name": names[i],
+            "capital": capitals[i],
+            "population": population[i] if population[i] >= 0 else None,
+            "region": regions[i],
+            "area": area[i] if area[i] >= 0 else None,
+            "as_of": self.as_of,
+        }
+
+    def lookup(self, query: str):
+        """Return the record for one country, or None if it is unknown."""
+        i = self.find(query)
+        return None if i is None else self.record(i)
+
+    def lookup_many(self, query: str):
+        """Resolve a list like "India, China and Brazil".
+
+        Returns (records, unknown_names, totals) where totals aggregates the
+        population and area columns over the matched rows.
+        """
+        _, _, _, population, area, lookup, _ = self._columns
+        rows, unknown = [], []
+        for chunk in _LIST_SPLIT_RE.split(query):
+            parts = [p for p in _AND_SPLIT_RE.split(chunk) if p.strip()]
+            start = 0
+            while start < len(parts):
+                # Greedily keep names that contain "and" ("Trinidad and Tobago") together
+                for end in range(len(parts), start, -1):
+                    name = ' and '.join(parts[start:end])
+                    if end - start == 1 or _key(name) in lookup:
+                        break
+                row = self.find(name)
+                if row is None:
+                    unknown.append(name.strip())
+                elif row not in rows:
+                    rows.append(row)
+                start = end
+        totals = {
+            "population": sum(population[i] for i in rows if population[i] >= 0),
+            "area": sum(area[i] for i in rows if area[i] >= 0),
+        }
+        return [self.record(i) for i in rows], unknown, totals
+
+    def refresh_from_live(self, save: bool = False):
+        """Replace the index with fresh data from restcountries.com, dated today."""
+        from http_client import HTTP
+        response = HTTP.get(LIVE_URL)
+        response.raise_for_status()
+        rows = []
+        for c in response.json():
+            aliases = list(c.get('altSpellings', []))
+            aliases += [c['name'].get('official', ''), c.get('cca2', ''), c.get('cca3', '')]
+            rows.append([
+                c['name']['common'],
+                (c.get('capital') or ['N/A'])[0],
+                c.get('population'),
+                c.get('region'),
+                c.get('area'),
+                [a for a in aliases if a],
+            ])
+        as_of = date.today().isoformat()
+        self._load(rows, as_of)
+        if save:
+            with open(SNAPSHOT_PATH, "w", encoding="utf-8") as f:
+                json.dump({"as_of": as_of, "fields": ["name", "capital", "population", "region", "area", "aliases"],
+                           "rows": rows}, f, ensure_ascii=False)
+
+    def start_background_refresh(self, interval_hours: float):
+        """Refresh from the live API every interval_hours on a daemon thread."""
+        def run():
+            stop = threading.Event()
+            while True:
+                try:
+                    self.refresh_from_live()
+                except Exception:
+                    pass
+                stop.wait(interval_hours * 3600)
+
+        threading.Thread(target=run, name="country-index-refresher", daemon=True).start()
+
+
+COUNTRY_INDEX = CountryIndex.from_snapshot()
+
+if os.environ.get("COUNTRY_REFRESH_HOURS"):
+    COUNTRY_INDEX.start_background_refresh(float(os.environ["COUNTRY_REFRESH_HOURS"]))
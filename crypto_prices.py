@@ -0,0 +1,154 @@
+"""Process-wide crypto price table shared by every level.
+
+Instead of one CoinGecko request per question, a single background thread
+refreshes the prices of every tracked coin with one batched
+``/simple/price?ids=bitcoin,ethereum,...`` call, and `get_crypto_price`
+answers from memory. Stale entries are still served (with their age) while a
+refresh runs in the background.
+"""
+import re
+import threading
+import time
+
+
+COINGECKO_PRICE_URL = "https://api.coingecko.com/api/v3/simple/price"
+
+# CoinGecko id -> names and ticker symbols users type for it
+SUPPORTED_COINS = {
+    'bitcoin': ['bitcoin', 'btc', 'xbt'],
+    'ethereum': ['ethereum', 'ether', 'eth'],
+    'cardano': ['cardano', 'ada'],
+    'solana': ['solana', 'sol'],
+    'dogecoin': ['dogecoin', 'doge'],
+    'ripple': ['ripple', 'xrp'],
+    'litecoin': ['litecoin', 'ltc'],
+    'binancecoin': ['binancecoin', 'binance coin', 'bnb'],
+}
+
+# Tickers that are also names or words ("Ada Lovelace", "Sol LeWitt", "ETH Zurich");
+# in free text they only mean the coin next to a price or crypto word
+CONTEXT_ONLY_ALIASES = {'ada', 'sol', 'eth', 'ether', 'doge', 'xrp', 'ltc', 'bnb', 'xbt'}
+PRICE_CONTEXT_RE = re.compile(r'\b(?:prices?|worth|usd|coins?|crypto\w*)\b')
+# "the doge statue": a ticker after an article names something else
+_ARTICLE_BEFORE_RE = re.compile(r'\b(?:the|a|an)\s+$')
+
+
+class CoinIndex:
+    """Resolve coin names and ticker symbols (btc, eth, ...) to CoinGecko ids."""
+
+    def __init__(self, coins: dict):
+        self.aliases = {}
+        for coin_id, names in coins.items():
+            for name in names:
+                self.aliases[name] = coin_id
+        # Longest alias first so "binance coin" wins over a shorter overlap
+        alternation = '|'.join(re.escape(a) for a in sorted(self.aliases, key=len, reverse=True))
+        self._pattern = re.compile(rf'\b({alternation})\b')
+
+    def lookup(self, name: str):
+        """Return the id for an exact coin name or ticker, or None."""
+        return self.aliases.get(name.lower().strip())
+
+    def resolve(self, text: str):
+        """Return the id of the first coin mentioned in text, or None.
+
+        Tickers in CONTEXT_ONLY_ALIASES count only when the text also has a
+        price or crypto word and no article right before the ticker.
+        """
+        text = text.lower()
+        priced = None
+        for match in self._pattern.finditer(text):
+            alias = match.group(1)
+            if alias in CONTEXT_ONLY_ALIASES:
+                if priced is None:
+                    priced = PRICE_CONTEXT_RE.search(text) is not None
+                if not priced or _ARTICLE_BEFORE_RE.search(text, 0, match.start()):
+                    continue
+            return self.aliases[alias]
+        return None
+
+
+class PriceTable:
+    """In-memory USD price table refreshed by one background thread."""
+
+    def __init__(self, coin_ids, interval: float = 30.0, ttl: float = 90.0, timeout: float = 5.0):
+        self.interval = interval
+        self.ttl = ttl
+        self.timeout = timeout
+        self.last_error = None
+        self._coin_ids = set(coin_ids)
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the refresher thread if it is not already running."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="crypto-price-refresher", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                self.last_error = str(e)
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def refresh(self, extra_ids=()):
+        """Fetch every tracked coin (plus extra_ids) in one batched request."""
+        # Imported here so the router can load coin names without pulling in requests
+        from http_client import HTTP
+        with self._refresh_lock:
+            with self._lock:
+                ids = sorted(self._coin_ids | set(extra_ids))
+            response = HTTP.get(
+                COINGECKO_PRICE_URL,
+                params={"ids": ",".join(ids), "vs_currencies": "usd", "include_24hr_change": "true"},
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+            data = response.json()
+            fetched_at = time.time()
+            with self._lock:
+                for coin_id, quote in data.items():
+                    if 'usd' not in quote:
+                        continue
+                    # Unknown ids that CoinGecko does know get tracked from now on
+                    self._coin_ids.add(coin_id)
+                    self._entries[coin_id] = {
+                        "price": quote['usd'],
+                        "change": quote.get('usd_24h_change') or 0,
+                        "fetched_at": fetched_at,
+                    }
+            self.last_error = None
+
+    def get(self, coin_id: str):
+        """Return {"price", "change", "age"} for coin_id, or None if CoinGecko has no such coin.
+
+        A coin seen for the first time is fetched synchronously; after that the
+        cached entry is returned immediately and, once older than the TTL, the
+        refresher is woken up to replace it.
+        """
+        self.start()
+        with self._lock:
+            entry = self._entries.get(coin_id)
+        if entry is None:
+            self.refresh(extra_ids=[coin_id])
+            with self._lock:
+                entry = self._entries.get(coin_id)
+            if entry is None:
+                return None
+
+        age = time.time() - entry["fetched_at"]
+        if age > self.ttl:
+            self._wake.set()
+        return {"price": entry["price"], "change": entry["change"], "age": age}
+
+
+COIN_INDEX = CoinIndex(SUPPORTED_COINS)
+PRICE_TABLE = PriceTable(SUPPORTED_COINS)
@@ -0,0 +1,107 @@
+"""The levels' routing and query functions, loaded without their Streamlit UI.
+
+The scripts keep their logic next to the sidebar that configures it. `Engine`
+runs each script once (outside `streamlit run` the widgets just return their
+defaults and `main()` does not run), then writes the service's settings into
+the script's globals, where the tool functions read them. The HTTP API and
+the batch runner both use it.
+"""
+import os
+
+from context_packer import DEFAULT_BUDGET
+from llm_clients import LLM_CLIENTS
+from model_router import AUTO_MODEL, DEFAULT_LATENCY_TARGET
+from tools import load as load_tool
+
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+LEVEL_SCRIPTS = {"level_1": "level_1.py", "level_2": "Level_2.py", "level_3": "Level_3.py"}
+
+DEFAULT_MODEL = "llama-3.3-70b-versatile"
+
+
+class NoLLM:
+    """Stands in for the Groq client without an API key; the LLM fallback then answers with an error."""
+
+    model_name = "none"
+    temperature = 0.7
+
+    def __getattr__(self, name):
+        raise RuntimeError("GROQ_API_KEY is not set")
+
+
+class Engine:
+    """process_query (levels 1 and 2), analyze_query (level 3) and their routers, ready to call."""
+
+    def __init__(self, groq_api_key: str = "", weather_api_key: str = "", model: str = DEFAULT_MODEL,
+                 context_budget: int = DEFAULT_BUDGET, cache_answers: bool = False, cache_threshold: float = 0.9,
+                 latency_target: float = DEFAULT_LATENCY_TARGET):
+        self.groq_api_key = groq_api_key
+        self.model = model
+        # model "auto" picks a model per question (see model_router.py) with the key and target set here
+        self.settings = {"weather_api_key": weather_api_key, "context_budget": context_budget,
+                         "cache_answers": cache_answers, "cache_threshold": cache_threshold,
+                         "groq_api_key": groq_api_key, "model_name": model, "latency_target": latency_target}
+        self.levels = {}
+
+    def load(self, levels=None):
+        """Run the scripts of levels (default: all) once and keep their globals."""
+        import runpy
+        from streamlit import config, logger
+        # Keep the bare-mode "missing ScriptRunContext" warnings quiet
+        config.set_option("logger.level", "error")
+        logger.set_log_level("error")
+        for level in levels or LEVEL_SCRIPTS:
+            namespace = runpy.run_path(os.path.join(ROOT, LEVEL_SCRIPTS[level]), run_name="engine")
+            # runpy returns a copy; the functions read their settings from the live module globals
+            scope = namespace["route_query"].__globals__
+            scope.update(self.settings)
+            self.levels[level] = scope
+        return self
+
+    def process(self, level: str, query: str, history: list = ()) -> str:
+        """Answer a query the way the level's chat does (tools, multi-intent or the LLM)."""
+        key = self.groq_api_key
+        if level == "level_1":
+            if self.model == AUTO_MODEL:
+                llm = None
+            else:
+                llm = LLM_CLIENTS.chat_groq(key, self.model, temperature=0.7, max_tokens=1024) if key else NoLLM()
+            return self.levels[level]["process_query"](query, llm, history=history)
+        client = LLM_CLIENTS.groq(key) if key else NoLLM()
+        return self.levels[level]["process_query"](query, client, self.model, history=history)
+
+    def analyze(self, query: str):
+        """Level 3's route for a query (tool, params, display_params, function), or None."""
+        return self.levels["level_3"]["analyze_query"](query)
+
+    def route(self, level: str, query: str):
+        """The level's routing decision without running anything.
+
+        Returns {"tool", "params"}, {"tool": "multi", "intents": [...]} or None
+        (the LLM fallback, or no tool on level 3). It goes through the same
+        route cache entries as the chat, so routing a query also warms them.
+        """
+        from multi_intent import route_intents
+        from route_cache import ROUTE_CACHE
+        scope = self.levels[level]
+        namespace = f"{level}:{scope[f'{level.upper()}_ROUTER'].fingerprint}"
+
+        def cached_route(q):
+            return ROUTE_CACHE.route(namespace, q, scope["route_query"])
+
+        intents = route_intents(query, cached_route)
+        if intents:
+            return {"tool": "multi", "intents": [
+                {"segment": segment, "tool": route["tool"], "params": route["params"]} for segment, route in intents
+            ]}
+        route = cached_route(query)
+        return None if route is None else {"tool": route["tool"], "params": route["params"]}
+
+    def tool(self, name: str):
+        """A tool function by name, bound to the configured weather API key."""
+        function = load_tool(name)
+        if name == "get_weather":
+            return lambda **params: function(**{"api_key": self.settings["weather_api_key"], **params})
+        return function
@@ -0,0 +1,156 @@
+"""Connection-pooled HTTP client shared by every external tool.
+
+`requests.get` opens a fresh TCP connection (and TLS handshake) per call. The
+`HTTP` client below keeps one `requests.Session` per process with keep-alive
+connection pools sized per upstream host, so repeated weather, crypto and
+country lookups reuse warm connections. Every GET goes through the upstream's
+circuit breaker (see circuit_breaker.py): it fails fast while the upstream is
+unhealthy, uses a timeout adapted to the upstream's p99 latency, and retries
+connection errors and 429/5xx answers with jittered backoff inside the same
+time budget a single call had before. Read timeouts are not retried. The
+breaker records one outcome per GET, however many attempts it took.
+"""
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from circuit_breaker import BREAKERS, backoff
+from metrics import METRICS
+
+
+# (connect, read) timeout in seconds used when a call does not pass one
+DEFAULT_TIMEOUT = (3.05, 5)
+
+# Per-host keep-alive pool sizes; other hosts share the default adapter
+HOST_POOL_SIZES = {
+    "http://api.openweathermap.org": 16,
+    "https://api.coingecko.com": 4,
+    "https://restcountries.com": 8,
+    "https://en.wikipedia.org": 8,
+}
+DEFAULT_POOL_SIZE = 10
+
+# Extra attempts after a failure, and the answers worth retrying
+MAX_RETRIES = 2
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class HttpClient:
+    """Thin wrapper around a pooled `requests.Session` with default timeouts and stats."""
+
+    def __init__(self, host_pool_sizes: dict = None, default_pool_size: int = DEFAULT_POOL_SIZE,
+                 timeout=DEFAULT_TIMEOUT, retries: int = MAX_RETRIES):
+        self.timeout = timeout
+        self.retries = retries
+        self.session = requests.Session()
+        # requests decompresses gzip/deflate bodies transparently
+        self.session.headers.update({"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"})
+        self._adapters = {}
+        self._mount("https://", default_pool_size)
+        self._mount("http://", default_pool_size)
+        for prefix, size in (host_pool_sizes or {}).items():
+            self._mount(prefix, size)
+        self._lock = threading.Lock()
+        self.requests_sent = 0
+
+    def _mount(self, prefix: str, pool_size: int):
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, pool_block=False)
+        self.session.mount(prefix, adapter)
+        self._adapters[prefix] = adapter
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """GET through the shared pools and the upstream's circuit breaker.
+
+        timeout (default DEFAULT_TIMEOUT) caps each attempt and, by its read
+        part, the total time spent including retries. Raises CircuitOpenError
+        without sending anything while the upstream's circuit is open. The
+        last 429/5xx response is returned once the retries are used up. The
+        breaker sees one success or failure for the whole call; any error,
+        not only a timeout or connection error, counts as a failure.
+        """
+        parts = urlsplit(url)
+        breaker = BREAKERS.get(f"{parts.scheme}://{parts.netloc}")
+        connect_cap, read_cap = _split(kwargs.pop("timeout", self.timeout))
+        deadline = time.monotonic() + read_cap
+        breaker.allow()
+        attempt, latency, timed_out = 0, None, None
+        try:
+            while True:
+                read = min(breaker.timeout(read_cap), max(deadline - time.monotonic(), 0.05))
+                with self._lock:
+                    self.requests_sent += 1
+                start = time.perf_counter()
+                try:
+                    response = self.session.get(url, timeout=(min(connect_cap, read), read), **kwargs)
+                except requests.ReadTimeout:
+                    # A slow upstream would only be slow again; let the breaker see it and give up
+                    timed_out = read
+                    raise
+                except requests.ConnectionError:  # includes ConnectTimeout
+                    if not self._retry(attempt, deadline, breaker):
+                        raise
+                else:
+                    if response.status_code not in RETRY_STATUSES:
+                        latency = time.perf_counter() - start
+                        return response
+                    if not self._retry(attempt, deadline, breaker):
+                        return response
+                    response.close()
+                attempt += 1
+        finally:
+            # Always settle the call, so a half-open probe is released whatever was raised
+            if latency is not None:
+                breaker.success(latency)
+            else:
+                breaker.failure(timed_out=timed_out)
+
+    def _retry(self, attempt: int, deadline: float, breaker) -> bool:
+        """Sleep a jittered backoff and return True if another attempt fits in the budget."""
+        if attempt >= self.retries:
+            return False
+        delay = backoff(attempt)
+        # Leave at least the minimum timeout for the next attempt
+        if time.monotonic() + delay + breaker.min_timeout > deadline:
+            return False
+        METRICS.inc("agent_http_retries_total", endpoint=breaker.endpoint)
+        time.sleep(delay)
+        return True
+
+    def pool_stats(self) -> dict:
+        """Return connections opened vs reused for every live host pool."""
+        hosts = {}
+        for adapter in self._adapters.values():
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                try:
+                    pool = pools[key]
+                except KeyError:
+                    continue
+                opened = pool.num_connections
+                served = pool.num_requests
+                hosts[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                    "opened": opened,
+                    "requests": served,
+                    "reused": max(served - opened, 0),
+                }
+        opened = sum(h["opened"] for h in hosts.values())
+        served = sum(h["requests"] for h in hosts.values())
+        return {
+            "requests_sent": self.requests_sent,
+            "connections_opened": opened,
+            "connections_reused": max(served - opened, 0),
+            "hosts": hosts,
+        }
+
+
+def _split(timeout) -> tuple:
+    """(connect, read) from a requests timeout given as a number or a pair."""
+    if isinstance(timeout, (tuple, list)):
+        return timeout[0], timeout[1]
+    return timeout, timeout
+
+
+HTTP = HttpClient(HOST_POOL_SIZES)
@@ -1,10 +1,18 @@
 import streamlit as st
-from langchain_groq import ChatGroq
-from langchain_community.tools import WikipediaQueryRun
-from langchain_community.utilities import WikipediaAPIWrapper
-import requests
-from datetime import datetime
-import re
+import time
+from functools import partial
+from router import LEVEL_1_ROUTER, CALC_TRIGGER_WHAT_IS_RE
+from route_cache import ROUTE_CACHE
+from crypto_prices import COIN_INDEX
+from multi_intent import route_intents, run_intents, merge_results
+from chat_history import render_history
+from calc_engine import extract_expression
+from llm_stream import timed_stream, log_completion, log_failure
+from llm_clients import LLM_CLIENTS
+from context_packer import DEFAULT_BUDGET, count_tokens, pack_context
+from metrics_panel import render_metrics_panel
+from model_router import AUTO_MODEL, DEFAULT_LATENCY_TARGET, MODEL_ROUTER
+from tools import TOOLS, load as load_tool
 
 # Page configuration
 st.set_page_config(page_title="LangChain Chatbot", page_icon="🤖", layout="wide")
@@ -18,9 +26,27 @@ with st.sidebar:
     # Model selection
     model_name = st.selectbox(
         "Select Llama Model",
-        ["llama-3.3-70b-versatile", "llama-3.1-70b-versatile", "llama-3.1-8b-instant", "mixtral-8x7b-32768"],
-        index=0
+        [AUTO_MODEL, "llama-3.3-70b-versatile", "llama-3.1-8b-instant"],
+        index=1,
+        format_func=lambda name: "Auto (fastest model that fits)" if name == AUTO_MODEL else name
     )
+    latency_target = st.slider("Latency target (s)", 0.5, 10.0, DEFAULT_LATENCY_TARGET, step=0.5,
+                               disabled=model_name != AUTO_MODEL,
+                               help="Auto picks a model and answer length per question to answer within this")
+    stream_responses = st.checkbox("Stream LLM responses", value=True)
+    context_budget = st.slider("Conversation context (tokens)", 0, 8000, DEFAULT_BUDGET, step=250,
+                               help="Recent turns sent with each LLM question; 0 sends only the question")
+    cache_answers = st.checkbox("Cache LLM answers", value=False,
+                                help="Reuse stored answers for repeated or near-identical questions")
+    cache_threshold = st.slider("Cache match similarity", 0.5, 1.0, 0.9, step=0.01, disabled=not cache_answers,
+                                help="1.0 reuses only exact repeats")
+    if cache_answers:
+        # SQLite and the cache load only once the cache is switched on
+        from llm_cache import LLM_RESPONSE_CACHE
+        cache_stats = LLM_RESPONSE_CACHE.stats()
+        st.caption(f"{cache_stats['entries']} cached answers, reused {cache_stats['total_hits']} times, "
+                   f"{cache_stats['saved_seconds']:.0f}s of generation saved")
+    render_metrics_panel()
     
     st.divider()
     st.markdown("### 🛠️ Available Tools")
@@ -37,160 +63,128 @@ with st.sidebar:
         st.session_state.messages = []
         st.rerun()
 
-# Tool Functions
-def calculator(expression: str) -> str:
-    """Evaluate mathematical expressions."""
-    try:
-        import ast
-        import operator
-        
-        ops = {
-            ast.Add: operator.add,
-            ast.Sub: operator.sub,
-            ast.Mult: operator.mul,
-            ast.Div: operator.truediv,
-            ast.Pow: operator.pow,
-            ast.USub: operator.neg,
-        }
-        
-        def eval_expr(node):
-            if isinstance(node, ast.Num):
-                return node.n
-            elif isinstance(node, ast.Constant):
-                return node.value
-            elif isinstance(node, ast.BinOp):
-                return ops[type(node.op)](eval_expr(node.left), eval_expr(node.right))
-            elif isinstance(node, ast.UnaryOp):
-                return ops[type(node.op)](eval_expr(node.operand))
-            else:
-                raise TypeError(node)
-        
-        result = eval_expr(ast.parse(expression, mode='eval').body)
-        return f"Result: {result}"
-    except Exception as e:
-        return f"Error: {str(e)}"
-
-def get_weather(city: str) -> str:
-    """Get current weather for a city."""
-    if not weather_api_key:
-        return "Weather API key not configured."
-    
-    try:
-        url = f"http://api.openweathermap.org/data/2.5/weather?q={city}&appid={weather_api_key}&units=metric"
-        response = requests.get(url, timeout=5)
-        data = response.json()
-        
-        if response.status_code == 200:
-            temp = data['main']['temp']
-            desc = data['weather'][0]['description']
-            humidity = data['main']['humidity']
-            feels_like = data['main']['feels_like']
-            return f"Weather in {city}: {temp}°C (feels like {feels_like}°C), {desc}, Humidity: {humidity}%"
-        else:
-            return f"Error: {data.get('message', 'Unknown error')}"
-    except Exception as e:
-        return f"Error: {str(e)}"
-
-def get_crypto_price(crypto: str) -> str:
-    """Get cryptocurrency price."""
-    try:
-        url = f"https://api.coingecko.com/api/v3/simple/price?ids={crypto.lower()}&vs_currencies=usd&include_24hr_change=true"
-        response = requests.get(url, timeout=5)
-        data = response.json()
-        
-        if crypto.lower() in data:
-            price = data[crypto.lower()]['usd']
-            change = data[crypto.lower()].get('usd_24h_change', 0)
-            change_symbol = "📈" if change > 0 else "📉"
-            return f"{crypto.capitalize()}: ${price:,.2f} USD {change_symbol} ({change:.2f}% 24h)"
-        else:
-            return f"'{crypto}' not found. Try: bitcoin, ethereum, cardano, solana"
-    except Exception as e:
-        return f"Error: {str(e)}"
-
-def get_country_info(country: str) -> str:
-    """Get country information."""
-    try:
-        url = f"https://restcountries.com/v3.1/name/{country}"
-        response = requests.get(url, timeout=5)
-        data = response.json()
-        
-        if response.status_code == 200 and len(data) > 0:
-            c = data[0]
-            name = c['name']['common']
-            capital = c.get('capital', ['N/A'])[0]
-            population = c.get('population', 'N/A')
-            region = c.get('region', 'N/A')
-            area = c.get('area', 'N/A')
-            return f"{name}: Capital - {capital}, Population - {population:,}, Region - {region}, Area - {area:,} km²"
-        else:
-            return f"Could not find '{country}'"
-    except Exception as e:
-        return f"Error: {str(e)}"
-
-def get_current_time() -> str:
-    """Get current date and time."""
-    current = datetime.now()
-    return f"Current: {current.strftime('%A, %B %d, %Y at %H:%M:%S')}"
-
-def search_wikipedia(query: str) -> str:
-    """Search Wikipedia."""
-    try:
-        wiki = WikipediaQueryRun(api_wrapper=WikipediaAPIWrapper(top_k_results=1, doc_content_chars_max=500))
-        return wiki.run(query)
-    except Exception as e:
-        return f"Error: {str(e)}"
+# Tool Functions (shared tools package; a tool's module is imported on first use)
+def tool_function(name: str):
+    """Return the tool function for a route, bound to this session's settings."""
+    if name == "get_weather":
+        return partial(load_tool(name), api_key=weather_api_key)
+    if name == "search_wikipedia":
+        return partial(load_tool(name), backend="langchain")
+    return load_tool(name)
 
-def process_query(query: str, llm) -> str:
-    """Process user query and route to appropriate tool."""
+def route_query(query: str) -> dict:
+    """Decide which tool a query needs and with which params."""
     query_lower = query.lower()
+    hits = LEVEL_1_ROUTER.scan(query_lower)
     
     # Check for calculator requests
-    calc_patterns = [r'\d+\s*[\+\-\*\/\^]\s*\d+', r'calculate', r'compute', r'what is \d+']
-    if any(re.search(pattern, query_lower) for pattern in calc_patterns):
+    if CALC_TRIGGER_WHAT_IS_RE.search(query_lower):
         # Extract expression
-        match = re.search(r'(\d+\s*[\+\-\*\/\^]\s*\d+)', query)
-        if match:
-            return calculator(match.group(1))
+        expression = extract_expression(query)
+        if expression:
+            return {"tool": "calculator", "params": {"expression": expression}}
     
     # Check for weather
-    if 'weather' in query_lower:
+    if 'weather' in hits:
         words = query.split()
         for i, word in enumerate(words):
             if word.lower() == 'in' and i + 1 < len(words):
                 city = ' '.join(words[i+1:]).strip('?.!')
-                return get_weather(city)
+                return {"tool": "get_weather", "params": {"city": city}}
     
     # Check for crypto
-    crypto_keywords = ['bitcoin', 'ethereum', 'crypto', 'btc', 'eth', 'price of']
-    if any(kw in query_lower for kw in crypto_keywords):
-        for crypto in ['bitcoin', 'ethereum', 'cardano', 'solana', 'dogecoin']:
-            if crypto in query_lower:
-                return get_crypto_price(crypto)
+    if 'crypto' in hits:
+        crypto = COIN_INDEX.resolve(query_lower)
+        if crypto:
+            return {"tool": "get_crypto_price", "params": {"crypto": crypto}}
     
     # Check for country info
-    if 'country' in query_lower or 'capital of' in query_lower or 'population of' in query_lower:
+    if 'country' in hits:
         words = query.replace('?', '').replace('.', '').split()
         if 'of' in words:
             idx = words.index('of')
             if idx + 1 < len(words):
                 country = ' '.join(words[idx+1:])
-                return get_country_info(country)
+                return {"tool": "get_country_info", "params": {"country": country}}
     
     # Check for time
-    if 'time' in query_lower or 'date' in query_lower:
-        return get_current_time()
+    if 'time' in hits:
+        return {"tool": "get_current_time", "params": {}}
     
     # Check for Wikipedia
-    wiki_keywords = ['who is', 'what is', 'tell me about', 'wikipedia', 'information about']
-    if any(kw in query_lower for kw in wiki_keywords):
-        return search_wikipedia(query)
+    if 'wiki' in hits:
+        return {"tool": "search_wikipedia", "params": {"query": query}}
+    
+    return None
+
+# Network-bound tools that multi-intent queries run concurrently
+CONCURRENT_TOOLS = {name for name, tool in TOOLS.items() if tool.io_bound}
+
+def process_query(query: str, llm, stream: bool = False, history: list = ()):
+    """Process user query and route to appropriate tool.
+    
+    With stream=True the LLM fallback returns a generator of text pieces
+    instead of a string. The LLM also sees as much of history (the earlier
+    messages) as fits in the context budget.
+    """
+    def cached_route(q):
+        return ROUTE_CACHE.route(f"level_1:{LEVEL_1_ROUTER.fingerprint}", q, route_query)
+    
+    # Several tool requests in one query run together, network tools concurrently
+    intents = route_intents(query, cached_route)
+    if intents:
+        tasks = [(segment, route["tool"], tool_function(route["tool"]), route["params"]) for segment, route in intents]
+        return merge_results(run_intents(tasks, CONCURRENT_TOOLS))
+    
+    route = cached_route(query)
+    if route is not None:
+        return tool_function(route["tool"])(**route["params"])
     
     # Default: Use LLM
     try:
-        response = llm.invoke(query)
+        messages = pack_context(history, query, context_budget)
+        prompt_tokens = count_tokens(messages)
+        # Auto: the models that fit the latency target for this question, best first
+        auto = model_name == AUTO_MODEL
+        plan = MODEL_ROUTER.plan(messages, latency_target, stream) if auto else [
+            {"model": llm.model_name, "max_tokens": 1024, "timeout": None}]
+        cache = None
+        if cache_answers:
+            from llm_cache import LLM_RESPONSE_CACHE as cache
+            for choice in plan:
+                cached = cache.lookup(choice["model"], 0.7, messages, cache_threshold)
+                if cached is not None:
+                    return cached
+        
+        def ask(choice):
+            if not auto:
+                return llm.stream(messages) if stream else llm.invoke(messages)
+            # Auto mode falls back to the next model instead of retrying a slow one
+            chat = LLM_CLIENTS.chat_groq(groq_api_key, choice["model"], temperature=0.7,
+                                         max_tokens=choice["max_tokens"], timeout=choice["timeout"], max_retries=0)
+            return chat.stream(messages) if stream else chat.invoke(messages)
+        
+        if auto:
+            choice, start, response = MODEL_ROUTER.complete(plan, ask, stream)
+        else:
+            choice, start = plan[0], time.perf_counter()
+            response = ask(choice)
+        model = choice["model"]
+        if stream:
+            # A manual stream starts on first iteration; auto mode already waited for its first chunk
+            pieces = timed_stream(response, model, lambda chunk: chunk.content, start if auto else None,
+                                  prompt_tokens=prompt_tokens)
+            return cache.record(pieces, model, 0.7, messages, start) if cache else pieces
+        usage = getattr(response, "usage_metadata", None) or {}
+        log_completion(model, start, response.content,
+                       usage.get("input_tokens", prompt_tokens), usage.get("output_tokens"))
+        if cache:
+            cache.store(model, 0.7, messages, response.content, time.perf_counter() - start)
         return response.content
     except Exception as e:
+        # Auto mode has logged each model's failure already
+        if model_name != AUTO_MODEL:
+            log_failure(llm.model_name, e)
         return f"Error: {str(e)}"
 
 def main():
@@ -215,14 +209,10 @@ def main():
         """)
         return
     
-    # Initialize LLM
+    # Reuse the process-wide client for this key, model and settings (auto picks one per question)
     try:
-        llm = ChatGroq(
-            temperature=0.7,
-            model_name=model_name,
-            groq_api_key=groq_api_key,
-            max_tokens=1024
-        )
+        llm = None if model_name == AUTO_MODEL else LLM_CLIENTS.chat_groq(groq_api_key, model_name, temperature=0.7,
+                                                                           max_tokens=1024)
     except Exception as e:
         st.error(f"Error: {str(e)}")
         return
@@ -231,10 +221,8 @@ def main():
     if "messages" not in st.session_state:
         st.session_state.messages = []
     
-    # Display chat messages
-    for message in st.session_state.messages:
-        with st.chat_message(message["role"]):
-            st.markdown(message["content"])
+    # Display chat messages (recent window; older pages on demand)
+    render_history(st.session_state.messages)
     
     # Chat input
     if prompt := st.chat_input("Ask me anything..."):
@@ -246,15 +234,19 @@ def main():
         
         # Get response
         with st.chat_message("assistant"):
-            with st.spinner("🤔 Thinking..."):
-                try:
-                    response = process_query(prompt, llm)
+            try:
+                with st.spinner("🤔 Thinking..."):
+                    response = process_query(prompt, llm, stream=stream_responses, history=st.session_state.messages[:-1])
+                # LLM answers stream token by token; tool results arrive whole
+                if isinstance(response, str):
                     st.markdown(response)
-                    st.session_state.messages.append({"role": "assistant", "content": response})
-                except Exception as e:
-                    error_msg = f"Error: {str(e)}"
-                    st.error(error_msg)
-                    st.session_state.messages.append({"role": "assistant", "content": error_msg})
+                else:
+                    response = st.write_stream(response)
+                st.session_state.messages.append({"role": "assistant", "content": response})
+            except Exception as e:
+                error_msg = f"Error: {str(e)}"
+                st.error(error_msg)
+                st.session_state.messages.append({"role": "assistant", "content": error_msg})
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
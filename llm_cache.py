@@ -0,0 +1,264 @@
+"""Opt-in persistent cache of LLM fallback answers with near-duplicate matching.
+
+Greetings and common definitions reach the LLM fallback over and over, from
+every user, and each one costs a full Groq round trip. Answers are stored in
+the local SQLite database keyed by (model, temperature, conversation context,
+normalized prompt). A prompt that is not cached exactly can still match a
+near duplicate ("tell me about python" vs "Tell me about pythons?"): every
+prompt gets a MinHash signature of its character shingles. Locality-sensitive
+band buckets of the signature are indexed in SQLite, so a lookup only
+compares the signatures that share the most buckets. No embedding service is
+involved. Entries expire after a TTL and count their hits and the generation
+time they saved.
+"""
+import hashlib
+import json
+import logging
+import random
+import struct
+import threading
+import time
+import zlib
+
+from sqlalchemy import (
+    Column, Float, Integer, LargeBinary, MetaData, String, Table, Text, delete, func, select, update,
+)
+
+from route_cache import normalize_query
+from wiki_cache import WIKI_CACHE
+
+
+logger = logging.getLogger("agent.llm")
+
+NUM_PERM = 64
+BANDS = 16  # 16 bands x 4 rows: pairs above ~0.5 similarity usually share a bucket
+SHINGLE_SIZE = 3
+DEFAULT_THRESHOLD = 0.9
+
+# Signatures compared per near-duplicate lookup
+MAX_CANDIDATES = 32
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(0x5EED)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+_MAX_HASH = (1 << 32) - 1
+
+metadata = MetaData()
+
+llm_cache_table = Table(
+    "llm_cache",
+    metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("model", String(128), nullable=False),
+    Column("temperature", Float, nullable=False),
+    Column("context", String(64), nullable=False),
+    Column("prompt", Text, nullable=False),
+    Column("exact_key", String(64), nullable=False, index=True),
+    Column("signature", LargeBinary, nullable=False),
+    Column("response", Text, nullable=False),
+    Column("latency", Float, nullable=False),
+    Column("created_at", Float, nullable=False, index=True),
+    Column("last_access", Float, nullable=False),
+    Column("hits", Integer, nullable=False, default=0),
+    Column("saved_seconds", Float, nullable=False, default=0.0),
+)
+
+llm_cache_bands = Table(
+    "llm_cache_bands",
+    metadata,
+    Column("bucket", Integer, nullable=False, index=True),
+    Column("entry_id", Integer, nullable=False, index=True),
+)
+
+
+def shingles(text: str) -> set:
+    """Hashed character shingles of normalized text."""
+    text = f" {normalize_query(text)} "
+    if len(text) <= SHINGLE_SIZE:
+        return {zlib.crc32(text.encode())}
+    return {zlib.crc32(text[i:i + SHINGLE_SIZE].encode()) for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def minhash(text: str) -> tuple:
+    """MinHash signature: for each permutation, the smallest permuted shingle hash."""
+    hashes = shingles(text)
+    return tuple(min(((a * h + b) % _PRIME) & _MAX_HASH for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def similarity(sig_a, sig_b) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / len(sig_a)
+
+
+def band_buckets(signature: tuple) -> list:
+    """One integer bucket id per band (band number in the high bits); near duplicates share at least one."""
+    rows = NUM_PERM // BANDS
+    buckets = []
+    for band in range(BANDS):
+        digest = hashlib.blake2b(struct.pack(f"<{rows}I", *signature[band * rows:(band + 1) * rows]),
+                                 digest_size=6).digest()
+        buckets.append((band << 48) | int.from_bytes(digest, "little"))
+    return buckets
+
+
+def _context_key(messages: list) -> str:
+    """Digest of everything sent before the prompt (packed history), so answers only match in the same context."""
+    return hashlib.sha256(json.dumps(messages[:-1], sort_keys=True).encode()).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed LLM answer cache with exact and MinHash near-duplicate lookup."""
+
+    def __init__(self, engine, ttl: float = 24 * 3600, threshold: float = DEFAULT_THRESHOLD,
+                 max_entries: int = 10000, evict_every: int = 50):
+        self.engine = engine
+        self.ttl = ttl
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.evict_every = evict_every
+        metadata.create_all(engine)
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.lookups = 0
+        self.exact_hits = 0
+        self.near_hits = 0
+
+    def _keys(self, model: str, temperature: float, messages: list):
+        prompt = normalize_query(messages[-1]["content"])
+        context = _context_key(messages)
+        exact_key = hashlib.sha256(f"{model}\0{temperature}\0{context}\0{prompt}".encode()).hexdigest()
+        return prompt, context, exact_key
+
+    def lookup(self, model: str, temperature: float, messages: list, threshold: float = None):
+        """Return the cached answer for the packed messages, or None.
+
+        An exact prompt match wins; otherwise the most similar cached prompt
+        with the same model, temperature and context is used if its estimated
+        similarity reaches threshold (1.0 disables near-duplicate matching).
+        """
+        threshold = self.threshold if threshold is None else threshold
+        prompt, context, exact_key = self._keys(model, temperature, messages)
+        fresh = time.time() - self.ttl
+        t = llm_cache_table
+        with self._lock:
+            self.lookups += 1
+        with self.engine.begin() as conn:
+            row = conn.execute(
+                select(t.c.id, t.c.response, t.c.latency)
+                .where(t.c.exact_key == exact_key, t.c.created_at >= fresh)
+            ).first()
+            exact, score = row is not None, 1.0
+            if not exact and threshold < 1.0:
+                signature = minhash(prompt)
+                # Entries sharing the most bands are the likeliest near duplicates
+                b = llm_cache_bands
+                candidates = (
+                    select(b.c.entry_id).where(b.c.bucket.in_(band_buckets(signature)))
+                    .group_by(b.c.entry_id).order_by(func.count().desc()).limit(MAX_CANDIDATES)
+                )
+                best = None
+                for candidate in conn.execute(
+                    select(t.c.id, t.c.response, t.c.latency, t.c.signature)
+                    .where(t.c.id.in_(candidates), t.c.model == model, t.c.temperature == temperature,
+                           t.c.context == context, t.c.created_at >= fresh)
+                ):
+                    s = similarity(signature, struct.unpack(f"<{NUM_PERM}I", candidate.signature))
+                    if s >= threshold and (best is None or s > score):
+                        best, score = candidate, s
+                row = best
+            if row is None:
+                return None
+            conn.execute(update(t).where(t.c.id == row.id).values(
+                last_access=time.time(), hits=t.c.hits + 1, saved_seconds=t.c.saved_seconds + row.latency,
+            ))
+        with self._lock:
+            if exact:
+                self.exact_hits += 1
+            else:
+                self.near_hits += 1
+        logger.info("llm cache hit model=%s similarity=%.2f saved=%.3fs", model, score, row.latency)
+        return row.response
+
+    def store(self, model: str, temperature: float, messages: list, response: str, latency: float):
+        """Cache an answer that took latency seconds to generate; errors are not cached."""
+        if not response or response.startswith("Error:"):
+            return
+        prompt, context, exact_key = self._keys(model, temperature, messages)
+        signature = minhash(prompt)
+        now = time.time()
+        t = llm_cache_table
+        with self.engine.begin() as conn:
+            stale = select(t.c.id).where(t.c.exact_key == exact_key)
+            conn.execute(delete(llm_cache_bands).where(llm_cache_bands.c.entry_id.in_(stale)))
+            conn.execute(delete(t).where(t.c.exact_key == exact_key))
+            entry_id = conn.execute(t.insert().values(
+                model=model, temperature=temperature, context=context, prompt=prompt, exact_key=exact_key,
+                signature=struct.pack(f"<{NUM_PERM}I", *signature), response=response, latency=latency,
+                created_at=now, last_access=now, hits=0, saved_seconds=0.0,
+            )).inserted_primary_key[0]
+            conn.execute(llm_cache_bands.insert(), [
+                {"bucket": bucket, "entry_id": entry_id} for bucket in band_buckets(signature)
+            ])
+        with self._lock:
+            self._writes += 1
+            due = self._writes % self.evict_every == 0
+        if due:
+            self.evict()
+
+    def record(self, pieces, model: str, temperature: float, messages: list, start: float):
+        """Pass a text stream through and cache the full answer once it completes without error."""
+        collected = []
+        for piece in pieces:
+            collected.append(piece)
+            yield piece
+        if not any(piece.startswith("Error:") for piece in collected):
+            self.store(model, temperature, messages, "".join(collected), time.perf_counter() - start)
+
+    def evict(self):
+        """Drop expired entries, then the least recently used ones above max_entries."""
+        t = llm_cache_table
+        with self.engine.begin() as conn:
+            doomed = select(t.c.id).where(t.c.created_at < time.time() - self.ttl)
+            count = conn.execute(select(func.count()).select_from(t)).scalar()
+            if count > self.max_entries:
+                cutoff = conn.execute(
+                    select(t.c.last_access).order_by(t.c.last_access.desc()).offset(self.max_entries).limit(1)
+                ).scalar()
+                doomed = doomed.union(select(t.c.id).where(t.c.last_access <= cutoff))
+            ids = [row[0] for row in conn.execute(doomed)]
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                conn.execute(delete(llm_cache_bands).where(llm_cache_bands.c.entry_id.in_(chunk)))
+                conn.execute(delete(t).where(t.c.id.in_(chunk)))
+
+    def stats(self) -> dict:
+        """Lookups and hits in this process, plus stored entries, hits and seconds saved overall."""
+        t = llm_cache_table
+        with self.engine.begin() as conn:
+            entries, hits, saved = conn.execute(
+                select(func.count(), func.coalesce(func.sum(t.c.hits), 0), func.coalesce(func.sum(t.c.saved_seconds), 0.0))
+            ).one()
+        with self._lock:
+            served = self.exact_hits + self.near_hits
+            return {
+                "entries": entries,
+                "total_hits": hits,
+                "saved_seconds": saved,
+                "lookups": self.lookups,
+                "exact_hits": self.exact_hits,
+                "near_hits": self.near_hits,
+                "hit_rate": served / self.lookups if self.lookups else 0.0,
+            }
+
+    def top_entries(self, limit: int = 10) -> list:
+        """Most reused cached prompts with their hit counts and seconds saved."""
+        t = llm_cache_table
+        with self.engine.begin() as conn:
+            rows = conn.execute(
+                select(t.c.prompt, t.c.model, t.c.hits, t.c.saved_seconds).order_by(t.c.hits.desc()).limit(limit)
+            )
+            return [dict(row._mapping) for row in rows]
+
+
+# Shares the SQLite database and connection pool of the Wikipedia cache
+LLM_RESPONSE_CACHE = ResponseCache(WIKI_CACHE.engine)
@@ -0,0 +1,116 @@
+"""Process-wide pool of LLM clients shared by every session.
+
+`main()` used to build a new `ChatGroq` (level 1) or `Groq` client (level 2)
+on every Streamlit rerun, so each interaction paid client setup and opened a
+cold HTTPS connection. Clients are now kept per (API key hash, model,
+generation settings) and reused across reruns and sessions, and all of them
+send through one httpx connection pool whose keep-alive connections stay warm
+between requests. Clients idle for longer than `idle_ttl` are dropped.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+# Shared connection pool to the Groq API
+MAX_CONNECTIONS = 32
+MAX_KEEPALIVE_CONNECTIONS = 16
+KEEPALIVE_EXPIRY = 300.0
+
+# Seconds a client may sit unused before it is dropped
+DEFAULT_IDLE_TTL = 1800.0
+
+
+def key_digest(api_key: str) -> str:
+    """Short hash of an API key, so keys never sit in the pool's index in clear text."""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+class LLMClientPool:
+    """Thread-safe cache of LLM clients with idle eviction and reuse counters."""
+
+    def __init__(self, idle_ttl: float = DEFAULT_IDLE_TTL, max_clients: int = 64):
+        self.idle_ttl = idle_ttl
+        self.max_clients = max_clients
+        self._clients = OrderedDict()  # key -> (client, last used), least recently used first
+        self._lock = threading.Lock()
+        self._http_client = None
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+
+    def http_client(self):
+        """The httpx client every pooled LLM client sends through, created on first use."""
+        with self._lock:
+            if self._http_client is None:
+                import httpx
+                limits = httpx.Limits(max_connections=MAX_CONNECTIONS,
+                                      max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                                      keepalive_expiry=KEEPALIVE_EXPIRY)
+                self._http_client = httpx.Client(limits=limits)
+            return self._http_client
+
+    def get(self, kind: str, api_key: str, build, model: str = None, **settings):
+        """Return the pooled client for (kind, key, model, settings), calling build() on a miss."""
+        key = (kind, key_digest(api_key), model, tuple(sorted(settings.items())))
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._clients.get(key)
+            if entry is not None:
+                self._clients[key] = (entry[0], now)
+                self._clients.move_to_end(key)
+                self.reused += 1
+                return entry[0]
+
+        client = build()
+        with self._lock:
+            # Another session may have built the same client meanwhile; keep the first one
+            entry = self._clients.get(key)
+            if entry is not None:
+                self.reused += 1
+                return entry[0]
+            self._clients[key] = (client, now)
+            self.created += 1
+            while len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+                self.evicted += 1
+        return client
+
+    def _evict_idle(self, now: float):
+        while self._clients:
+            key, (_, last_used) = next(iter(self._clients.items()))
+            if now - last_used <= self.idle_ttl:
+                return
+            del self._clients[key]
+            self.evicted += 1
+
+    def groq(self, api_key: str):
+        """A `groq.Groq` client; the model and settings are passed per request."""
+        def build():
+            from groq import Groq
+            return Groq(api_key=api_key, http_client=self.http_client())
+        return self.get("groq", api_key, build)
+
+    def chat_groq(self, api_key: str, model: str, **settings):
+        """A LangChain `ChatGroq` bound to model and generation settings (temperature, max_tokens, ...)."""
+        def build():
+            from langchain_groq import ChatGroq
+            return ChatGroq(model_name=model, groq_api_key=api_key, http_client=self.http_client(), **settings)
+        return self.get("chat_groq", api_key, build, model, **settings)
+
+    def stats(self) -> dict:
+        """Return pooled client count and created/reused/evicted counters."""
+        with self._lock:
+            total = self.created + self.reused
+            return {
+                "clients": len(self._clients),
+                "created": self.created,
+                "reused": self.reused,
+                "evicted": self.evicted,
+                "reuse_rate": self.reused / total if total else 0.0,
+            }
+
+
+LLM_CLIENTS = LLMClientPool()
@@ -0,0 +1,85 @@
+"""Streaming helpers for the LLM fallback path.
+
+The fallbacks used to block behind a spinner until the whole completion was
+generated. `timed_stream` turns a provider stream into plain text pieces for
+`st.write_stream` and logs time-to-first-token separately from total
+generation time, which is what users actually perceive. Both helpers also
+record those timings and the prompt and completion token counts in
+`METRICS`.
+"""
+import logging
+import time
+
+from context_packer import estimate_tokens
+from metrics import ERROR, METRICS, OK, TIMEOUT
+
+
+logger = logging.getLogger("agent.llm")
+
+
+def _record(model: str, total: float, first_token, prompt_tokens: int, completion_tokens: int, outcome: str):
+    METRICS.record("llm", total, outcome, model=model)
+    # Only a stream separates waiting for the first token from generating the rest
+    if first_token is not None:
+        METRICS.observe("agent_llm_ttft_seconds", first_token, model=model)
+        METRICS.observe("agent_llm_generation_seconds", total - first_token, model=model)
+        METRICS.inc("agent_llm_streamed_tokens_total", completion_tokens, model=model)
+    METRICS.inc("agent_llm_tokens_total", prompt_tokens, model=model, kind="prompt")
+    METRICS.inc("agent_llm_tokens_total", completion_tokens, model=model, kind="completion")
+
+
+def _failure(error: BaseException) -> str:
+    return TIMEOUT if isinstance(error, TimeoutError) or "timeout" in type(error).__name__.lower() else ERROR
+
+
+def timed_stream(chunks, model: str, extract, start: float = None, prompt_tokens: int = 0):
+    """Yield the text of each chunk, logging time-to-first-token and total time.
+
+    extract(chunk) returns the text carried by one provider chunk (or None).
+    start is when the request was sent; for lazy streams it defaults to the
+    first iteration. Errors raised mid-stream are yielded as an "Error: ..."
+    piece so the chat shows them instead of crashing the rerun. Completion
+    tokens are estimated from the streamed text.
+    """
+    start = start or time.perf_counter()
+    first_token = None
+    pieces = []
+    outcome = OK
+    try:
+        for chunk in chunks:
+            text = extract(chunk)
+            if not text:
+                continue
+            if first_token is None:
+                first_token = time.perf_counter() - start
+            pieces.append(text)
+            yield text
+    except Exception as e:
+        outcome = _failure(e)
+        yield f"Error: {str(e)}"
+    finally:
+        total = time.perf_counter() - start
+        text = "".join(pieces)
+        logger.info("llm stream model=%s ttft=%s total=%.3fs chars=%d", model,
+                    f"{first_token:.3f}s" if first_token is not None else "n/a", total, len(text))
+        _record(model, total, first_token, prompt_tokens, estimate_tokens(text), outcome)
+
+
+def log_completion(model: str, start: float, text: str, prompt_tokens: int = 0, completion_tokens: int = None):
+    """Log a non-streaming completion.
+
+    Its first token only arrives with the whole answer, so no time to first
+    token is recorded. Pass the provider's usage counts when the response
+    has them; completion tokens are estimated from text otherwise.
+    """
+    total = time.perf_counter() - start
+    logger.info("llm complete model=%s ttft=%.3fs total=%.3fs chars=%d", model, total, total, len(text or ""))
+    if completion_tokens is None:
+        completion_tokens = estimate_tokens(text or "")
+    _record(model, total, None, prompt_tokens, completion_tokens, OK)
+
+
+def log_failure(model: str, error: BaseException):
+    """Count an LLM request that failed before it returned a response."""
+    logger.warning("llm failed model=%s error=%s", model, type(error).__name__)
+    METRICS.inc("agent_llm_calls_total", model=model, outcome=_failure(error))
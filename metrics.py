@@ -0,0 +1,274 @@
+"""In-process latency histograms and outcome counters, with a Prometheus export.
+
+Nothing recorded how long routing, the tools or the Groq calls take, or how
+often they fail. Spans time a block and count its outcome (ok, error or
+timeout); the timings go into fixed-bucket histograms, so memory stays
+constant and percentiles can be estimated at any time. Everything lives in
+the process-wide `METRICS` registry. The sidebar panel reads it, and when
+AGENT_METRICS_PORT is set, `start_exporter()` serves it at
+http://127.0.0.1:<port>/metrics in the Prometheus text format.
+
+    with METRICS.span("tool", tool="get_weather") as span:
+        result = get_weather("Tokyo")
+        span.outcome = outcome_of(result)
+"""
+import bisect
+import logging
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+logger = logging.getLogger("agent.metrics")
+
+# Histogram upper bounds in seconds, from cached routes (microseconds) to slow LLM answers
+BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+OK, ERROR, TIMEOUT = "ok", "error", "timeout"
+
+# Spans at least this long are kept in the recent list (routing stays well below it)
+RECENT_MIN_SECONDS = 0.001
+
+HELP = {
+    "agent_route_seconds": "Time to pick a tool for a query",
+    "agent_route_calls_total": "Routing decisions by cache hit or miss",
+    "agent_tool_seconds": "Tool call latency",
+    "agent_tool_calls_total": "Tool calls by outcome",
+    "agent_intent_timeouts_total": "Tools still running when a multi-intent deadline expired",
+    "agent_llm_seconds": "LLM request latency until the last token",
+    "agent_llm_calls_total": "LLM requests by outcome",
+    "agent_llm_ttft_seconds": "LLM time to first token (streamed requests)",
+    "agent_llm_generation_seconds": "LLM time from first to last token (streamed requests)",
+    "agent_llm_streamed_tokens_total": "LLM completion tokens of streamed requests",
+    "agent_llm_tokens_total": "LLM tokens by kind (prompt or completion)",
+    "agent_llm_auto_choices_total": "Models chosen first in auto mode, by question complexity",
+    "agent_llm_fallbacks_total": "Auto-mode requests that failed on a model and moved down the plan",
+    "agent_circuit_transitions_total": "Circuit breaker state changes by upstream and new state",
+    "agent_circuit_rejected_total": "Calls failed fast because the upstream's circuit was open",
+    "agent_http_retries_total": "HTTP attempts retried after a failure",
+    "agent_api_seconds": "HTTP API request latency by endpoint",
+    "agent_api_calls_total": "HTTP API requests by endpoint and outcome",
+}
+
+
+def outcome_of(result) -> str:
+    """Classify a tool result: tools report failures as "Error: ..." strings instead of raising."""
+    if isinstance(result, str) and result.startswith("Error"):
+        lowered = result.lower()
+        return TIMEOUT if "timed out" in lowered or "timeout" in lowered else ERROR
+    return OK
+
+
+class Histogram:
+    """Counts of observations per bucket, plus their sum, count and maximum."""
+
+    __slots__ = ("counts", "sum", "count", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Estimate the q-quantile by interpolating inside the bucket that holds it."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                if i == len(BUCKETS):
+                    return self.max
+                low = BUCKETS[i - 1] if i else 0.0
+                return min(low + (BUCKETS[i] - low) * (rank - seen) / n, self.max)
+            seen += n
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+
+class Span:
+    """Times a with-block; an exception (or setting .outcome) marks it as failed."""
+
+    __slots__ = ("registry", "name", "labels", "outcome", "start")
+
+    def __init__(self, registry, name: str, labels: dict):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self.outcome = OK
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.outcome = TIMEOUT if issubclass(exc_type, TimeoutError) else ERROR
+        self.registry.record(self.name, time.perf_counter() - self.start, self.outcome, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """Thread-safe histograms and counters keyed by metric name and labels."""
+
+    def __init__(self, recent: int = 200):
+        self._histograms = {}  # (name, labels) -> Histogram
+        self._counters = {}  # (name, labels) -> float
+        self._spans = {}  # (span name, labels as passed) -> (Histogram, {outcome: counter key})
+        self._lock = threading.Lock()
+        self.recent = deque(maxlen=recent)  # (time, name, labels, seconds, outcome) of the latest slow spans
+
+    def span(self, name: str, **labels) -> Span:
+        """Context manager recording agent_<name>_seconds and agent_<name>_calls_total{outcome}."""
+        return Span(self, name, labels)
+
+    def record(self, name: str, seconds: float, outcome: str = OK, **labels):
+        """Record a finished span measured by the caller."""
+        # Routing records on every query, so the metric keys are built once per label set
+        slot_key = (name, tuple(labels.items()))
+        with self._lock:
+            slot = self._spans.get(slot_key)
+            if slot is None:
+                key = tuple(sorted(labels.items()))
+                histogram = self._histograms.setdefault((f"agent_{name}_seconds", key), Histogram())
+                slot = self._spans[slot_key] = (histogram, {})
+            histogram, counters = slot
+            histogram.observe(seconds)
+            counter = counters.get(outcome)
+            if counter is None:
+                counter = counters[outcome] = (f"agent_{name}_calls_total",
+                                               tuple(sorted(labels.items())) + (("outcome", outcome),))
+            self._counters[counter] = self._counters.get(counter, 0) + 1
+            if seconds >= RECENT_MIN_SECONDS or outcome != OK:
+                self.recent.append((time.time(), name, labels, seconds, outcome))
+
+    def observe(self, metric: str, value: float, **labels):
+        """Add a value to a histogram."""
+        key = (metric, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def inc(self, metric: str, amount: float = 1, **labels):
+        """Add amount to a counter."""
+        key = (metric, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def histograms(self, metric: str) -> dict:
+        """{labels: (count, mean, p50, p95, max)} for one histogram metric."""
+        with self._lock:
+            return {
+                labels: (h.count, h.mean, h.quantile(0.5), h.quantile(0.95), h.max)
+                for (name, labels), h in self._histograms.items() if name == metric
+            }
+
+    def counters(self, metric: str) -> dict:
+        """{labels: value} for one counter metric."""
+        with self._lock:
+            return {labels: value for (name, labels), value in self._counters.items() if name == metric}
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._spans.clear()
+            self.recent.clear()
+
+    def to_prometheus(self) -> str:
+        """Every metric in the Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            histograms = {key: (list(h.counts), h.sum, h.count) for key, h in self._histograms.items()}
+            counters = dict(self._counters)
+        lines = []
+        for name in sorted({name for name, _ in histograms}):
+            lines += [f"# HELP {name} {HELP.get(name, name)}", f"# TYPE {name} histogram"]
+            for (metric, labels), (counts, total, count) in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, n in zip(BUCKETS + ("+Inf",), counts):
+                    cumulative += n
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', str(bound)),))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {total:.9g}")
+                lines.append(f"{name}_count{_labels(labels)} {count}")
+        for name in sorted({name for name, _ in counters}):
+            lines += [f"# HELP {name} {HELP.get(name, name)}", f"# TYPE {name} counter"]
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in labels)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+
+METRICS = MetricsRegistry()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        payload = METRICS.to_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_exporter = {"url": None, "tried": False}
+_exporter_lock = threading.Lock()
+
+
+def start_exporter(port: int = None, host: str = "127.0.0.1"):
+    """Serve /metrics on port (default: AGENT_METRICS_PORT) once per process; return its URL or None.
+
+    Nothing is started when no port is configured. A port already in use is
+    logged once rather than retried on every rerun.
+    """
+    with _exporter_lock:
+        if _exporter["tried"]:
+            return _exporter["url"]
+        if port is None:
+            port = os.environ.get("AGENT_METRICS_PORT", "")
+        if port == "":
+            return None
+        _exporter["tried"] = True
+        try:
+            server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+        except (OSError, ValueError) as e:
+            logger.warning("metrics exporter not started on %s:%s: %s", host, port, e)
+            return None
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="metrics-exporter", daemon=True).start()
+        _exporter["url"] = f"http://{host}:{server.server_address[1]}/metrics"
+        logger.info("metrics exporter listening on %s", _exporter["url"])
+        return _exporter["url"]
@@ -0,0 +1,98 @@
+"""Sidebar panel showing the in-process metrics.
+
+Per-tool call counts, failures and latency percentiles, routing time by
+level and cache hit or miss, and LLM latency, time-to-first-token and token
+counts per model, all read from `METRICS`, plus each upstream's circuit
+state and adaptive timeout. The panel also starts the Prometheus exporter
+when AGENT_METRICS_PORT is set and shows its URL.
+"""
+from collections import defaultdict
+
+import streamlit as st
+
+from circuit_breaker import BREAKERS, OPEN
+from metrics import METRICS, start_exporter
+
+
+def _duration(seconds: float) -> str:
+    if seconds < 0.001:
+        return f"{seconds * 1e6:.0f} µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:.1f} ms"
+    return f"{seconds:.2f} s"
+
+
+def _outcomes(metric: str, key: str) -> dict:
+    """{label value: {outcome: count}} from a calls counter."""
+    totals = defaultdict(lambda: defaultdict(int))
+    for labels, value in METRICS.counters(metric).items():
+        labels = dict(labels)
+        totals[labels[key]][labels["outcome"]] += value
+    return totals
+
+
+def _table(header: tuple, rows: list) -> str:
+    lines = ["| " + " | ".join(header) + " |", "|" + "---|" * len(header)]
+    lines += ["| " + " | ".join(str(cell) for cell in row) + " |" for row in rows]
+    return "\n".join(lines)
+
+
+def render_metrics_panel():
+    """Draw the metrics expander (in the sidebar when called inside `with st.sidebar`)."""
+    url = start_exporter()
+    with st.expander("📈 Performance"):
+        tools = METRICS.histograms("agent_tool_seconds")
+        routes = METRICS.histograms("agent_route_seconds")
+        llm = METRICS.histograms("agent_llm_seconds")
+        if not (tools or routes or llm):
+            st.caption("No calls recorded yet in this process")
+
+        if tools:
+            outcomes = _outcomes("agent_tool_calls_total", "tool")
+            deadline = {dict(labels)["tool"]: n for labels, n in METRICS.counters("agent_intent_timeouts_total").items()}
+            rows = []
+            for labels, (count, _, p50, p95, _) in sorted(tools.items(), key=lambda item: -item[1][0]):
+                tool = dict(labels)["tool"]
+                rows.append((tool, count, outcomes[tool]["error"], outcomes[tool]["timeout"] + deadline.get(tool, 0),
+                             _duration(p50), _duration(p95)))
+            st.markdown("**Tools**\n\n" + _table(("Tool", "Calls", "Errors", "Timeouts", "p50", "p95"), rows))
+
+        upstreams = BREAKERS.snapshot()
+        if upstreams:
+            rows = []
+            for endpoint, b in upstreams.items():
+                state = f"🔴 open, retry in {b['retry_in']:.0f}s" if b["state"] == OPEN else b["state"].replace("_", "-")
+                rows.append((endpoint.split("://", 1)[-1], state, b["failures"],
+                             _duration(b["p99"]) if b["p99"] is not None else "–"))
+            st.markdown("**Upstreams**\n\n" + _table(("Host", "Circuit", "Failures", "p99"), rows))
+
+        if routes:
+            rows = [(dict(labels)["level"], dict(labels)["cache"], count, _duration(p50), _duration(p95))
+                    for labels, (count, _, p50, p95, _) in sorted(routes.items())]
+            st.markdown("**Routing**\n\n" + _table(("Level", "Cache", "Queries", "p50", "p95"), rows))
+
+        if llm:
+            outcomes = _outcomes("agent_llm_calls_total", "model")
+            ttft = {dict(labels)["model"]: p50 for labels, (_, _, p50, _, _) in
+                    METRICS.histograms("agent_llm_ttft_seconds").items()}
+            tokens = defaultdict(dict)
+            for labels, value in METRICS.counters("agent_llm_tokens_total").items():
+                labels = dict(labels)
+                tokens[labels["model"]][labels["kind"]] = value
+            rows = []
+            for labels, (count, _, p50, p95, _) in sorted(llm.items()):
+                model = dict(labels)["model"]
+                failed = outcomes[model]["error"] + outcomes[model]["timeout"]
+                first = _duration(ttft[model]) if model in ttft else "n/a"
+                rows.append((model, count, failed, first, _duration(p50), _duration(p95),
+                             f"{tokens[model].get('prompt', 0):,.0f} / {tokens[model].get('completion', 0):,.0f}"))
+            st.markdown("**LLM**\n\n" + _table(
+                ("Model", "Calls", "Failed", "TTFT p50", "p50", "p95", "Tokens in / out"), rows))
+
+        slowest = sorted(METRICS.recent, key=lambda span: -span[3])[:3]
+        if slowest:
+            st.caption("Slowest recent: " + "; ".join(
+                f"{name} {' '.join(str(v) for v in labels.values())} {_duration(seconds)}"
+                for _, name, labels, seconds, _ in slowest))
+        if url:
+            st.caption(f"Prometheus metrics: {url}")
@@ -0,0 +1,220 @@
+"""Latency-aware model choice for the LLM fallback.
+
+Every fallback question used to go to the model picked in the sidebar
+(llama-3.3-70b-versatile by default) with max_tokens=1024, so "what does
+HTTP stand for" waited on the 70B model as long as a request for an essay.
+With the model set to "auto", `MODEL_ROUTER` instead:
+
+- classifies the question as simple, moderate or complex from its wording,
+  length and the conversation sent with it;
+- estimates each model's answer time for that class from the
+  time-to-first-token and generation speed of its streamed answers in
+  `METRICS` (published Groq speeds stand in until a model has streamed a
+  few answers; a non-streamed answer cannot be split into the two);
+- prefers models that fit the latency target, then those capable enough for
+  the class, then the fastest, and caps max_tokens at what the model can
+  generate within the target;
+- tries the plan in order. Each model has its own circuit breaker and a
+  timeout derived from its estimate, so a slow or failing model hands the
+  question to the next one. Only timeouts, connection errors and 5xx answers
+  count against a model's breaker, which every user of the process shares.
+  Other 4xx answers (a retired model, a rate limit, a context too long for
+  that model) skip to the next model without tripping it, and a rejected
+  API key is raised to its caller at once.
+"""
+import itertools
+import math
+import re
+import time
+
+from circuit_breaker import BREAKERS, OPEN, CircuitOpenError
+from context_packer import count_tokens, estimate_tokens
+from llm_stream import log_failure
+from metrics import METRICS
+
+
+AUTO_MODEL = "auto"
+
+DEFAULT_LATENCY_TARGET = 3.0
+
+SIMPLE, MODERATE, COMPLEX = "simple", "moderate", "complex"
+
+# model: (capability 1-3, time to first token in s, output tokens per second) before any calls are observed.
+# Groq has retired mixtral-8x7b-32768 and llama-3.1-70b-versatile, so they are not planned.
+MODELS = {
+    "llama-3.3-70b-versatile": (3, 0.40, 275.0),
+    "llama-3.1-8b-instant": (1, 0.20, 750.0),
+}
+
+# Per class: capability needed, typical answer length in tokens, and the max_tokens cap
+REQUIRED_CAPABILITY = {SIMPLE: 1, MODERATE: 2, COMPLEX: 3}
+EXPECTED_TOKENS = {SIMPLE: 80, MODERATE: 250, COMPLEX: 600}
+MAX_TOKENS = {SIMPLE: 256, MODERATE: 512, COMPLEX: 1024}
+
+# Never cap an answer below this, whatever the latency target
+MIN_TOKENS = 128
+
+# Observed calls needed before a model's own timings replace its priors
+MIN_OBSERVED = 5
+
+# Per-attempt timeout: this multiple of the estimate, at least MIN_TIMEOUT seconds
+TIMEOUT_MULTIPLIER = 3.0
+MIN_TIMEOUT = 2.0
+
+# Models tried per question, the chosen one included
+MAX_ATTEMPTS = 3
+
+# Breaker key prefix; the metrics panel lists them with the other upstreams
+ENDPOINT = "groq://"
+
+# Answers that reject the API key itself, so every other model would fail the same way
+KEY_ERRORS = frozenset({401, 403})
+
+# Question tokens above which a question counts as moderate / complex
+SIMPLE_QUERY_TOKENS = 20
+COMPLEX_QUERY_TOKENS = 80
+
+# Earlier conversation (tokens) that makes a short question at least moderate
+CONTEXT_TOKENS = 600
+
+_COMPLEX_RE = re.compile(
+    r"```|\b(?:code|function|implement\w*|debug\w*|algorithm\w*|program\w*|script|refactor\w*|prove|derive"
+    r"|step[- ]by[- ]step|in detail|detailed|essay|design|architecture|compare|trade-?offs?|pros and cons)\b",
+    re.IGNORECASE)
+_MODERATE_RE = re.compile(
+    r"\b(?:explain\w*|why|how (?:does|do|did|can|could|would|to)|describe|difference|summari[sz]e|list"
+    r"|examples?|advice|recommend\w*|suggest\w*)\b",
+    re.IGNORECASE)
+
+
+def classify(messages: list) -> str:
+    """Expected complexity of the last message, given the packed conversation before it."""
+    query = messages[-1]["content"]
+    tokens = estimate_tokens(query)
+    if tokens > COMPLEX_QUERY_TOKENS or _COMPLEX_RE.search(query):
+        return COMPLEX
+    if tokens > SIMPLE_QUERY_TOKENS or _MODERATE_RE.search(query) or count_tokens(messages[:-1]) > CONTEXT_TOKENS:
+        return MODERATE
+    return SIMPLE
+
+
+def upstream_fault(error: BaseException) -> bool:
+    """True when error says the model's service is unhealthy: a timeout, a connection error or a 5xx."""
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status >= 500
+    name = type(error).__name__.lower()
+    return isinstance(error, (TimeoutError, ConnectionError)) or "timeout" in name or "connection" in name
+
+
+def model_error(error: BaseException) -> bool:
+    """True for a 4xx about this model or this request to it (not found, retired, rate limited, too long)."""
+    status = getattr(error, "status_code", None)
+    return isinstance(status, int) and 400 <= status < 500 and status not in KEY_ERRORS
+
+
+def prime(chunks):
+    """Wait for a stream's first chunk, so a model that never starts answering fails before the stream is shown."""
+    chunks = iter(chunks)
+    try:
+        first = next(chunks)
+    except StopIteration:
+        return iter(())
+    return itertools.chain((first,), chunks)
+
+
+class ModelRouter:
+    """Plans which models answer a fallback question, and with what limits."""
+
+    def __init__(self, models: dict = None, max_attempts: int = MAX_ATTEMPTS):
+        self.models = models or MODELS
+        self.max_attempts = max_attempts
+
+    def speeds(self) -> dict:
+        """{model: (time to first token, output tokens per second)}, observed where enough calls streamed."""
+        ttft = {dict(labels)["model"]: h for labels, h in METRICS.histograms("agent_llm_ttft_seconds").items()}
+        generation = {dict(labels)["model"]: h
+                      for labels, h in METRICS.histograms("agent_llm_generation_seconds").items()}
+        tokens = {dict(labels)["model"]: value
+                  for labels, value in METRICS.counters("agent_llm_streamed_tokens_total").items()}
+        speeds = {}
+        for model, (_, prior_ttft, prior_rate) in self.models.items():
+            first, rate = prior_ttft, prior_rate
+            observed = ttft.get(model)
+            if observed and observed[0] >= MIN_OBSERVED:
+                first = observed[2]
+                generated = generation.get(model)
+                # Total generation time of the streamed calls, over the tokens they produced
+                seconds = generated[0] * generated[1] if generated else 0
+                if seconds > 0 and tokens.get(model):
+                    rate = tokens[model] / seconds
+            speeds[model] = (first, rate)
+        return speeds
+
+    def plan(self, messages: list, latency_target: float = DEFAULT_LATENCY_TARGET, stream: bool = False) -> list:
+        """Models to try for messages, best first: [{"model", "max_tokens", "timeout", "complexity"}]."""
+        complexity = classify(messages)
+        required = REQUIRED_CAPABILITY[complexity]
+        speeds = self.speeds()
+        estimates = {model: first + EXPECTED_TOKENS[complexity] / rate for model, (first, rate) in speeds.items()}
+        healthy = [m for m in self.models if BREAKERS.get(ENDPOINT + m).state != OPEN] or list(self.models)
+
+        def preference(model):
+            fits = estimates[model] <= latency_target
+            capable = self.models[model][0] >= required
+            return not fits, not (fits and capable), estimates[model]
+
+        plan = []
+        for model in sorted(healthy, key=preference)[:self.max_attempts]:
+            first, rate = speeds[model]
+            budget = int((latency_target - first) * rate) // 64 * 64
+            max_tokens = min(MAX_TOKENS[complexity], max(MIN_TOKENS, budget))
+            # A stream only has to start in time; a whole response has to finish
+            expected = first if stream else first + max_tokens / rate
+            plan.append({"model": model, "max_tokens": max_tokens, "complexity": complexity,
+                         "timeout": float(math.ceil(max(MIN_TIMEOUT, expected * TIMEOUT_MULTIPLIER)))})
+        METRICS.inc("agent_llm_auto_choices_total", model=plan[0]["model"], complexity=complexity)
+        return plan
+
+    def complete(self, plan: list, ask, stream: bool = False):
+        """Call ask(choice) down the plan until a model answers; returns (choice, start, response).
+
+        A stream counts as answered once its first chunk arrives. Every
+        failure is logged against its model. Upstream faults (see
+        upstream_fault) count against the model's breaker and move on to the
+        next model, as do model errors (see model_error), which leave the
+        breaker as it was. The last error is raised when the whole plan
+        fails. Anything else, such as a rejected key, is raised at once
+        without touching the breaker.
+        """
+        error = None
+        for choice in plan:
+            breaker = BREAKERS.get(ENDPOINT + choice["model"])
+            try:
+                breaker.allow()
+            except CircuitOpenError as e:
+                error = e
+                continue
+            start = time.perf_counter()
+            try:
+                response = prime(ask(choice)) if stream else ask(choice)
+            except Exception as e:
+                log_failure(choice["model"], e)
+                if upstream_fault(e):
+                    breaker.failure()
+                else:
+                    breaker.release()
+                    if not model_error(e):
+                        raise
+                METRICS.inc("agent_llm_fallbacks_total", model=choice["model"])
+                error = e
+                continue
+            except BaseException:
+                breaker.release()
+                raise
+            breaker.success(time.perf_counter() - start)
+            return choice, start, response
+        raise error
+
+
+MODEL_ROUTER = ModelRouter()
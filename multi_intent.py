@@ -0,0 +1,121 @@
+"""Split compound queries into tool intents and run the I/O-bound ones concurrently.
+
+"weather in Tokyo and bitcoin price and capital of France" used to go to
+whichever branch matched first. Here the query is split on conjunctions, each
+piece is routed on its own, and the network tools (weather, crypto, country,
+Wikipedia) run side by side on a shared thread pool under one deadline, so the
+answer takes about as long as the slowest tool instead of the sum of them.
+
+A query only counts as compound when every piece routes to a specific tool
+on its own. Single questions with lists in them ("count letters and digits in
+abc123", "gcd of 12 and 18") stay whole. So do quoted text and commas
+that are not followed by a space. A query also stays whole when one local
+tool already answers it as a whole, as with "count the dots and commas".
+"""
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from metrics import METRICS
+from tools import TOOLS, TOOLS_BY_TITLE
+
+
+# Per-request deadline in seconds for all intents together
+DEFAULT_DEADLINE = 10.0
+
+_SPLIT_RE = re.compile(r'\s*(?:;|,(?=\s)|\b(?:and then|and also|and|also|then)\b)\s*', re.IGNORECASE)
+
+# Quoted text is a payload, never a list of intents
+_QUOTED_RE = re.compile(r'"[^"]*"|(?<!\w)\'[^\']*\'(?!\w)')
+
+# Pieces that carry no request of their own ("hey, weather in Oslo and ...")
+_FILLER_RE = re.compile(r'(?:hey|hi|hello|ok|okay|please|so|well|thanks|thank you)', re.IGNORECASE)
+
+_EXECUTOR = ThreadPoolExecutor(max_workers=16, thread_name_prefix="tool-intent")
+
+
+def split_intents(query: str) -> list:
+    """Split a query on 'and', 'also', 'then', semicolons and commas, outside quoted text."""
+    quoted = [m.span() for m in _QUOTED_RE.finditer(query)]
+    parts, start = [], 0
+    for match in _SPLIT_RE.finditer(query):
+        if any(a <= match.start() < b for a, b in quoted):
+            continue
+        parts.append(query[start:match.start()])
+        start = match.end()
+    parts.append(query[start:])
+    return [part.strip(' ?.!') for part in parts if part.strip(' ?.!') and not _FILLER_RE.fullmatch(part.strip(' ?.!'))]
+
+
+def _local(tool: str) -> bool:
+    spec = TOOLS.get(tool) or TOOLS_BY_TITLE.get(tool)
+    return spec is not None and not spec.io_bound
+
+
+def route_intents(query: str, route_fn) -> list:
+    """Return [(segment, route), ...] when the query holds two or more tool intents, else None.
+
+    Every segment must route to a specific tool (not None, and not a route
+    marked "fallback"), or the query is a single intent and the caller routes
+    it as before. It is also a single intent when the whole query routes to a
+    local tool and every segment would go to that same tool with other params,
+    so the whole-query route already combines them ("count the dots and
+    commas"). Network lookups of several things ("weather in Oslo and weather
+    in Lima") still split.
+    """
+    segments = split_intents(query)
+    if len(segments) < 2:
+        return None
+    routed = []
+    for segment in segments:
+        route = route_fn(segment)
+        if route is None or route.get("fallback"):
+            return None
+        routed.append((segment, route))
+    whole = route_fn(query)
+    if whole is not None and _local(whole["tool"]) and all(
+            route["tool"] == whole["tool"] and route["params"] != whole["params"] for _, route in routed):
+        return None
+    return routed
+
+
+def run_intents(tasks: list, concurrent_tools, deadline: float = DEFAULT_DEADLINE) -> list:
+    """Run [(label, tool_name, function, params), ...] and return [(label, result), ...] in order.
+
+    Tools named in concurrent_tools are submitted to the shared pool; the rest
+    (interpreter, calculator, clock) run inline because they are CPU-bound or
+    redirect stdout. Anything unfinished when the deadline expires is reported
+    as timed out.
+    """
+    start = time.monotonic()
+    futures = {}
+    results = {}
+    for i, (label, tool, function, params) in enumerate(tasks):
+        if tool in concurrent_tools:
+            futures[i] = _EXECUTOR.submit(function, **params)
+
+    for i, (label, tool, function, params) in enumerate(tasks):
+        if i not in futures:
+            try:
+                results[i] = function(**params)
+            except Exception as e:
+                results[i] = f"Error: {str(e)}"
+
+    wait(futures.values(), timeout=max(deadline - (time.monotonic() - start), 0))
+    for i, future in futures.items():
+        if not future.done():
+            future.cancel()
+            results[i] = f"⏱️ Timed out after {deadline:.0f}s"
+            tool = tasks[i][1]
+            METRICS.inc("agent_intent_timeouts_total", tool=TOOLS_BY_TITLE[tool].name if tool in TOOLS_BY_TITLE else tool)
+        elif future.exception() is not None:
+            results[i] = f"Error: {str(future.exception())}"
+        else:
+            results[i] = future.result()
+
+    return [(task[0], results[i]) for i, task in enumerate(tasks)]
+
+
+def merge_results(results: list) -> str:
+    """Combine per-intent results into one markdown answer."""
+    return "\n\n".join(f"**{label}**\n\n{result}" for label, result in results)
@@ -0,0 +1,86 @@
+"""Process-wide LRU cache of routing decisions.
+
+The same prompts arrive over and over, so the routers cache what they decided
+(tool name, params and any generated code) under a normalized form of the
+query. Only plain data is cached: the tool functions are re-attached by each
+script on every lookup, because Streamlit redefines them on every rerun.
+"""
+import copy
+import re
+import threading
+from collections import OrderedDict
+
+from metrics import METRICS
+
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_TRAILING_PUNCT = '?.!,;: '
+
+
+def normalize_query(query: str) -> str:
+    """Case-fold, collapse whitespace and strip trailing punctuation."""
+    return _WHITESPACE_RE.sub(' ', query.casefold()).strip().rstrip(_TRAILING_PUNCT)
+
+
+class RouteCache:
+    """Size-bounded, thread-safe LRU map of (namespace, normalized query) to routes."""
+
+    def __init__(self, maxsize: int = 2048):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def route(self, namespace: str, query: str, route_fn):
+        """Return the cached route for query, calling route_fn(query) on a miss.
+
+        A ``None`` result (no tool matched) is cached like any other route.
+        Routes carrying ``"cacheable": False`` (templates that embed the raw
+        query text) are returned but never stored.
+        """
+        # Timed per level ("level_2:<fingerprint>" -> "level_2") and by cache hit or miss
+        with METRICS.span("route", level=namespace.split(":", 1)[0], cache="miss") as span:
+            key = (namespace, normalize_query(query))
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    span.labels["cache"] = "hit"
+                    return copy.deepcopy(self._entries[key])
+                self.misses += 1
+
+            result = route_fn(query)
+            if result is not None and not result.get("cacheable", True):
+                return result
+
+            with self._lock:
+                self._entries[key] = copy.deepcopy(result)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+            return result
+
+    def invalidate(self, namespace: str = None):
+        """Drop every entry, or only those of one namespace (e.g. after a table change)."""
+        with self._lock:
+            if namespace is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == namespace]:
+                    del self._entries[key]
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+ROUTE_CACHE = RouteCache()
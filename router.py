@@ -0,0 +1,206 @@
+"""Keyword routing engine shared by the three agent levels.
+
+Every level's trigger keywords are compiled once, when this module is first
+imported, into a single Aho-Corasick automaton. A query is then scanned in one
+pass and the routers only test the resulting set of hit groups, so routing cost
+stays flat as the keyword tables grow. Streamlit re-executes the app scripts on
+every rerun, which is why the tables live here and not in the scripts.
+"""
+import hashlib
+import re
+from collections import deque
+
+from crypto_prices import SUPPORTED_COINS
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton mapping keywords to the routing groups they belong to."""
+
+    def __init__(self, groups: dict):
+        self.groups = {name: tuple(keywords) for name, keywords in groups.items()}
+        # Changes whenever the tables do, so caches can key on it
+        self.fingerprint = hashlib.sha1(repr(sorted(self.groups.items())).encode()).hexdigest()[:12]
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [set()]
+
+        # Build the keyword trie
+        for name, keywords in self.groups.items():
+            for keyword in keywords:
+                state = 0
+                for ch in keyword:
+                    nxt = self._goto[state].get(ch)
+                    if nxt is None:
+                        nxt = len(self._goto)
+                        self._goto.append({})
+                        self._fail.append(0)
+                        self._out.append(set())
+                        self._goto[state][ch] = nxt
+                    state = nxt
+                self._out[state].add(name)
+
+        # Breadth-first pass to wire failure links and merge outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] |= self._out[self._fail[nxt]]
+
+        self._out = [frozenset(out) for out in self._out]
+
+    def scan(self, text: str) -> frozenset:
+        """Return the names of every group with a keyword occurring in text."""
+        goto, fail, out = self._goto, self._fail, self._out
+        hits = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                hits |= out[state]
+        return frozenset(hits)
+
+
+# ============ SHARED PATTERNS ============
+NUMBER_RE = re.compile(r'(\d+)')
+NUMBERS_RE = re.compile(r'\d+')
+CALC_TRIGGER_RE = re.compile(r'\d+\s*[\+\-\*\/\^x×÷]\s*\d+|calculate|compute')
+CALC_TRIGGER_WHAT_IS_RE = re.compile(r'\d+\s*[\+\-\*\/\^x×÷]\s*\d+|calculate|compute|what is \d+')
+FACTORIAL_OF_RE = re.compile(r'factorial of (\d+)')
+PALINDROME_TEXT_RE = re.compile(r'(?:check|is|palindrome)\s+["\']?([a-zA-Z0-9\s]+)["\']?')
+REVERSE_TEXT_RE = re.compile(r'reverse\s+["\']?([^"\']+)["\']?', re.IGNORECASE)
+IS_PRIME_RE = re.compile(r'\bis\s+\d+\s+(?:a\s+)?prime\b')
+
+# Any coin name or ticker symbol also sends a query to the crypto branch
+COIN_ALIASES = [alias for aliases in SUPPORTED_COINS.values() for alias in aliases]
+
+
+# ============ LEVEL 1 / LEVEL 2 TABLES ============
+_LEVEL_1_GROUPS = {
+    'crypto': ['crypto', 'price of'] + COIN_ALIASES,
+    'country': ['country', 'capital of', 'population of'],
+    'weather': ['weather'],
+    'time': ['time', 'date'],
+    'wiki': ['who is', 'what is', 'tell me about', 'wikipedia', 'information about'],
+}
+
+_LEVEL_2_GROUPS = dict(_LEVEL_1_GROUPS)
+_LEVEL_2_GROUPS.update({
+    'python': ['python code', 'write python', 'execute python', 'factorial', 'fibonacci',
+               'python script', 'for loop', 'while loop'],
+    'factorial': ['factorial'],
+    'fibonacci': ['fibonacci'],
+    'even': ['even'],
+    'numbers': ['numbers'],
+})
+
+
+# ============ LEVEL 3 TABLES ============
+_LEVEL_3_PYTHON_KEYWORDS = [
+    # General Python
+    'python', 'code', 'script', 'program', 'execute', 'run', 'compile',
+    'coding', 'programming', 'write code', 'run code',
+
+    # Common algorithms
+    'factorial', 'fibonacci', 'prime', 'palindrome', 'armstrong',
+    'perfect number', 'lcm', 'gcd', 'hcf',
+
+    # Math operations
+    'square', 'cube', 'power', 'root', 'sqrt', 'exponent',
+    'sum', 'average', 'mean', 'median', 'mode', 'total',
+    'multiply', 'divide', 'add', 'subtract',
+
+    # Number operations
+    'even', 'odd', 'positive', 'negative', 'natural', 'whole',
+    'factor', 'multiple', 'divisor', 'remainder', 'modulo',
+
+    # Sequences
+    'sequence', 'series', 'pattern', 'generate', 'create',
+
+    # Counting & Finding
+    'count', 'how many', 'number of', 'total of', 'find',
+    'search', 'locate', 'detect', 'identify',
+
+    # String operations
+    'string', 'text', 'character', 'char', 'letter', 'word',
+    'sentence', 'reverse', 'uppercase', 'lowercase', 'capitalize',
+    'replace', 'remove', 'extract', 'parse',
+
+    # Special characters
+    'dot', 'dots', 'period', 'comma', 'semicolon', 'colon',
+    'space', 'digit', 'number', 'symbol', 'special character',
+
+    # Data structures
+    'list', 'array', 'dictionary', 'dict', 'tuple', 'set',
+    'collection', 'data structure',
+
+    # Control flow
+    'loop', 'for loop', 'while loop', 'if', 'else', 'elif',
+    'condition', 'iterate', 'iteration', 'function', 'def',
+
+    # Processing
+    'process', 'transform', 'convert', 'change', 'modify',
+    'format', 'filter', 'sort', 'order', 'arrange',
+
+    # Analysis
+    'analyze', 'calculate', 'compute', 'determine', 'check',
+    'verify', 'test', 'validate',
+]
+
+# Character counter targets, in the order they are reported
+COUNT_TARGETS = [
+    ('count:dots', ('dots (.)', '.'), ['dot', 'period', '.']),
+    ('count:commas', ('commas (,)', ','), ['comma', ',']),
+    ('count:spaces', ('spaces', ' '), ['space', 'spaces']),
+    ('count:letters', ('letters', 'alpha'), ['letter', 'letters', 'alphabet']),
+    ('count:digits', ('digits', 'digit'), ['digit', 'digits', 'number']),
+    ('count:words', ('words', 'word'), ['word', 'words']),
+    ('count:vowels', ('vowels', 'vowel'), ['vowel', 'vowels']),
+    ('count:consonants', ('consonants', 'consonant'), ['consonant', 'consonants']),
+    ('count:upper', ('uppercase letters', 'upper'), ['uppercase', 'capital']),
+    ('count:lower', ('lowercase letters', 'lower'), ['lowercase', 'small']),
+    ('count:chars', ('characters', 'char'), ['character', 'char']),
+]
+
+_LEVEL_3_GROUPS = {
+    'python': _LEVEL_3_PYTHON_KEYWORDS,
+    'count': ['count', 'how many', 'number of', 'total'],
+    'count_word': ['count'],
+    'factorial': ['factorial'],
+    'fibonacci': ['fibonacci'],
+    'prime': ['prime'],
+    'gcd': ['gcd', 'hcf', 'greatest common divisor', 'highest common factor'],
+    'lcm': ['lcm', 'least common multiple', 'lowest common multiple'],
+    'perfect': ['perfect number'],
+    'armstrong': ['armstrong'],
+    'palindrome': ['palindrome'],
+    'even': ['even'],
+    'odd': ['odd'],
+    'number': ['number', 'numbers'],
+    'stats': ['sum', 'average', 'mean', 'total'],
+    'power': ['square', 'cube', 'power', 'exponent'],
+    'square': ['square'],
+    'cube': ['cube'],
+    'reverse': ['reverse'],
+    'weather': ['weather'],
+    'crypto': ['crypto', 'price', 'cryptocurrency'] + COIN_ALIASES,
+    'country': ['country', 'capital of', 'population of'],
+    'time': ['time', 'date', 'today', 'now'],
+}
+_LEVEL_3_GROUPS.update({group: keywords for group, _, keywords in COUNT_TARGETS})
+
+
+LEVEL_1_ROUTER = KeywordAutomaton(_LEVEL_1_GROUPS)
+LEVEL_2_ROUTER = KeywordAutomaton(_LEVEL_2_GROUPS)
+LEVEL_3_ROUTER = KeywordAutomaton(_LEVEL_3_GROUPS)
+
+
+def count_targets(hits: frozenset) -> list:
+    """Return the character counter targets selected by the hit groups."""
+    return [target for group, target, _ in COUNT_TARGETS if group in hits]
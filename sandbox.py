@@ -0,0 +1,323 @@
+"""Pre-warmed subprocess pool for the Python interpreter tool.
+
+`python_interpreter` used to `exec` snippets inside the Streamlit server, so
+`range(10**9)` or a huge factorial blocked a server thread and could exhaust
+memory for every user. Snippets now run in a pool of worker processes that
+already have the safe builtins loaded. Each run gets a wall-clock timeout, a
+CPU-time and address-space limit and an output cap, and workers are recycled
+after a number of runs or whenever one crashes or is killed.
+
+Snippets are compiled once per worker and kept in a small cache keyed by the
+hash of their source. Template snippets read their parameters from injected
+globals, so one compiled object serves every value, and their output can be
+cached in the parent keyed by source hash and inputs.
+"""
+import atexit
+import builtins
+import hashlib
+import io
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+import threading
+from collections import OrderedDict
+
+try:
+    import resource
+except ImportError:  # Windows: no rlimits, the wall-clock timeout still applies
+    resource = None
+
+
+SAFE_BUILTIN_NAMES = (
+    'print', 'range', 'len', 'sum', 'max', 'min', 'abs', 'round',
+    'sorted', 'list', 'dict', 'set', 'str', 'int', 'float', 'bool',
+    'enumerate', 'zip', 'map', 'filter',
+)
+
+DEFAULT_TIMEOUT = 5.0
+DEFAULT_CPU_SECONDS = 5
+DEFAULT_MEMORY_MB = 256
+DEFAULT_MAX_OUTPUT = 64_000
+DEFAULT_CODE_CACHE_SIZE = 256
+DEFAULT_OUTPUT_CACHE_SIZE = 1024
+DEFAULT_OUTPUT_CACHE_CHARS = 4_000_000
+
+
+class _OutputLimitExceeded(Exception):
+    pass
+
+
+class _BoundedWriter(io.StringIO):
+    """stdout replacement that stops the snippet once it prints too much."""
+
+    def __init__(self, limit: int):
+        super().__init__()
+        self.limit = limit
+
+    def write(self, s):
+        remaining = self.limit - self.tell()
+        if len(s) > remaining:
+            super().write(s[:max(remaining, 0)])
+            raise _OutputLimitExceeded()
+        return super().write(s)
+
+
+def _current_vm_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+def source_digest(code: str) -> str:
+    """Content address of a snippet."""
+    return hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+
+def _worker_main(conn, cpu_seconds: int, memory_mb: int, max_output: int, code_cache_size: int):
+    """Worker loop: receive (source, inputs), run it with safe builtins, send back
+    (output, error, truncated, compile_hit)."""
+    safe_builtins = {name: getattr(builtins, name) for name in SAFE_BUILTIN_NAMES}
+    compiled = OrderedDict()
+    if resource is not None:
+        # Headroom on top of what the warm interpreter already maps
+        limit = _current_vm_bytes() + memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    # Let the parent handle Ctrl+C
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    while True:
+        try:
+            code, inputs = conn.recv()
+        except (EOFError, OSError):
+            return
+        if resource is not None and cpu_seconds:
+            # RLIMIT_CPU is cumulative, so move the soft limit past what earlier runs used
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            soft = int(usage.ru_utime + usage.ru_stime) + cpu_seconds
+            _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+            resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+        digest = source_digest(code)
+        code_obj = compiled.get(digest)
+        compile_hit = code_obj is not None
+        if compile_hit:
+            compiled.move_to_end(digest)
+        else:
+            try:
+                code_obj = compile(code, "<snippet>", "exec")
+            except (SyntaxError, ValueError) as e:
+                conn.send(("", str(e), False, False))
+                continue
+            compiled[digest] = code_obj
+            if len(compiled) > code_cache_size:
+                compiled.popitem(last=False)
+
+        out = _BoundedWriter(max_output)
+        error = None
+        truncated = False
+        old_stdout = sys.stdout
+        sys.stdout = out
+        try:
+            exec(code_obj, {"__builtins__": dict(safe_builtins), **inputs}, {})
+        except _OutputLimitExceeded:
+            truncated = True
+        except MemoryError:
+            error = f"memory limit of {memory_mb} MB exceeded"
+        except Exception as e:
+            error = str(e)
+        finally:
+            sys.stdout = old_stdout
+        conn.send((out.getvalue(), error, truncated, compile_hit))
+
+
+class _Worker:
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.runs = 0
+
+    def kill(self):
+        try:
+            self.conn.close()
+        except OSError:
+            pass
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=1)
+
+
+class InterpreterPool:
+    """Pool of warm worker processes executing snippets under per-run limits."""
+
+    def __init__(self, size: int = None, max_runs: int = 100, timeout: float = DEFAULT_TIMEOUT,
+                 cpu_seconds: int = DEFAULT_CPU_SECONDS, memory_mb: int = DEFAULT_MEMORY_MB,
+                 max_output: int = DEFAULT_MAX_OUTPUT, code_cache_size: int = DEFAULT_CODE_CACHE_SIZE,
+                 output_cache_size: int = DEFAULT_OUTPUT_CACHE_SIZE,
+                 output_cache_chars: int = DEFAULT_OUTPUT_CACHE_CHARS):
+        self.size = size or os.cpu_count() or 2
+        self.max_runs = max_runs
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.max_output = max_output
+        self.code_cache_size = code_cache_size
+        self.output_cache_size = output_cache_size
+        self.output_cache_chars = output_cache_chars
+        self.stats = {
+            "runs": 0, "timeouts": 0, "crashes": 0, "recycled": 0,
+            "compile_hits": 0, "compile_misses": 0, "output_hits": 0, "output_misses": 0,
+        }
+        self._outputs = OrderedDict()
+        self._output_chars = 0
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self._ctx = multiprocessing.get_context(method)
+        if method == "forkserver":
+            # Workers fork from a server that has already imported this module
+            self._ctx.set_forkserver_preload([__name__])
+        self._idle = queue.Queue()
+        self._workers = set()
+        self._lock = threading.Lock()
+        self._started = False
+
+    def _spawn(self) -> _Worker:
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.cpu_seconds, self.memory_mb, self.max_output, self.code_cache_size),
+            name="interpreter-worker",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        worker = _Worker(process, parent_conn)
+        with self._lock:
+            self._workers.add(worker)
+        return worker
+
+    def _retire(self, worker: _Worker, replace: bool = True):
+        worker.kill()
+        with self._lock:
+            self._workers.discard(worker)
+        if replace:
+            self._idle.put(self._spawn())
+
+    def start(self):
+        """Pre-warm the pool (called lazily on the first run)."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        for _ in range(self.size):
+            self._idle.put(self._spawn())
+
+    def shutdown(self):
+        with self._lock:
+            workers = list(self._workers)
+            self._workers.clear()
+        for worker in workers:
+            worker.kill()
+
+    def _count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _cached_output(self, key):
+        with self._lock:
+            result = self._outputs.get(key)
+            if result is None:
+                self.stats["output_misses"] += 1
+                return None
+            self._outputs.move_to_end(key)
+            self.stats["output_hits"] += 1
+            return result
+
+    def _store_output(self, key, result):
+        size = len(result[0])
+        if size > self.output_cache_chars:
+            return
+        with self._lock:
+            if key in self._outputs:
+                return
+            self._outputs[key] = result
+            self._output_chars += size
+            while len(self._outputs) > self.output_cache_size or self._output_chars > self.output_cache_chars:
+                _, evicted = self._outputs.popitem(last=False)
+                self._output_chars -= len(evicted[0])
+
+    def execute(self, code: str, inputs: dict = None, cache_output: bool = False):
+        """Run code in a worker and return (output, error, truncated).
+
+        inputs are injected as globals. With cache_output=True the result of a
+        successful run is cached by source hash and inputs, so only pass it for
+        deterministic snippets without side effects.
+        """
+        inputs = inputs or {}
+        key = None
+        if cache_output:
+            key = (source_digest(code), repr(sorted(inputs.items())))
+            cached = self._cached_output(key)
+            if cached is not None:
+                return cached
+
+        self.start()
+        try:
+            worker = self._idle.get(timeout=self.timeout * 2)
+        except queue.Empty:
+            return "", "interpreter is busy, try again", False
+
+        self._count("runs")
+        try:
+            worker.conn.send((code, inputs))
+            if not worker.conn.poll(self.timeout):
+                self._count("timeouts")
+                self._retire(worker)
+                return "", f"execution timed out after {self.timeout:g}s", False
+            output, error, truncated, compile_hit = worker.conn.recv()
+        except (EOFError, OSError, BrokenPipeError):
+            self._count("crashes")
+            worker.process.join(timeout=1)
+            exitcode = worker.process.exitcode
+            self._retire(worker)
+            if resource is not None and exitcode == -signal.SIGXCPU:
+                return "", f"CPU time limit of {self.cpu_seconds}s exceeded", False
+            return "", f"interpreter process crashed (exit code {exitcode})", False
+
+        worker.runs += 1
+        if worker.runs >= self.max_runs:
+            self._count("recycled")
+            self._retire(worker)
+        else:
+            self._idle.put(worker)
+
+        self._count("compile_hits" if compile_hit else "compile_misses")
+        result = (output, error, truncated)
+        if key is not None and error is None:
+            self._store_output(key, result)
+        return result
+
+    def cache_stats(self) -> dict:
+        """Hit rates of the per-worker compile caches and the output cache."""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["cached_outputs"] = len(self._outputs)
+        for kind in ("compile", "output"):
+            total = stats[f"{kind}_hits"] + stats[f"{kind}_misses"]
+            stats[f"{kind}_hit_rate"] = stats[f"{kind}_hits"] / total if total else 0.0
+        return stats
+
+    def run(self, code: str, inputs: dict = None, cache_output: bool = False) -> str:
+        """Run code and format the result the way the interpreter tool reports it."""
+        output, error, truncated = self.execute(code, inputs, cache_output)
+        if error:
+            return f"Error: {error}"
+        if truncated:
+            return f"{output}\n... output truncated at {self.max_output:,} characters"
+        return output if output else "Code executed successfully (no output)"
+
+
+INTERPRETER_POOL = InterpreterPool()
+atexit.register(INTERPRETER_POOL.shutdown)
@@ -0,0 +1,90 @@
+"""Tool functions shared by every level, with a registry of their metadata.
+
+The three scripts used to define the same tool functions and import every
+client library at startup. The tools now live in this package and are loaded
+on first use: `load(name)` imports the implementing module only when a tool
+is first needed, and heavy libraries (requests, wikipedia, LangChain,
+SQLAlchemy) are imported inside the functions that use them. Every loaded
+function is wrapped in a metrics span, so each call's latency and outcome
+are recorded whichever level or thread makes it.
+"""
+import functools
+import importlib
+
+from metrics import METRICS, outcome_of
+
+
+class Tool:
+    """Metadata for one tool; the function itself is imported on first use.
+
+    cacheable: the result for the same params can be reused.
+    idempotent: running it twice has no side effects.
+    latency: typical seconds per call, used for timeouts and scheduling.
+    io_bound: waits on the network, so it can run concurrently with others.
+    imports: heavy modules the tool imports the first time it runs.
+    """
+
+    def __init__(self, name: str, title: str, module: str, *, cacheable: bool, idempotent: bool,
+                 latency: float, io_bound: bool, imports: tuple = ()):
+        self.name = name
+        self.title = title
+        self.module = module
+        self.cacheable = cacheable
+        self.idempotent = idempotent
+        self.latency = latency
+        self.io_bound = io_bound
+        self.imports = imports
+        self._function = None
+
+    @property
+    def function(self):
+        if self._function is None:
+            self._function = _timed(self.name, getattr(importlib.import_module(self.module), self.name))
+        return self._function
+
+    def __repr__(self):
+        return f"Tool({self.name!r}, latency={self.latency}, io_bound={self.io_bound})"
+
+
+def _timed(name: str, function):
+    """Wrap a tool function so every call is recorded as an agent_tool span."""
+    @functools.wraps(function)
+    def timed(*args, **kwargs):
+        with METRICS.span("tool", tool=name) as span:
+            result = function(*args, **kwargs)
+            span.outcome = outcome_of(result)
+            return result
+    return timed
+
+
+TOOLS = {tool.name: tool for tool in [
+    Tool("python_interpreter", "Python Interpreter", "tools.compute",
+         cacheable=False, idempotent=True, latency=0.05, io_bound=False),
+    Tool("calculator", "Calculator", "tools.compute",
+         cacheable=True, idempotent=True, latency=0.001, io_bound=False),
+    Tool("number_theory", "Number Theory", "tools.compute",
+         cacheable=True, idempotent=True, latency=0.05, io_bound=False),
+    Tool("big_numbers", "Big Numbers", "tools.compute",
+         cacheable=True, idempotent=True, latency=0.05, io_bound=False),
+    Tool("text_statistics", "Text Statistics", "tools.compute",
+         cacheable=True, idempotent=True, latency=0.01, io_bound=False),
+    Tool("get_current_time", "Current Time", "tools.compute",
+         cacheable=False, idempotent=True, latency=0.0, io_bound=False),
+    Tool("get_weather", "Weather API", "tools.web",
+         cacheable=False, idempotent=True, latency=0.5, io_bound=True, imports=("requests",)),
+    Tool("get_crypto_price", "Crypto Price", "tools.web",
+         cacheable=False, idempotent=True, latency=0.3, io_bound=True, imports=("requests",)),
+    Tool("get_country_info", "Country Info", "tools.web",
+         cacheable=True, idempotent=True, latency=0.01, io_bound=True, imports=("requests",)),
+    Tool("search_wikipedia", "Wikipedia", "tools.web",
+         cacheable=True, idempotent=True, latency=1.0, io_bound=True,
+         imports=("requests", "sqlalchemy", "wikipedia", "langchain_community.tools")),
+]}
+
+TOOLS_BY_TITLE = {tool.title: tool for tool in TOOLS.values()}
+
+
+def load(name: str):
+    """Return the function of a tool by name or title, importing its module if needed."""
+    tool = TOOLS.get(name) or TOOLS_BY_TITLE[name]
+    return tool.function
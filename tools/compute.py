@@ -0,0 +1,68 @@
+"""Local tools: calculator, interpreter, number theory, big numbers, text statistics and clock."""
+from datetime import datetime
+
+from big_numbers import answer as big_numbers_answer
+from calc_engine import CALCULATOR
+from number_theory import answer as number_theory_answer
+from text_stats import analyze_stream, analyze_text, report as text_report
+
+
+def parse_numbers(value) -> list:
+    """Turn "3, 5, 7" from the approval form into [3, 5, 7]."""
+    if isinstance(value, str):
+        return [int(x) for x in value.replace(',', ' ').split()]
+    return list(value)
+
+
+def python_interpreter(code: str, inputs: dict = None, cache_output: bool = False) -> str:
+    """Execute Python code safely."""
+    try:
+        # Runs in a pre-warmed worker process with time, memory and output limits;
+        # the pool (and multiprocessing) is imported on the first run
+        from sandbox import INTERPRETER_POOL
+        return INTERPRETER_POOL.run(code, inputs, cache_output=cache_output)
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+
+def calculator(expression: str) -> str:
+    """Evaluate mathematical expressions."""
+    try:
+        # Shared engine: cached compiled expressions, bounded cost for huge powers
+        return CALCULATOR.evaluate(expression)
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+
+def number_theory(operation: str, numbers: str) -> str:
+    """Answer prime, GCD/LCM, perfect and Armstrong number questions."""
+    try:
+        return number_theory_answer(operation, parse_numbers(numbers))
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+
+def big_numbers(operation: str, numbers: str) -> str:
+    """Compute factorials, Fibonacci numbers and powers of any size."""
+    try:
+        return big_numbers_answer(operation, parse_numbers(numbers))
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+
+def text_statistics(text: str, count: str = "", document=None) -> str:
+    """Count characters, words and character classes of a text or a binary document stream."""
+    try:
+        requested = [name.strip() for name in count.split(',') if name.strip()]
+        if document is not None:
+            name = getattr(document, "name", "document")
+            return text_report(analyze_stream(document), requested, title=f"CHARACTER ANALYSIS: {name}")
+        return text_report(analyze_text(text), requested)
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+
+def get_current_time() -> str:
+    """Get current date and time."""
+    current = datetime.now()
+    return f"Current: {current.strftime('%A, %B %d, %Y at %H:%M:%S')}"
@@ -0,0 +1,121 @@
+"""Network tools: weather, crypto prices, country facts and Wikipedia."""
+from functools import lru_cache
+
+import requests
+
+from circuit_breaker import BREAKERS
+from country_index import COUNTRY_INDEX
+from crypto_prices import COIN_INDEX, PRICE_TABLE
+from http_client import HTTP
+
+
+def get_weather(city: str, api_key: str = "") -> str:
+    """Get current weather for a city."""
+    if not api_key:
+        return "Weather API key not configured."
+
+    try:
+        response = HTTP.get("http://api.openweathermap.org/data/2.5/weather",
+                            params={"q": city, "appid": api_key, "units": "metric"})
+        data = response.json()
+
+        if response.status_code == 200:
+            temp = data['main']['temp']
+            desc = data['weather'][0]['description']
+            humidity = data['main']['humidity']
+            feels_like = data['main']['feels_like']
+            return f"Weather in {city}: {temp}°C (feels like {feels_like}°C), {desc}, Humidity: {humidity}%"
+        else:
+            return f"Error: {data.get('message', 'Unknown error')}"
+    except Exception as e:
+        # requests puts the full URL, appid included, in its error messages
+        return f"Error: the weather service could not be reached ({type(e).__name__})"
+
+
+def get_crypto_price(crypto: str) -> str:
+    """Get cryptocurrency price."""
+    try:
+        coin_id = COIN_INDEX.lookup(crypto) or COIN_INDEX.resolve(crypto) or crypto.lower().strip()
+        quote = PRICE_TABLE.get(coin_id)
+
+        if quote:
+            price = quote['price']
+            change = quote['change']
+            change_symbol = "📈" if change > 0 else "📉"
+            return f"{coin_id.capitalize()}: ${price:,.2f} USD {change_symbol} ({change:.2f}% 24h, updated {quote['age']:.0f}s ago)"
+        else:
+            return f"'{crypto}' not found. Try: bitcoin, ethereum, cardano, solana"
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+
+def get_country_info(country: str) -> str:
+    """Get country information."""
+    def population_label(c):
+        return f"Population ({c['as_of']} snapshot)" if c['as_of'] else "Population"
+
+    def describe(c):
+        population = f"{c['population']:,}" if c['population'] is not None else 'N/A'
+        area = f"{c['area']:,.0f}" if c['area'] is not None else 'N/A'
+        return (f"{c['name']}: Capital - {c['capital']}, {population_label(c)} - {population}, "
+                f"Region - {c['region']}, Area - {area} km²")
+
+    # Answer from the offline index; only names it does not know go to the live API
+    records, unknown, totals = COUNTRY_INDEX.lookup_many(country)
+    if len(records) > 1:
+        lines = [f"- {describe(c)}" for c in records]
+        lines.append(f"\n**Total:** {population_label(records[0])} - {totals['population']:,}, "
+                     f"Area - {totals['area']:,.0f} km²")
+        if unknown:
+            lines.append(f"Could not find: {', '.join(unknown)}")
+        return "\n".join(lines)
+    if records and not unknown:
+        return describe(records[0])
+
+    try:
+        url = f"https://restcountries.com/v3.1/name/{country}"
+        response = HTTP.get(url)
+        data = response.json()
+
+        if response.status_code == 200 and len(data) > 0:
+            c = data[0]
+            name = c['name']['common']
+            capital = c.get('capital', ['N/A'])[0]
+            population = c.get('population', 'N/A')
+            region = c.get('region', 'N/A')
+            area = c.get('area', 'N/A')
+            return f"{name}: Capital - {capital}, Population - {population:,}, Region - {region}, Area - {area:,} km²"
+        else:
+            return f"Could not find '{country}'"
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+
+@lru_cache(maxsize=1)
+def _langchain_wikipedia():
+    """Build the LangChain Wikipedia tool once per process."""
+    from langchain_community.tools import WikipediaQueryRun
+    from langchain_community.utilities import WikipediaAPIWrapper
+    return WikipediaQueryRun(api_wrapper=WikipediaAPIWrapper(top_k_results=1, doc_content_chars_max=500))
+
+
+def _wikipedia_summary(query: str) -> str:
+    import wikipedia
+    return wikipedia.summary(query, sentences=3)
+
+
+def search_wikipedia(query: str, backend: str = "summary") -> str:
+    """Search Wikipedia through the `wikipedia` package ("summary") or LangChain ("langchain")."""
+    try:
+        # SQLAlchemy and the Wikipedia clients load on the first lookup, not at startup
+        from wiki_cache import WIKI_CACHE
+        if backend == "langchain":
+            fetch = lambda q: _langchain_wikipedia().run(q)
+        else:
+            fetch = _wikipedia_summary
+        # Both clients call requests directly, so only network errors trip Wikipedia's breaker
+        guarded = lambda q: BREAKERS.get("https://en.wikipedia.org").call(
+            fetch, q, failures=(requests.ConnectionError, requests.Timeout))
+        return WIKI_CACHE.get_or_fetch(backend, query, guarded)
+    except Exception as e:
+        return f"Error: {str(e)}"
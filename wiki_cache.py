@@ -0,0 +1,121 @@
+"""Persistent SQLite cache for Wikipedia lookups.
+
+Every "who is" / "tell me about" question used to cost several Wikipedia
+round trips. Results are now stored in a local SQLite database through
+SQLAlchemy, keyed by the normalized query, so they are shared by every
+Streamlit session and survive restarts. Entries expire after a TTL and the
+least recently used ones are evicted once the table grows past its cap.
+"""
+import os
+import threading
+import time
+
+from sqlalchemy import Column, Float, Integer, MetaData, String, Table, Text, create_engine, delete, event, func, select, update
+
+from route_cache import normalize_query
+
+
+DB_PATH = os.environ.get(
+    "AGENT_CACHE_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "agent_cache.db")
+)
+
+metadata = MetaData()
+
+wiki_cache_table = Table(
+    "wiki_cache",
+    metadata,
+    Column("key", String(512), primary_key=True),
+    Column("source", String(32), primary_key=True),
+    Column("result", Text, nullable=False),
+    Column("created_at", Float, nullable=False),
+    Column("last_access", Float, nullable=False, index=True),
+    Column("hits", Integer, nullable=False, default=0),
+)
+
+
+def make_engine(path: str = DB_PATH):
+    """Create a SQLite engine in WAL mode so readers never block the writer."""
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False, "timeout": 10})
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, _):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+    metadata.create_all(engine)
+    return engine
+
+
+class WikiCache:
+    """TTL + size-bounded result cache for Wikipedia lookups."""
+
+    def __init__(self, engine, ttl: float = 7 * 24 * 3600, max_entries: int = 5000, evict_every: int = 50):
+        self.engine = engine
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.evict_every = evict_every
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def get(self, source: str, query: str):
+        """Return the cached result for query, or None if missing or expired."""
+        key = normalize_query(query)
+        now = time.time()
+        with self.engine.begin() as conn:
+            row = conn.execute(
+                select(wiki_cache_table.c.result, wiki_cache_table.c.created_at)
+                .where(wiki_cache_table.c.key == key, wiki_cache_table.c.source == source)
+            ).first()
+            if row is None or now - row.created_at > self.ttl:
+                return None
+            conn.execute(
+                update(wiki_cache_table)
+                .where(wiki_cache_table.c.key == key, wiki_cache_table.c.source == source)
+                .values(last_access=now, hits=wiki_cache_table.c.hits + 1)
+            )
+        return row.result
+
+    def put(self, source: str, query: str, result: str):
+        """Store a result, evicting expired and least recently used entries now and then."""
+        key = normalize_query(query)
+        now = time.time()
+        with self.engine.begin() as conn:
+            conn.execute(delete(wiki_cache_table).where(
+                wiki_cache_table.c.key == key, wiki_cache_table.c.source == source
+            ))
+            conn.execute(wiki_cache_table.insert().values(
+                key=key, source=source, result=result, created_at=now, last_access=now, hits=0
+            ))
+        with self._lock:
+            self._writes += 1
+            due = self._writes % self.evict_every == 0
+        if due:
+            self.evict()
+
+    def evict(self):
+        """Drop expired entries, then the least recently used ones above max_entries."""
+        with self.engine.begin() as conn:
+            conn.execute(delete(wiki_cache_table).where(wiki_cache_table.c.created_at < time.time() - self.ttl))
+            count = conn.execute(select(func.count()).select_from(wiki_cache_table)).scalar()
+            if count > self.max_entries:
+                cutoff = conn.execute(
+                    select(wiki_cache_table.c.last_access)
+                    .order_by(wiki_cache_table.c.last_access.desc())
+                    .offset(self.max_entries).limit(1)
+                ).scalar()
+                conn.execute(delete(wiki_cache_table).where(wiki_cache_table.c.last_access <= cutoff))
+
+    def get_or_fetch(self, source: str, query: str, fetch):
+        """Return the cached result or call fetch(query) and cache it unless it is an error."""
+        cached = self.get(source, query)
+        if cached is not None:
+            return cached
+        result = fetch(query)
+        if result and not result.startswith("Error:"):
+            self.put(source, query, result)
+        return result
+
+
+WIKI_CACHE = WikiCache(make_engine())